@@ -4,6 +4,7 @@ import reflex as rx
 from app.states.app_state import AppState
 from app.states.project_state import ProjectState
 from app.states.file_prep_state import FilePrepState
+from app.states.job_state import JobState
 from app.components.initial_selection import (
     initial_selection_component,
 )
@@ -68,4 +69,4 @@ def index() -> rx.Component:
 app = rx.App(
     theme=rx.theme(appearance="light"), stylesheets=[]
 )
-app.add_page(index)
\ No newline at end of file
+app.add_page(index, on_load=JobState.restore_jobs)
\ No newline at end of file
@@ -4,6 +4,7 @@ from app.states.file_prep_state import (
     FilePrepState,
     MAX_PREVIEW_ROWS,
 )
+from app.states.preview_state import PreviewState
 from app.components.language_pair_selector import (
     language_pair_selector,
 )
@@ -42,53 +43,141 @@ def project_type_button(text: ProjectType) -> rx.Component:
     )
 
 
+def _paged_preview_table_component() -> rx.Component:
+    """Displays one page of the spooled upload data, fetched from the server on demand."""
+    return rx.el.div(
+        rx.el.div(
+            rx.el.table(
+                rx.el.thead(
+                    rx.el.tr(
+                        rx.el.th(
+                            "#",
+                            class_name="p-2 border-b border-gray-300 text-left text-sm font-semibold text-gray-600 bg-gray-100",
+                        ),
+                        rx.foreach(
+                            PreviewState.preview_headers,
+                            lambda header: rx.el.th(
+                                header,
+                                class_name="p-2 border-b border-gray-300 text-left text-sm font-semibold text-gray-600 bg-gray-100",
+                            ),
+                        ),
+                    )
+                ),
+                rx.el.tbody(
+                    rx.foreach(
+                        PreviewState.preview_page_rows,
+                        lambda row_data, index: rx.el.tr(
+                            rx.el.td(
+                                PreviewState.preview_first_row_number
+                                + index,
+                                class_name="p-2 border-b border-gray-200 text-xs text-gray-400",
+                            ),
+                            rx.foreach(
+                                PreviewState.preview_headers,
+                                lambda header_key: rx.el.td(
+                                    row_data.get(
+                                        header_key, ""
+                                    ),
+                                    class_name="p-2 border-b border-gray-200 text-sm text-gray-700",
+                                ),
+                            ),
+                        ),
+                    )
+                ),
+                class_name="w-full border-collapse border border-gray-200 rounded-md shadow-sm",
+            ),
+            class_name="overflow-auto max-h-96",
+        ),
+        rx.el.div(
+            rx.el.button(
+                "⬅ Previous",
+                on_click=PreviewState.previous_preview_page,
+                disabled=PreviewState.preview_page == 0,
+                class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed",
+            ),
+            rx.el.span(
+                "Rows ",
+                PreviewState.preview_first_row_number,
+                "-",
+                PreviewState.preview_last_row_number,
+                " of ",
+                PreviewState.preview_total_rows,
+                " (page ",
+                PreviewState.preview_page + 1,
+                " of ",
+                PreviewState.preview_page_count,
+                ")",
+                class_name="text-sm text-gray-600",
+            ),
+            rx.el.button(
+                "Next ➡",
+                on_click=PreviewState.next_preview_page,
+                disabled=PreviewState.preview_page
+                >= PreviewState.preview_page_count - 1,
+                class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed",
+            ),
+            class_name="flex justify-between items-center mt-2",
+        ),
+    )
+
+
 def _preview_table_component() -> rx.Component:
     """Displays a preview of the uploaded data."""
     return rx.el.div(
         rx.el.h5(
-            "Data Preview (First "
-            + str(MAX_PREVIEW_ROWS)
-            + " Rows)",
+            rx.cond(
+                PreviewState.preview_total_rows > 0,
+                "Data Preview",
+                "Data Preview (First "
+                + str(MAX_PREVIEW_ROWS)
+                + " Rows)",
+            ),
             class_name="text-lg font-medium mb-2 text-gray-700",
         ),
         rx.cond(
-            FilePrepState.preview_table_data.length() > 0,
-            rx.el.div(
-                rx.el.table(
-                    rx.el.thead(
-                        rx.el.tr(
-                            rx.foreach(
-                                FilePrepState.preview_table_headers,
-                                lambda header: rx.el.th(
-                                    header,
-                                    class_name="p-2 border-b border-gray-300 text-left text-sm font-semibold text-gray-600 bg-gray-100",
-                                ),
-                            )
-                        )
-                    ),
-                    rx.el.tbody(
-                        rx.foreach(
-                            FilePrepState.preview_table_data,
-                            lambda row_data: rx.el.tr(
+            PreviewState.preview_total_rows > 0,
+            _paged_preview_table_component(),
+            rx.cond(
+                FilePrepState.preview_table_data.length()
+                > 0,
+                rx.el.div(
+                    rx.el.table(
+                        rx.el.thead(
+                            rx.el.tr(
                                 rx.foreach(
                                     FilePrepState.preview_table_headers,
-                                    lambda header_key: rx.el.td(
-                                        row_data.get(
-                                            header_key, ""
-                                        ),
-                                        class_name="p-2 border-b border-gray-200 text-sm text-gray-700",
+                                    lambda header: rx.el.th(
+                                        header,
+                                        class_name="p-2 border-b border-gray-300 text-left text-sm font-semibold text-gray-600 bg-gray-100",
                                     ),
                                 )
-                            ),
-                        )
+                            )
+                        ),
+                        rx.el.tbody(
+                            rx.foreach(
+                                FilePrepState.preview_table_data,
+                                lambda row_data: rx.el.tr(
+                                    rx.foreach(
+                                        FilePrepState.preview_table_headers,
+                                        lambda header_key: rx.el.td(
+                                            row_data.get(
+                                                header_key,
+                                                "",
+                                            ),
+                                            class_name="p-2 border-b border-gray-200 text-sm text-gray-700",
+                                        ),
+                                    )
+                                ),
+                            )
+                        ),
+                        class_name="w-full border-collapse border border-gray-200 rounded-md shadow-sm",
                     ),
-                    class_name="w-full border-collapse border border-gray-200 rounded-md shadow-sm",
+                    class_name="overflow-x-auto max-h-96",
+                ),
+                rx.el.p(
+                    "No data to preview or files not yet processed for preview.",
+                    class_name="text-gray-500 italic",
                 ),
-                class_name="overflow-x-auto max-h-96",
-            ),
-            rx.el.p(
-                "No data to preview or files not yet processed for preview.",
-                class_name="text-gray-500 italic",
             ),
         ),
         class_name="my-6 p-4 border border-gray-200 rounded-lg bg-white",
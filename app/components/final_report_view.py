@@ -0,0 +1,571 @@
+import reflex as rx
+from app.states.final_report_state import (
+    FinalReportState,
+    REPORT_UPLOAD_ID,
+)
+from app.utils.report_agreement import MetricAgreement
+from app.utils.report_ingest import ReportFileSummary
+from app.utils.report_stats import EngineComparison
+
+_HEADER_CLASS = "p-2 border-b border-gray-300 text-left text-sm font-semibold text-gray-600 bg-gray-100"
+_CELL_CLASS = (
+    "p-2 border-b border-gray-200 text-sm text-gray-700"
+)
+
+
+def _report_upload() -> rx.Component:
+    """Drop zone for the scored workbooks evaluators send back."""
+    return rx.el.div(
+        rx.upload.root(
+            rx.el.div(
+                rx.icon(
+                    tag="cloud_upload",
+                    class_name="w-8 h-8 mb-2 text-gray-500",
+                ),
+                rx.el.p(
+                    rx.el.span(
+                        "Click to select returned workbooks",
+                        class_name="font-semibold",
+                    ),
+                    " or drag and drop",
+                    class_name="text-xs text-gray-600",
+                ),
+                rx.el.span(
+                    ".xlsx files built from the evaluation template",
+                    class_name="text-xs text-gray-500",
+                ),
+                class_name="flex flex-col items-center justify-center py-4 px-2 text-center",
+            ),
+            id=REPORT_UPLOAD_ID,
+            multiple=True,
+            accept={
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": [
+                    ".xlsx"
+                ]
+            },
+            border="2px dashed #d1d5db",
+            padding="1rem",
+            class_name="bg-gray-50 hover:bg-gray-100 rounded-lg cursor-pointer transition-colors",
+        ),
+        rx.el.div(
+            rx.foreach(
+                rx.selected_files(REPORT_UPLOAD_ID),
+                lambda file_name: rx.el.span(
+                    file_name,
+                    class_name="text-xs text-gray-600",
+                ),
+            ),
+            class_name="flex flex-col mt-2",
+        ),
+        rx.el.div(
+            rx.el.button(
+                "Ingest Returned Workbooks",
+                on_click=FinalReportState.handle_report_upload(
+                    rx.upload_files(
+                        upload_id=REPORT_UPLOAD_ID
+                    )
+                ),
+                disabled=FinalReportState.is_ingesting,
+                class_name="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed transition duration-150",
+            ),
+            rx.el.button(
+                "Re-run Final Report",
+                on_click=FinalReportState.rerun_report,
+                disabled=FinalReportState.is_ingesting,
+                class_name="px-4 py-2 bg-gray-200 text-gray-700 rounded hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed transition duration-150",
+            ),
+            class_name="flex gap-2 mt-3",
+        ),
+        class_name="mb-6 p-4 border border-gray-200 rounded-lg bg-white shadow-sm",
+    )
+
+
+def _report_file_row(
+    report_file: ReportFileSummary,
+) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            report_file["file_name"], class_name=_CELL_CLASS
+        ),
+        rx.el.td(
+            report_file["source_language"]
+            + " → "
+            + report_file["target_language"],
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            report_file["engine"], class_name=_CELL_CLASS
+        ),
+        rx.el.td(
+            report_file["evaluator"], class_name=_CELL_CLASS
+        ),
+        rx.el.td(
+            report_file["scored_rows"].to_string()
+            + " / "
+            + report_file["row_count"].to_string(),
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            report_file["mean_overall"],
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            FinalReportState.report_file_pass_rates.get(
+                report_file["partition_id"], ""
+            ),
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            rx.el.button(
+                "Remove",
+                on_click=lambda: FinalReportState.remove_report_file(
+                    report_file["partition_id"]
+                ),
+                class_name="text-xs text-red-600 hover:text-red-700",
+            ),
+            class_name=_CELL_CLASS,
+        ),
+    )
+
+
+def _score_card(label: str, value: rx.Var) -> rx.Component:
+    return rx.el.div(
+        rx.el.span(
+            label, class_name="text-xs text-gray-500"
+        ),
+        rx.el.span(
+            value,
+            class_name="text-lg font-semibold text-gray-800",
+        ),
+        class_name="flex flex-col p-3 border border-blue-200 rounded bg-blue-50",
+    )
+
+
+def _report_totals() -> rx.Component:
+    """Project-wide figures, kept up to date incrementally by each run."""
+    return rx.el.div(
+        rx.el.div(
+            _score_card(
+                "Overall Score",
+                FinalReportState.report_mean_overall,
+            ),
+            rx.cond(
+                FinalReportState.report_pass_rate != "",
+                _score_card(
+                    "Pass Rate",
+                    FinalReportState.report_pass_rate
+                    + " ("
+                    + FinalReportState.report_passed_rows.to_string()
+                    + " passed)",
+                ),
+            ),
+            class_name="flex flex-wrap gap-2 mb-2",
+        ),
+        rx.el.p(
+            FinalReportState.report_files.length().to_string()
+            + " files, "
+            + FinalReportState.report_scored_rows.to_string()
+            + " of "
+            + FinalReportState.report_total_rows.to_string()
+            + " rows scored",
+            class_name="text-sm text-gray-600 mb-2",
+        ),
+        rx.el.div(
+            rx.foreach(
+                FinalReportState.report_metric_means,
+                lambda metric: rx.el.div(
+                    rx.el.span(
+                        metric["name"],
+                        class_name="text-xs text-gray-500",
+                    ),
+                    rx.el.span(
+                        metric["mean"],
+                        class_name="text-lg font-semibold text-gray-800",
+                    ),
+                    class_name="flex flex-col p-3 border border-gray-200 rounded bg-gray-50",
+                ),
+            ),
+            class_name="flex flex-wrap gap-2",
+        ),
+        class_name="mb-6",
+    )
+
+
+def _report_files_table() -> rx.Component:
+    return rx.el.div(
+        rx.el.table(
+            rx.el.thead(
+                rx.el.tr(
+                    rx.foreach(
+                        [
+                            "File",
+                            "Language Pair",
+                            "MT Engine",
+                            "Evaluator",
+                            "Scored Rows",
+                            "Mean Overall Score",
+                            "Pass Rate",
+                            "",
+                        ],
+                        lambda header: rx.el.th(
+                            header, class_name=_HEADER_CLASS
+                        ),
+                    )
+                )
+            ),
+            rx.el.tbody(
+                rx.foreach(
+                    FinalReportState.report_files,
+                    _report_file_row,
+                )
+            ),
+            class_name="w-full border-collapse border border-gray-200 rounded-md shadow-sm",
+        ),
+        class_name="overflow-auto max-h-[32rem]",
+    )
+
+
+_SELECT_CLASS = "p-2 border border-gray-300 rounded bg-white text-sm focus:outline-none focus:ring-2 focus:ring-blue-500"
+
+
+def _query_select(
+    placeholder: str,
+    options: rx.Var,
+    value: rx.Var,
+    on_change,
+) -> rx.Component:
+    return rx.el.select(
+        rx.el.option(placeholder, value=""),
+        rx.foreach(
+            options,
+            lambda option: rx.el.option(
+                option, value=option
+            ),
+        ),
+        value=value,
+        on_change=on_change,
+        class_name=_SELECT_CLASS,
+    )
+
+
+def _metric_query() -> rx.Component:
+    """Mean of one metric over the runs matching a language pair, engine and evaluator."""
+    return rx.el.div(
+        rx.el.h5(
+            "Metric Query",
+            class_name="text-md font-semibold text-gray-700 mb-2",
+        ),
+        rx.el.div(
+            rx.el.select(
+                rx.el.option(
+                    "Metric...", value="", disabled=True
+                ),
+                rx.foreach(
+                    FinalReportState.report_metric_means,
+                    lambda metric: rx.el.option(
+                        metric["name"], value=metric["name"]
+                    ),
+                ),
+                value=FinalReportState.query_metric,
+                on_change=FinalReportState.set_query_metric,
+                class_name=_SELECT_CLASS,
+            ),
+            _query_select(
+                "Any language pair",
+                FinalReportState.catalog_language_pairs,
+                FinalReportState.query_language_pair,
+                FinalReportState.set_query_language_pair,
+            ),
+            _query_select(
+                "Any engine",
+                FinalReportState.catalog_engines,
+                FinalReportState.query_engine,
+                FinalReportState.set_query_engine,
+            ),
+            _query_select(
+                "Any evaluator",
+                FinalReportState.catalog_evaluators,
+                FinalReportState.query_evaluator,
+                FinalReportState.set_query_evaluator,
+            ),
+            rx.el.input(
+                placeholder="Last N runs (blank for all)",
+                value=FinalReportState.query_latest,
+                on_change=FinalReportState.set_query_latest,
+                type="number",
+                min="1",
+                class_name="w-48 " + _SELECT_CLASS,
+            ),
+            rx.el.button(
+                "Run Query",
+                on_click=FinalReportState.run_metric_query,
+                disabled=FinalReportState.query_metric
+                == "",
+                class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed transition duration-150",
+            ),
+            class_name="flex flex-wrap items-center gap-2 mb-2",
+        ),
+        rx.cond(
+            FinalReportState.query_result["metric"] != "",
+            rx.el.p(
+                "Mean "
+                + FinalReportState.query_result["metric"]
+                + ": "
+                + rx.cond(
+                    FinalReportState.query_result["mean"]
+                    != "",
+                    FinalReportState.query_result["mean"],
+                    "no scores",
+                )
+                + " over "
+                + FinalReportState.query_result[
+                    "count"
+                ].to_string()
+                + " scores from "
+                + FinalReportState.query_result[
+                    "partitions"
+                ].to_string()
+                + " runs",
+                class_name="text-sm text-gray-700",
+            ),
+        ),
+        class_name="mt-6",
+    )
+
+
+def _agreement_row(
+    agreement: MetricAgreement,
+) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            agreement["metric"], class_name=_CELL_CLASS
+        ),
+        rx.el.td(
+            agreement["raters"].to_string(),
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            agreement["items"].to_string(),
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            agreement["alpha"], class_name=_CELL_CLASS
+        ),
+        rx.el.td(
+            agreement["kappa"]
+            + rx.cond(
+                agreement["rater_pairs"] > 0,
+                " ("
+                + agreement["rater_pairs"].to_string()
+                + " rater pairs)",
+                "",
+            ),
+            class_name=_CELL_CLASS,
+        ),
+    )
+
+
+def _metric_agreements() -> rx.Component:
+    """Agreement between evaluators on the segments several of them scored."""
+    return rx.el.div(
+        rx.el.h5(
+            "Evaluator Agreement",
+            class_name="text-md font-semibold text-gray-700 mb-2",
+        ),
+        rx.el.p(
+            "Krippendorff's alpha (interval) and Cohen's kappa averaged over evaluator pairs, on segments scored by at least two evaluators. Blank where no segment was scored twice.",
+            class_name="text-xs text-gray-500 mb-2",
+        ),
+        rx.el.table(
+            rx.el.thead(
+                rx.el.tr(
+                    rx.foreach(
+                        [
+                            "Metric",
+                            "Evaluators",
+                            "Shared Segments",
+                            "Krippendorff's Alpha",
+                            "Cohen's Kappa",
+                        ],
+                        lambda header: rx.el.th(
+                            header, class_name=_HEADER_CLASS
+                        ),
+                    )
+                )
+            ),
+            rx.el.tbody(
+                rx.foreach(
+                    FinalReportState.metric_agreements,
+                    _agreement_row,
+                )
+            ),
+            class_name="w-full border-collapse border border-gray-200 rounded-md shadow-sm",
+        ),
+        class_name="mt-6",
+    )
+
+
+def _comparison_row(
+    comparison: EngineComparison,
+) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            comparison["language_pair"],
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            comparison["metric"], class_name=_CELL_CLASS
+        ),
+        rx.el.td(
+            comparison["engine_a"]
+            + " ("
+            + comparison["mean_a"]
+            + ") vs "
+            + comparison["engine_b"]
+            + " ("
+            + comparison["mean_b"]
+            + ")",
+            class_name=_CELL_CLASS,
+        ),
+        rx.el.td(
+            comparison["segments"].to_string(),
+            class_name=_CELL_CLASS,
+        ),
+        rx.cond(
+            comparison["error"] != "",
+            rx.el.td(
+                comparison["error"],
+                col_span=2,
+                class_name=_CELL_CLASS + " text-red-600",
+            ),
+            rx.fragment(
+                rx.el.td(
+                    comparison["mean_difference"]
+                    + " "
+                    + comparison["difference_ci"],
+                    class_name=_CELL_CLASS,
+                ),
+                rx.el.td(
+                    comparison["win_rate"]
+                    + " "
+                    + comparison["win_rate_ci"],
+                    class_name=_CELL_CLASS,
+                ),
+            ),
+        ),
+    )
+
+
+def _engine_comparisons() -> rx.Component:
+    """Paired bootstrap comparison of the engines of each language pair."""
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h5(
+                "Engine Comparisons",
+                class_name="text-md font-semibold text-gray-700",
+            ),
+            rx.el.button(
+                "Compare Engines",
+                on_click=FinalReportState.compare_engines,
+                disabled=FinalReportState.is_comparing
+                | FinalReportState.is_ingesting,
+                class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed transition duration-150",
+            ),
+            class_name="flex items-center justify-between mb-2",
+        ),
+        rx.el.p(
+            "Mean difference and win rate of the first engine over the second on the segments both scored, with 95% bootstrap confidence intervals.",
+            class_name="text-xs text-gray-500 mb-2",
+        ),
+        rx.cond(
+            FinalReportState.engine_comparisons.length()
+            > 0,
+            rx.el.div(
+                rx.el.table(
+                    rx.el.thead(
+                        rx.el.tr(
+                            rx.foreach(
+                                [
+                                    "Language Pair",
+                                    "Metric",
+                                    "Engines",
+                                    "Segments",
+                                    "Mean Difference (95% CI)",
+                                    "Win Rate (95% CI)",
+                                ],
+                                lambda header: rx.el.th(
+                                    header,
+                                    class_name=_HEADER_CLASS,
+                                ),
+                            )
+                        )
+                    ),
+                    rx.el.tbody(
+                        rx.foreach(
+                            FinalReportState.engine_comparisons,
+                            _comparison_row,
+                        )
+                    ),
+                    class_name="w-full border-collapse border border-gray-200 rounded-md shadow-sm",
+                ),
+                class_name="overflow-auto max-h-[32rem]",
+            ),
+        ),
+        class_name="mt-6",
+    )
+
+
+def _ingest_errors() -> rx.Component:
+    return rx.cond(
+        FinalReportState.ingest_errors.length() > 0,
+        rx.el.div(
+            rx.el.h5(
+                "Files that could not be read",
+                class_name="text-md font-semibold mb-2 text-red-700",
+            ),
+            rx.foreach(
+                FinalReportState.ingest_errors,
+                lambda item: rx.el.p(
+                    item[1],
+                    class_name="text-sm text-red-600",
+                ),
+            ),
+            class_name="mb-6 p-4 border border-red-200 rounded-lg bg-red-50",
+        ),
+    )
+
+
+def final_report_view() -> rx.Component:
+    """Final Report: ingests returned evaluator workbooks and lists the results."""
+    return rx.el.div(
+        rx.el.h3(
+            "Final Report",
+            class_name="text-2xl font-semibold mb-4 text-gray-800",
+        ),
+        rx.el.p(
+            "Upload the scored workbooks returned by evaluators. Only the scoring and calculated score columns are read back.",
+            class_name="text-sm text-gray-600 mb-4",
+        ),
+        _report_upload(),
+        _ingest_errors(),
+        rx.cond(
+            FinalReportState.report_files.length() > 0,
+            rx.el.div(
+                _report_totals(),
+                _report_files_table(),
+                _metric_query(),
+                _engine_comparisons(),
+                rx.cond(
+                    FinalReportState.metric_agreements.length()
+                    > 0,
+                    _metric_agreements(),
+                ),
+            ),
+            rx.el.p(
+                "No returned workbooks have been ingested for this project yet.",
+                class_name="text-sm text-gray-500",
+            ),
+        ),
+        on_mount=FinalReportState.load_report,
+        class_name="p-6 bg-white rounded-lg shadow border border-gray-200",
+    )
\ No newline at end of file
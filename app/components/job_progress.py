@@ -0,0 +1,92 @@
+import reflex as rx
+from app.states.job_state import JobState
+from app.utils.jobs import JobSnapshot
+
+
+def _job_row(job: JobSnapshot) -> rx.Component:
+    """One background job with its progress bar and controls."""
+    is_running = (job["status"] == "running") | (
+        job["status"] == "queued"
+    )
+    return rx.el.div(
+        rx.el.div(
+            rx.el.span(
+                job["label"],
+                class_name="text-sm font-medium text-gray-800",
+            ),
+            rx.el.span(
+                rx.cond(
+                    is_running,
+                    job["percent"].to_string() + "%",
+                    job["status"],
+                ),
+                class_name="text-xs text-gray-500",
+            ),
+            class_name="flex justify-between items-center mb-1",
+        ),
+        rx.el.div(
+            rx.el.div(
+                class_name=rx.cond(
+                    job["status"] == "failed",
+                    "h-2 bg-red-500 rounded",
+                    "h-2 bg-blue-600 rounded transition-all duration-300",
+                ),
+                style={
+                    "width": job["percent"].to_string()
+                    + "%"
+                },
+            ),
+            class_name="w-full h-2 bg-gray-200 rounded mb-1",
+        ),
+        rx.el.div(
+            rx.el.span(
+                rx.cond(
+                    job["status"] == "failed",
+                    job["error"],
+                    job["message"] + " " + job["eta_text"],
+                ),
+                class_name=rx.cond(
+                    job["status"] == "failed",
+                    "text-xs text-red-600",
+                    "text-xs text-gray-500",
+                ),
+            ),
+            rx.cond(
+                is_running,
+                rx.el.button(
+                    "Cancel",
+                    on_click=lambda: JobState.cancel_job(
+                        job["job_id"]
+                    ),
+                    class_name="text-xs text-red-600 hover:text-red-700",
+                ),
+                rx.el.button(
+                    "Dismiss",
+                    on_click=lambda: JobState.dismiss_job(
+                        job["job_id"]
+                    ),
+                    class_name="text-xs text-gray-500 hover:text-gray-700",
+                ),
+            ),
+            class_name="flex justify-between items-center",
+        ),
+        class_name="p-3 border border-gray-200 rounded bg-white shadow-sm",
+    )
+
+
+def job_progress_panel() -> rx.Component:
+    """Progress of the background jobs started from this browser, if any."""
+    return rx.cond(
+        JobState.jobs.length() > 0,
+        rx.el.div(
+            rx.el.h5(
+                "Background Jobs",
+                class_name="text-md font-semibold mb-2 text-gray-700",
+            ),
+            rx.el.div(
+                rx.foreach(JobState.jobs, _job_row),
+                class_name="flex flex-col gap-2",
+            ),
+            class_name="mb-6 max-w-2xl",
+        ),
+    )
\ No newline at end of file
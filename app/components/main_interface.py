@@ -2,6 +2,10 @@ import reflex as rx
 from app.states.project_state import ProjectState
 from app.states.app_state import AppState
 from app.components.file_prep_view import file_prep_view
+from app.components.final_report_view import (
+    final_report_view,
+)
+from app.components.job_progress import job_progress_panel
 
 
 def default_view() -> rx.Component:
@@ -41,14 +45,12 @@ def placeholder_view(title: str) -> rx.Component:
 def main_interface_component() -> rx.Component:
     """Component displaying the main content based on LTX Bench sidebar selection."""
     return rx.el.div(
+        job_progress_panel(),
         rx.match(
             AppState.selected_view,
             ("default", default_view()),
             ("file_prep", file_prep_view()),
-            (
-                "final_file_prep",
-                placeholder_view("Final File Prep"),
-            ),
+            ("final_file_prep", final_report_view()),
             (
                 "update_tableau",
                 placeholder_view("Update Tableau"),
@@ -58,7 +58,7 @@ def _file_uploader_for_column(
                         class_name="text-xs text-gray-600",
                     ),
                     rx.el.span(
-                        ".txt, .csv, .tsv",
+                        ".txt, .csv, .tsv, .xlsx (or .gz / .zip)",
                         class_name="text-xs text-gray-500",
                     ),
                     class_name="flex flex-col items-center justify-center py-4 px-2 text-center",
@@ -69,6 +69,11 @@ def _file_uploader_for_column(
                     "text/plain": [".txt"],
                     "text/csv": [".csv"],
                     "text/tab-separated-values": [".tsv"],
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": [
+                        ".xlsx"
+                    ],
+                    "application/gzip": [".gz"],
+                    "application/zip": [".zip"],
                 },
                 on_drop=FilePrepState.handle_file_upload(
                     rx.upload_files(
@@ -0,0 +1,450 @@
+import reflex as rx
+from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import shutil
+from app.states.job_state import JobState
+from app.states.project_state import ProjectState
+from app.utils.jobs import (
+    FINISHED_STATUSES,
+    JobSnapshot,
+    get_job_registry,
+)
+from app.utils.report_agreement import (
+    MetricAgreement,
+    metric_agreement,
+)
+from app.utils.report_ingest import ReportFileSummary
+from app.utils.report_manifest import (
+    IngestManifest,
+    MetricMean,
+    metric_means,
+    remove_returned_workbook,
+    report_rerun_work,
+)
+from app.utils.report_stats import (
+    EngineComparison,
+    engine_comparison_work,
+)
+from app.utils.results_store import get_results_store
+from app.utils.scoring import (
+    MetricQueryResult,
+    query_metric_mean,
+    score_project,
+)
+
+logger = logging.getLogger(__name__)
+REPORT_UPLOAD_ID = "final_report_upload"
+INGEST_POLL_SECONDS = 0.5
+
+
+async def _wait_for_job(
+    job_id: str,
+) -> Optional[JobSnapshot]:
+    """Polls the registry until the job has finished; None if it is unknown."""
+    registry = get_job_registry()
+    while True:
+        snapshot = registry.snapshot(job_id)
+        if (
+            snapshot is None
+            or snapshot["status"] in FINISHED_STATUSES
+        ):
+            return snapshot
+        await asyncio.sleep(INGEST_POLL_SECONDS)
+
+
+class FinalReportState(rx.State):
+    """
+    Collects the scored workbooks evaluators send back. Uploads are kept on
+    disk and ingested into the results store as a background job that only
+    parses new or changed workbooks; the state only holds one summary line
+    per ingested file, the project-wide metric means and the Overall Score
+    and pass rate recomputed from the stored scores.
+    """
+
+    report_files: List[ReportFileSummary] = []
+    report_metric_means: List[MetricMean] = []
+    report_scored_rows: int = 0
+    report_total_rows: int = 0
+    report_mean_overall: str = ""
+    report_pass_rate: str = ""
+    report_passed_rows: int = 0
+    # Pass rate of each ingested file by partition id.
+    report_file_pass_rates: Dict[str, str] = {}
+    ingest_errors: Dict[str, str] = {}
+    ingest_job_id: str = ""
+    is_ingesting: bool = False
+    engine_comparisons: List[EngineComparison] = []
+    metric_agreements: List[MetricAgreement] = []
+    # Keys of the ingested partitions, for the metric query filters.
+    catalog_language_pairs: List[str] = []
+    catalog_engines: List[str] = []
+    catalog_evaluators: List[str] = []
+    query_metric: str = ""
+    query_language_pair: str = ""
+    query_engine: str = ""
+    query_evaluator: str = ""
+    query_latest: str = "3"
+    query_result: MetricQueryResult = {
+        "metric": "",
+        "mean": "",
+        "count": 0,
+        "partitions": 0,
+    }
+    comparison_job_id: str = ""
+    is_comparing: bool = False
+
+    async def _project(self) -> str:
+        project_state = await self.get_state(ProjectState)
+        return project_state.selected_project or ""
+
+    def _load_summaries(self, project: str):
+        store = get_results_store()
+        manifest = IngestManifest.load(store, project)
+        catalog_keys = store.catalog_keys(project)
+        self.catalog_language_pairs = catalog_keys[
+            "language_pairs"
+        ]
+        self.catalog_engines = catalog_keys["engines"]
+        self.catalog_evaluators = catalog_keys["evaluators"]
+        self.report_files = manifest.summaries()
+        self.report_metric_means = metric_means(
+            manifest.totals
+        )
+        self.report_scored_rows = manifest.totals[
+            "scored_rows"
+        ]
+        self.report_total_rows = manifest.totals[
+            "row_count"
+        ]
+
+    @rx.event
+    async def load_report(self):
+        """Shows the files already ingested for the selected project."""
+        project = await self._project()
+        if project:
+            self._load_summaries(project)
+            return [
+                FinalReportState.refresh_scores,
+                FinalReportState.refresh_agreement,
+            ]
+        self.report_files = []
+        self.report_metric_means = []
+        self.report_scored_rows = 0
+        self.report_total_rows = 0
+        self.report_mean_overall = ""
+        self.report_pass_rate = ""
+        self.report_passed_rows = 0
+        self.report_file_pass_rates = {}
+        self.metric_agreements = []
+        self.catalog_language_pairs = []
+        self.catalog_engines = []
+        self.catalog_evaluators = []
+
+    @rx.event(background=True)
+    async def refresh_scores(self):
+        """
+        Recomputes the Overall Score and pass/fail of every ingested segment
+        with the project's current weights and pass threshold.
+        """
+        async with self:
+            project_state = await self.get_state(
+                ProjectState
+            )
+            project = project_state.selected_project
+            if not project:
+                return
+            columns = list(
+                project_state.project_excel_columns.get(
+                    project, []
+                )
+            )
+            metric_weights = dict(
+                project_state.project_metric_weights.get(
+                    project
+                )
+                or {}
+            )
+            pass_threshold = (
+                project_state.project_pass_threshold.get(
+                    project
+                )
+            )
+        scores = await asyncio.to_thread(
+            score_project,
+            project,
+            columns,
+            metric_weights,
+            pass_threshold,
+            get_results_store(),
+        )
+        async with self:
+            self.report_mean_overall = scores[
+                "mean_overall"
+            ]
+            self.report_pass_rate = scores["pass_rate"]
+            self.report_passed_rows = scores[
+                "passed_segments"
+            ]
+            self.report_file_pass_rates = {
+                partition_id: (
+                    f"{partition['passed_segments'] / partition['scored_segments']:.1%}"
+                    if partition["scored_segments"]
+                    and pass_threshold is not None
+                    else ""
+                )
+                for partition_id, partition in scores[
+                    "by_partition"
+                ].items()
+            }
+
+    def _start_rerun(
+        self, project: str, project_columns: List[dict]
+    ):
+        job_id = get_job_registry().submit(
+            "report_ingest",
+            f"Updating the Final Report of '{project}'",
+            report_rerun_work(
+                project,
+                project_columns,
+                get_results_store(),
+            ),
+        )
+        self.ingest_job_id = job_id
+        self.ingest_errors = {}
+        self.engine_comparisons = []
+        return [
+            JobState.track_job(job_id),
+            FinalReportState.watch_ingestion,
+        ]
+
+    @rx.event(background=True)
+    async def refresh_agreement(self):
+        """
+        Recomputes inter-annotator agreement on each of the project's
+        included metrics, over the segments several evaluators scored.
+        """
+        async with self:
+            project_state = await self.get_state(
+                ProjectState
+            )
+            project = project_state.selected_project
+            if not project:
+                return
+            included = (
+                project_state.project_included_metrics.get(
+                    project
+                )
+                or {"evergreen": [], "custom": []}
+            )
+            metric_names = list(included["evergreen"]) + [
+                metric["name"]
+                for metric in included["custom"]
+            ]
+        agreements = await asyncio.to_thread(
+            metric_agreement,
+            project,
+            metric_names,
+            get_results_store(),
+        )
+        async with self:
+            self.metric_agreements = agreements
+
+    @rx.event
+    async def rerun_report(self):
+        """Re-reads the returned workbooks that are new or changed since the last run."""
+        project_state = await self.get_state(ProjectState)
+        project = project_state.selected_project
+        if not project or self.is_ingesting:
+            return
+        return self._start_rerun(
+            project,
+            project_state.project_excel_columns.get(
+                project, []
+            ),
+        )
+
+    @rx.event
+    async def handle_report_upload(
+        self, files: List[rx.UploadFile]
+    ):
+        """
+        Saves the returned workbooks next to the earlier ones (a corrected
+        file replaces its namesake) and updates the report in the background.
+        """
+        project_state = await self.get_state(ProjectState)
+        project = project_state.selected_project
+        if not project or not files:
+            return
+        store = get_results_store()
+        returns_dir = store.returns_dir(project)
+        for upload in files:
+            file_name = os.path.basename(
+                upload.name or "workbook.xlsx"
+            )
+            with open(
+                os.path.join(returns_dir, file_name), "wb"
+            ) as saved:
+                shutil.copyfileobj(
+                    upload.file, saved, 1024 * 1024
+                )
+        yield rx.clear_selected_files(REPORT_UPLOAD_ID)
+        for event in self._start_rerun(
+            project,
+            project_state.project_excel_columns.get(
+                project, []
+            ),
+        ):
+            yield event
+
+    @rx.event(background=True)
+    async def watch_ingestion(self):
+        """
+        Waits for the ingestion job, then refreshes the file list and errors.
+        An upload while it waits starts a newer job (queued behind this one
+        on the project lock), which it then follows instead, so the refresh
+        covers the latest job.
+        """
+        async with self:
+            if self.is_ingesting or not self.ingest_job_id:
+                return
+            self.is_ingesting = True
+            job_id = self.ingest_job_id
+        try:
+            while True:
+                snapshot = await _wait_for_job(job_id)
+                async with self:
+                    if self.ingest_job_id == job_id:
+                        break
+                    job_id = self.ingest_job_id
+            async with self:
+                if (
+                    snapshot is not None
+                    and snapshot["status"] == "done"
+                ):
+                    self.ingest_errors = json.loads(
+                        snapshot["result"]
+                    )["errors"]
+                project = await self._project()
+                if project:
+                    self._load_summaries(project)
+        finally:
+            async with self:
+                self.is_ingesting = False
+        return [
+            FinalReportState.refresh_scores,
+            FinalReportState.refresh_agreement,
+        ]
+
+    @rx.event(background=True)
+    async def remove_report_file(self, partition_id: str):
+        """
+        Drops one ingested file from the report. Runs in the background, as
+        it waits for any rerun of the project to finish first.
+        """
+        async with self:
+            project = await self._project()
+        if not project:
+            return
+        await remove_returned_workbook(
+            project, partition_id
+        )
+        async with self:
+            self._load_summaries(project)
+        return [
+            FinalReportState.refresh_scores,
+            FinalReportState.refresh_agreement,
+        ]
+
+    @rx.event
+    async def compare_engines(self):
+        """Starts the paired bootstrap comparison of every engine pair."""
+        project_state = await self.get_state(ProjectState)
+        project = project_state.selected_project
+        if not project or self.is_comparing:
+            return
+        job_id = get_job_registry().submit(
+            "report_stats",
+            f"Comparing MT engines of '{project}'",
+            engine_comparison_work(
+                project,
+                project_state.project_excel_columns.get(
+                    project, []
+                ),
+                project_state.project_metric_weights.get(
+                    project
+                )
+                or {},
+                get_results_store(),
+            ),
+        )
+        self.comparison_job_id = job_id
+        self.engine_comparisons = []
+        return [
+            JobState.track_job(job_id),
+            FinalReportState.watch_comparison,
+        ]
+
+    @rx.event(background=True)
+    async def watch_comparison(self):
+        """Waits for the comparison job, then shows its results."""
+        async with self:
+            if (
+                self.is_comparing
+                or not self.comparison_job_id
+            ):
+                return
+            self.is_comparing = True
+            job_id = self.comparison_job_id
+        try:
+            snapshot = await _wait_for_job(job_id)
+            async with self:
+                if (
+                    snapshot is not None
+                    and snapshot["status"] == "done"
+                ):
+                    self.engine_comparisons = json.loads(
+                        snapshot["result"]
+                    )
+        finally:
+            async with self:
+                self.is_comparing = False
+
+    @rx.event
+    async def run_metric_query(self):
+        """
+        Mean of the chosen metric over the matching runs, e.g. Accuracy for
+        EN → JA, DeepL, last 3 runs; blank filters match everything.
+        """
+        project = await self._project()
+        if not project or not self.query_metric:
+            return
+        source_language, target_language = None, None
+        if self.query_language_pair:
+            source_language, _, target_language = (
+                self.query_language_pair.partition(" → ")
+            )
+        try:
+            latest = (
+                max(int(self.query_latest), 1)
+                if self.query_latest.strip()
+                else None
+            )
+        except ValueError:
+            return rx.toast(
+                "The number of runs must be a whole number.",
+                duration=4000,
+            )
+        self.query_result = await asyncio.to_thread(
+            query_metric_mean,
+            project,
+            self.query_metric,
+            source_language,
+            target_language,
+            self.query_engine or None,
+            self.query_evaluator or None,
+            latest,
+            get_results_store(),
+        )
\ No newline at end of file
@@ -0,0 +1,115 @@
+import reflex as rx
+from typing import List, Set
+import asyncio
+import logging
+from app.utils.jobs import (
+    FINISHED_STATUSES,
+    JobSnapshot,
+    get_job_registry,
+)
+
+logger = logging.getLogger(__name__)
+JOB_POLL_SECONDS = 0.5
+# Client tokens with a watch_jobs poller running in this process.
+_live_watchers: Set[str] = set()
+
+
+class JobState(rx.State):
+    """
+    Tracks the background jobs started by this browser. The job ids live in
+    local storage, so a reloaded page reattaches to jobs that are still
+    running on the server; only small progress snapshots are kept in state.
+    """
+
+    tracked_job_ids: str = rx.LocalStorage(
+        "", name="ltx_job_ids"
+    )
+    jobs: List[JobSnapshot] = []
+    is_watching_jobs: bool = False
+
+    def _job_ids(self) -> List[str]:
+        return [
+            job_id
+            for job_id in self.tracked_job_ids.split(",")
+            if job_id
+        ]
+
+    def _refresh_jobs(self) -> bool:
+        """Reloads the snapshots; returns True while any job is still running."""
+        registry = get_job_registry()
+        snapshots = []
+        for job_id in self._job_ids():
+            snapshot = registry.snapshot(job_id)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        self.jobs = snapshots
+        self.tracked_job_ids = ",".join(
+            snapshot["job_id"] for snapshot in snapshots
+        )
+        return any(
+            snapshot["status"] not in FINISHED_STATUSES
+            for snapshot in snapshots
+        )
+
+    @rx.event
+    def track_job(self, job_id: str):
+        """Starts showing progress for a job submitted to the registry."""
+        if job_id not in self._job_ids():
+            self.tracked_job_ids = ",".join(
+                self._job_ids() + [job_id]
+            )
+        self._refresh_jobs()
+        return JobState.watch_jobs
+
+    @rx.event
+    def restore_jobs(self):
+        """On page load, picks up jobs started before a reload."""
+        # The flag outlives a poller that died with a server restart; only
+        # then is it cleared, so a live poller is never doubled.
+        if (
+            self.router.session.client_token
+            not in _live_watchers
+        ):
+            self.is_watching_jobs = False
+        if self._refresh_jobs():
+            return JobState.watch_jobs
+
+    @rx.event(background=True)
+    async def watch_jobs(self):
+        """Polls the registry until every tracked job has finished."""
+        async with self:
+            if self.is_watching_jobs:
+                return
+            self.is_watching_jobs = True
+            client_token = self.router.session.client_token
+            _live_watchers.add(client_token)
+        try:
+            while True:
+                async with self:
+                    running = self._refresh_jobs()
+                if not running:
+                    break
+                await asyncio.sleep(JOB_POLL_SECONDS)
+        finally:
+            _live_watchers.discard(client_token)
+            async with self:
+                self.is_watching_jobs = False
+
+    @rx.event
+    def cancel_job(self, job_id: str):
+        if get_job_registry().cancel(job_id):
+            logger.info(f"Cancelling job {job_id}.")
+        self._refresh_jobs()
+
+    @rx.event
+    def dismiss_job(self, job_id: str):
+        """Hides a finished job."""
+        get_job_registry().forget(job_id)
+        self.tracked_job_ids = ",".join(
+            [
+                tracked
+                for tracked in self._job_ids()
+                if tracked != job_id
+            ]
+        )
+        self._refresh_jobs()
\ No newline at end of file
@@ -0,0 +1,170 @@
+import reflex as rx
+from typing import Dict, List
+import logging
+import math
+from app.utils.preview_pages import load_preview_page
+from app.utils.segment_store import get_segment_store
+from app.utils.template_writer import (
+    resolve_column_formulas,
+)
+
+logger = logging.getLogger(__name__)
+PREVIEW_PAGE_SIZE = 50
+
+
+class PreviewState(rx.State):
+    """
+    Pages through the spooled upload segments for the template preview.
+    Only the rows of the current page are held in state and sent to the client.
+    """
+
+    preview_sources: Dict[str, str] = {}
+    preview_headers: List[str] = []
+    preview_page_rows: List[Dict[str, str]] = []
+    preview_page: int = 0
+    preview_total_rows: int = 0
+    preview_layout: List[str] = []
+    preview_formulas: Dict[str, str] = {}
+
+    def _load_page(self):
+        """
+        Reads the current page window from the segment store. If a source
+        spool was evicted meanwhile, the preview is cleared and a toast
+        asking to re-upload is returned.
+        """
+        try:
+            self.preview_page_rows = load_preview_page(
+                self.preview_sources,
+                self.preview_headers,
+                self.preview_page * PREVIEW_PAGE_SIZE,
+                PREVIEW_PAGE_SIZE,
+                self.preview_layout,
+                self.preview_formulas,
+            )
+        except FileNotFoundError as exc:
+            logger.warning(
+                f"Preview source evicted from the segment store: {exc}"
+            )
+            self._clear()
+            return rx.toast(
+                "The uploaded files for this preview are no longer available. Please upload them again.",
+                duration=4000,
+            )
+
+    def _set_sources(self, sources: Dict[str, str]):
+        store = get_segment_store()
+        row_counts = []
+        valid_sources: Dict[str, str] = {}
+        for header, upload_id in sources.items():
+            summary = store.get_summary(upload_id)
+            if summary is None:
+                logger.warning(
+                    f"Preview source '{header}' ({upload_id}) is no longer in the segment store."
+                )
+                continue
+            valid_sources[header] = upload_id
+            row_counts.append(summary["row_count"])
+        self.preview_sources = valid_sources
+        self.preview_headers = list(valid_sources.keys())
+        self.preview_layout = []
+        self.preview_formulas = {}
+        self.preview_total_rows = max(row_counts, default=0)
+        self.preview_page = 0
+
+    @rx.event
+    def set_preview_sources(self, sources: Dict[str, str]):
+        """
+        Points the preview at spooled uploads (column header -> upload id)
+        and loads the first page.
+        """
+        self._set_sources(sources)
+        return self._load_page()
+
+    @rx.event
+    def set_preview_template(
+        self,
+        columns: List[dict],
+        input_uploads: Dict[str, str],
+        metric_weights: Dict[str, int],
+    ):
+        """
+        Previews the template itself: every column in sheet order, input
+        columns read from their uploads (column id -> upload id) and
+        calculated columns such as Word Count and Overall Score evaluated
+        from their formulas.
+        """
+        self._set_sources(
+            {
+                str(col["name"]): input_uploads[
+                    str(col["id"])
+                ]
+                for col in columns
+                if str(col["id"]) in input_uploads
+            }
+        )
+        self.preview_layout = [
+            str(col["id"]) for col in columns
+        ]
+        self.preview_headers = [
+            str(col["name"]) for col in columns
+        ]
+        self.preview_formulas = resolve_column_formulas(
+            columns, metric_weights
+        )
+        return self._load_page()
+
+    @rx.event
+    def clear_preview(self):
+        """Drops the preview window."""
+        self._clear()
+
+    def _clear(self):
+        self.preview_sources = {}
+        self.preview_headers = []
+        self.preview_layout = []
+        self.preview_formulas = {}
+        self.preview_page_rows = []
+        self.preview_page = 0
+        self.preview_total_rows = 0
+
+    @rx.event
+    def go_to_preview_page(self, page: int):
+        """Loads the given (0-based) page, clamped to the available range."""
+        self.preview_page = min(
+            max(int(page), 0), self.preview_page_count - 1
+        )
+        return self._load_page()
+
+    @rx.event
+    def next_preview_page(self):
+        if self.preview_page < self.preview_page_count - 1:
+            self.preview_page += 1
+            return self._load_page()
+
+    @rx.event
+    def previous_preview_page(self):
+        if self.preview_page > 0:
+            self.preview_page -= 1
+            return self._load_page()
+
+    @rx.var
+    def preview_page_count(self) -> int:
+        return max(
+            1,
+            math.ceil(
+                self.preview_total_rows / PREVIEW_PAGE_SIZE
+            ),
+        )
+
+    @rx.var
+    def preview_first_row_number(self) -> int:
+        if self.preview_total_rows == 0:
+            return 0
+        return self.preview_page * PREVIEW_PAGE_SIZE + 1
+
+    @rx.var
+    def preview_last_row_number(self) -> int:
+        return min(
+            (self.preview_page + 1) * PREVIEW_PAGE_SIZE,
+            self.preview_total_rows,
+        )
\ No newline at end of file
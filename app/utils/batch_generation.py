@@ -0,0 +1,287 @@
+"""
+Batch generation of evaluation templates, one workbook per language pair and
+MT engine (or per pair with the engines stacked), fanned out over a process
+pool and collected into a single zip.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import (
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+from .process_pools import submit_to_process_pool
+from .segment_store import SegmentStore, get_segment_store
+from .template_cache import (
+    TemplateCache,
+    get_template_cache,
+    template_fingerprint,
+)
+from .template_writer import (
+    StackedInput,
+    TemplateSpec,
+    write_evaluation_template,
+)
+
+logger = logging.getLogger(__name__)
+TEMPLATE_GENERATION_WORKERS_ENV = (
+    "LTX_TEMPLATE_GENERATION_WORKERS"
+)
+JobStatus = Literal["queued", "done", "failed"]
+
+
+class TemplateJob(TypedDict):
+    job_id: str
+    file_name: str
+    spec: TemplateSpec
+    stacked_inputs: Optional[List[StackedInput]]
+
+
+class BatchProgress(TypedDict):
+    job_id: str
+    file_name: str
+    status: JobStatus
+    error: str
+    completed_jobs: int
+    total_jobs: int
+
+
+def _safe_file_stem(text: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", text).strip("_")
+
+
+def plan_batch_jobs(
+    base_spec: TemplateSpec,
+    language_pairs: List[Tuple[str, str]],
+    engines: List[str],
+    inputs_by_job: Dict[
+        Tuple[str, str, str], Dict[str, str]
+    ],
+    stack_engines: bool = False,
+) -> List[TemplateJob]:
+    """
+    Expands the confirmed language pairs and engines into workbook jobs.
+    `inputs_by_job` maps (source language, target language, engine) to the
+    input column uploads for that combination. With `stack_engines`, each
+    pair gets one workbook holding every engine's rows, labelled by engine.
+    """
+    jobs: List[TemplateJob] = []
+    for source_language, target_language in language_pairs:
+        pair_label = f"{source_language}-{target_language}"
+        pair_metadata = {
+            **base_spec["metadata"],
+            "Source Language": source_language,
+            "Target Language": target_language,
+        }
+        pair_engines = [
+            engine
+            for engine in engines
+            if (source_language, target_language, engine)
+            in inputs_by_job
+        ]
+        if stack_engines:
+            if not pair_engines:
+                continue
+            jobs.append(
+                {
+                    "job_id": pair_label,
+                    "file_name": f"{_safe_file_stem(pair_label)}.xlsx",
+                    "spec": {
+                        **base_spec,
+                        "input_uploads": {},
+                        "metadata": {
+                            **pair_metadata,
+                            "MT Engine": ", ".join(
+                                pair_engines
+                            ),
+                        },
+                    },
+                    "stacked_inputs": [
+                        {
+                            "label": engine,
+                            "input_uploads": inputs_by_job[
+                                (
+                                    source_language,
+                                    target_language,
+                                    engine,
+                                )
+                            ],
+                        }
+                        for engine in pair_engines
+                    ],
+                }
+            )
+            continue
+        for engine in pair_engines:
+            job_label = f"{pair_label}_{engine}"
+            jobs.append(
+                {
+                    "job_id": job_label,
+                    "file_name": f"{_safe_file_stem(job_label)}.xlsx",
+                    "spec": {
+                        **base_spec,
+                        "input_uploads": inputs_by_job[
+                            (
+                                source_language,
+                                target_language,
+                                engine,
+                            )
+                        ],
+                        "metadata": {
+                            **pair_metadata,
+                            "MT Engine": engine,
+                        },
+                    },
+                    "stacked_inputs": None,
+                }
+            )
+    return jobs
+
+
+def _run_template_job(
+    job: TemplateJob,
+    output_path: str,
+    store_root: str,
+    store_max_bytes: int,
+) -> int:
+    """Worker entry point: writes one workbook of the batch."""
+    return write_evaluation_template(
+        output_path,
+        job["spec"],
+        store=SegmentStore(store_root, store_max_bytes),
+        tmpdir=os.path.dirname(output_path),
+        stacked_inputs=job["stacked_inputs"],
+    )
+
+
+async def generate_template_batch(
+    jobs: List[TemplateJob],
+    output_zip_path: str,
+    store: Optional[SegmentStore] = None,
+    cache: Optional[TemplateCache] = None,
+) -> AsyncIterator[BatchProgress]:
+    """
+    Runs the jobs across the template generation process pool and adds each
+    finished workbook to `output_zip_path`. Yields a BatchProgress update
+    whenever a job is queued, finishes or fails, so a background event can
+    stream per-job progress to the UI. A failed job is reported and skipped;
+    the rest of the batch carries on. Workbooks whose configuration is
+    already in the template cache are taken from it without regenerating.
+    """
+    store = store or get_segment_store()
+    cache = cache or get_template_cache()
+    work_dir = tempfile.mkdtemp(
+        prefix=".batch-", dir=cache.root_dir
+    )
+    total_jobs = len(jobs)
+    completed_jobs = 0
+    cached_paths: Dict[str, str] = {}
+    pending: Dict["asyncio.Future[int]", TemplateJob] = {}
+    fingerprints = {
+        job["job_id"]: template_fingerprint(
+            job["spec"], job["stacked_inputs"]
+        )
+        for job in jobs
+    }
+    try:
+        for job in jobs:
+            cached = cache.get(fingerprints[job["job_id"]])
+            if cached is not None:
+                cached_paths[job["job_id"]] = cached
+                continue
+            future = asyncio.wrap_future(
+                submit_to_process_pool(
+                    "template_generation",
+                    TEMPLATE_GENERATION_WORKERS_ENV,
+                    4,
+                    _run_template_job,
+                    job,
+                    os.path.join(
+                        work_dir, job["file_name"]
+                    ),
+                    store.root_dir,
+                    store.max_bytes,
+                )
+            )
+            pending[future] = job
+            yield {
+                "job_id": job["job_id"],
+                "file_name": job["file_name"],
+                "status": "queued",
+                "error": "",
+                "completed_jobs": completed_jobs,
+                "total_jobs": total_jobs,
+            }
+        # Workbooks are already compressed, so they are stored as-is.
+        with zipfile.ZipFile(
+            output_zip_path, "w", zipfile.ZIP_STORED
+        ) as archive:
+            for job in jobs:
+                if job["job_id"] not in cached_paths:
+                    continue
+                archive.write(
+                    cached_paths[job["job_id"]],
+                    arcname=job["file_name"],
+                )
+                completed_jobs += 1
+                yield {
+                    "job_id": job["job_id"],
+                    "file_name": job["file_name"],
+                    "status": "done",
+                    "error": "",
+                    "completed_jobs": completed_jobs,
+                    "total_jobs": total_jobs,
+                }
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending.keys(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for future in done:
+                    job = pending.pop(future)
+                    completed_jobs += 1
+                    job_path = os.path.join(
+                        work_dir, job["file_name"]
+                    )
+                    error = ""
+                    try:
+                        future.result()
+                        archive.write(
+                            cache.put(
+                                fingerprints[job["job_id"]],
+                                job_path,
+                            ),
+                            arcname=job["file_name"],
+                        )
+                    except Exception as exc:
+                        logger.error(
+                            f"Template job '{job['job_id']}' failed: {exc}"
+                        )
+                        error = str(exc)
+                    finally:
+                        if os.path.exists(job_path):
+                            os.remove(job_path)
+                    yield {
+                        "job_id": job["job_id"],
+                        "file_name": job["file_name"],
+                        "status": (
+                            "failed" if error else "done"
+                        ),
+                        "error": error,
+                        "completed_jobs": completed_jobs,
+                        "total_jobs": total_jobs,
+                    }
+    finally:
+        for future in pending:
+            future.cancel()
+        shutil.rmtree(work_dir, ignore_errors=True)
\ No newline at end of file
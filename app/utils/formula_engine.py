@@ -0,0 +1,707 @@
+"""
+Compiler and vectorized evaluator for the Excel-style column formulas
+(ExcelColumn.formula_excel_style).
+
+A formula is parsed once into a small AST and checked against the column
+layout: every cell reference must point at a column of the data sheet and at
+the first data row, since the same formula is filled down every row. Compiled
+formulas are cached by formula text and column layout. Evaluation runs over
+whole columns at once (one NumPy array per referenced column), so computed
+values such as the Overall Score can be shown in the preview and the final
+report without opening Excel.
+
+Only the functions the templates use are supported. Excel error values
+(#DIV/0!, #VALUE!) evaluate to NaN.
+"""
+
+import functools
+import logging
+import math
+import re
+from typing import (
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+import numpy as np
+from xlsxwriter.utility import (
+    xl_cell_to_rowcol,
+    xl_col_to_name,
+    xl_rowcol_to_cell,
+)
+from .template_writer import FIRST_DATA_ROW
+
+logger = logging.getLogger(__name__)
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    |(?P<string>"(?:[^"]|"")*")
+    |(?P<range>\$?[A-Z]{1,3}\$?\d+:\$?[A-Z]{1,3}\$?\d+)
+    |(?P<function>[A-Z][A-Z0-9.]*(?=\())
+    |(?P<bool>TRUE|FALSE)(?![\w(])
+    |(?P<ref>\$?[A-Z]{1,3}\$?\d+)(?![\w(])
+    |(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    |(?P<operator><>|<=|>=|[-+*/^&=<>%])
+    |(?P<paren>[(),])
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_BINARY_PRECEDENCE = {
+    "=": 1,
+    "<>": 1,
+    "<": 1,
+    ">": 1,
+    "<=": 1,
+    ">=": 1,
+    "&": 2,
+    "+": 3,
+    "-": 3,
+    "*": 4,
+    "/": 4,
+    "^": 5,
+}
+_UNARY_PRECEDENCE = 6
+_TRIM_SPACES_PATTERN = re.compile(" {2,}")
+
+
+class FormulaError(ValueError):
+    """Raised for formulas that cannot be parsed or do not fit the layout."""
+
+
+class Constant(NamedTuple):
+    value: Union[float, str, bool]
+
+
+class Ref(NamedTuple):
+    column_id: str
+
+
+class Unary(NamedTuple):
+    op: str
+    operand: "Node"
+
+
+class Binary(NamedTuple):
+    op: str
+    left: "Node"
+    right: "Node"
+
+
+class Call(NamedTuple):
+    name: str
+    args: Tuple["Node", ...]
+
+
+Node = Union[Constant, Ref, Unary, Binary, Call]
+ColumnArrays = Dict[str, np.ndarray]
+
+
+class CompiledFormula(NamedTuple):
+    text: str
+    ast: Optional[Node]
+    referenced_column_ids: Tuple[str, ...]
+    error: Optional[str]
+
+
+class _Parser:
+    """Pratt parser over the token list of one formula."""
+
+    def __init__(
+        self,
+        tokens: List[Tuple[str, str]],
+        column_ids_by_letter: Dict[str, str],
+    ):
+        self.tokens = tokens
+        self.position = 0
+        self.column_ids_by_letter = column_ids_by_letter
+        self.referenced: List[str] = []
+
+    def _peek(self) -> Tuple[str, str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return ("end", "")
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _expect(self, value: str):
+        kind, text = self._next()
+        if text != value:
+            raise FormulaError(
+                f"Expected '{value}' but found '{text or 'end of formula'}'."
+            )
+
+    def _reference(self, text: str) -> str:
+        row, col = xl_cell_to_rowcol(
+            text.replace("$", "").upper()
+        )
+        letter = xl_col_to_name(col)
+        if row + 1 != FIRST_DATA_ROW:
+            raise FormulaError(
+                f"{text} must refer to row {FIRST_DATA_ROW}, the first data row."
+            )
+        column_id = self.column_ids_by_letter.get(letter)
+        if column_id is None:
+            raise FormulaError(
+                f"{text} refers to column {letter}, which is not in the template."
+            )
+        self.referenced.append(column_id)
+        return column_id
+
+    def parse(self) -> Node:
+        node = self.expression(0)
+        kind, text = self._peek()
+        if kind != "end":
+            raise FormulaError(f"Unexpected '{text}'.")
+        return node
+
+    def expression(self, min_precedence: int) -> Node:
+        left = self._prefix()
+        while True:
+            kind, text = self._peek()
+            if kind == "operator" and text == "%":
+                self._next()
+                left = Binary("/", left, Constant(100.0))
+                continue
+            precedence = _BINARY_PRECEDENCE.get(text)
+            if (
+                kind != "operator"
+                or precedence is None
+                or precedence <= min_precedence
+            ):
+                return left
+            self._next()
+            left = Binary(
+                text, left, self.expression(precedence)
+            )
+
+    def _prefix(self) -> Node:
+        kind, text = self._next()
+        if kind == "number":
+            return Constant(float(text))
+        if kind == "string":
+            return Constant(text[1:-1].replace('""', '"'))
+        if kind == "bool":
+            return Constant(text.upper() == "TRUE")
+        if kind == "ref":
+            return Ref(self._reference(text))
+        if kind == "range":
+            (start_row, start_col), (end_row, end_col) = (
+                xl_cell_to_rowcol(
+                    part.replace("$", "").upper()
+                )
+                for part in text.split(":")
+            )
+            if start_row != end_row:
+                raise FormulaError(
+                    f"{text} must stay within row {FIRST_DATA_ROW}."
+                )
+            return Call(
+                "_RANGE",
+                tuple(
+                    Ref(
+                        self._reference(
+                            xl_rowcol_to_cell(
+                                start_row, col
+                            )
+                        )
+                    )
+                    for col in range(
+                        min(start_col, end_col),
+                        max(start_col, end_col) + 1,
+                    )
+                ),
+            )
+        if kind == "operator" and text in "+-":
+            return Unary(
+                text, self.expression(_UNARY_PRECEDENCE)
+            )
+        if kind == "paren" and text == "(":
+            node = self.expression(0)
+            self._expect(")")
+            return node
+        if kind == "function":
+            name = text.upper()
+            if name not in _FUNCTIONS:
+                raise FormulaError(
+                    f"Unsupported function {name}."
+                )
+            self._expect("(")
+            args: List[Node] = []
+            if self._peek()[1] != ")":
+                args.append(self.expression(0))
+                while self._peek()[1] == ",":
+                    self._next()
+                    args.append(self.expression(0))
+            self._expect(")")
+            return Call(name, tuple(args))
+        raise FormulaError(
+            f"Unexpected '{text or 'end of formula'}'."
+        )
+
+
+def _tokenize(formula: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(formula):
+        match = _TOKEN_PATTERN.match(formula, position)
+        if match is None:
+            raise FormulaError(
+                f"Unexpected character '{formula[position]}'."
+            )
+        kind = match.lastgroup or ""
+        if kind != "space":
+            tokens.append((kind, match.group()))
+        position = match.end()
+    return tokens
+
+
+@functools.lru_cache(maxsize=512)
+def _compile(
+    formula: str, layout: Tuple[str, ...]
+) -> CompiledFormula:
+    column_ids_by_letter = {
+        xl_col_to_name(index): column_id
+        for index, column_id in enumerate(layout)
+    }
+    text = formula.strip()
+    body = text[1:] if text.startswith("=") else text
+    parser = _Parser([], column_ids_by_letter)
+    try:
+        if not body:
+            raise FormulaError("The formula is empty.")
+        parser.tokens = _tokenize(body)
+        ast = parser.parse()
+    except FormulaError as exc:
+        return CompiledFormula(text, None, (), str(exc))
+    return CompiledFormula(
+        text,
+        ast,
+        tuple(dict.fromkeys(parser.referenced)),
+        None,
+    )
+
+
+def compile_formula(
+    formula: str, columns: List[dict]
+) -> CompiledFormula:
+    """
+    Compiles a first-row formula against the column layout. Problems are
+    reported in CompiledFormula.error rather than raised, so the result can
+    be cached and shown next to the formula.
+    """
+    return _compile(
+        formula, tuple(str(col["id"]) for col in columns)
+    )
+
+
+def validate_formula(
+    formula: str,
+    columns: List[dict],
+    column_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Returns an error message for a formula that would not work in the
+    template, or None if it is fine. With `column_id`, a formula that refers
+    to its own column is rejected as circular.
+    """
+    compiled = compile_formula(formula, columns)
+    if compiled.error:
+        return compiled.error
+    if (
+        column_id is not None
+        and column_id in compiled.referenced_column_ids
+    ):
+        return "The formula refers to its own column."
+    return None
+
+
+def _cell_number(value) -> float:
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def _cell_is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not (
+        isinstance(value, bool)
+        or (isinstance(value, float) and math.isnan(value))
+    )
+
+
+_to_number = np.frompyfunc(_cell_number, 1, 1)
+_to_text = np.frompyfunc(_cell_text, 1, 1)
+_is_number = np.frompyfunc(_cell_is_number, 1, 1)
+_is_blank = np.frompyfunc(
+    lambda value: value is None or value == "", 1, 1
+)
+# Text functions work element-wise on object arrays: fixed-width "U" arrays
+# would size every cell of a column by its longest cell.
+_text_length = np.frompyfunc(len, 1, 1)
+_text_lower = np.frompyfunc(str.lower, 1, 1)
+_text_upper = np.frompyfunc(str.upper, 1, 1)
+_text_concat = np.frompyfunc(str.__add__, 2, 1)
+_text_trim = np.frompyfunc(
+    lambda text: _TRIM_SPACES_PATTERN.sub(" ", text).strip(
+        " "
+    ),
+    1,
+    1,
+)
+# Excel's SUBSTITUTE leaves the text alone when the old text is empty.
+_text_substitute = np.frompyfunc(
+    lambda text, old, new: (
+        text.replace(old, new) if old else text
+    ),
+    3,
+    1,
+)
+
+
+def _numbers(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind in "biuf":
+        return values.astype(np.float64, copy=False)
+    return _to_number(values).astype(np.float64)
+
+
+def _texts(values: np.ndarray) -> np.ndarray:
+    return _to_text(values).astype(object)
+
+
+def _objects(values: np.ndarray) -> np.ndarray:
+    if values.dtype == object:
+        return values
+    if values.dtype.kind == "b":
+        return values.astype(object)
+    # NaN stands for a blank cell in numeric columns.
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result
+
+
+def _operand(
+    node: "Node", values: np.ndarray
+) -> np.ndarray:
+    """Numbers for arithmetic; blank referenced cells count as 0."""
+    numbers = _numbers(values)
+    if isinstance(node, Ref):
+        return np.where(np.isnan(numbers), 0.0, numbers)
+    return numbers
+
+
+def _excel_round(values: np.ndarray, digits: np.ndarray):
+    scale = np.power(10.0, digits)
+    return (
+        np.sign(values)
+        * np.floor(np.abs(values) * scale + 0.5)
+        / scale
+    )
+
+
+def _compare(op: str, left: np.ndarray, right: np.ndarray):
+    if left.dtype == object or right.dtype == object:
+        left = _text_lower(_texts(left))
+        right = _text_lower(_texts(right))
+    else:
+        left, right = _numbers(left), _numbers(right)
+    return {
+        "=": np.equal,
+        "<>": np.not_equal,
+        "<": np.less,
+        ">": np.greater,
+        "<=": np.less_equal,
+        ">=": np.greater_equal,
+    }[op](left, right)
+
+
+def _arguments(
+    args: Tuple[Node, ...], evaluate: Callable
+) -> List[np.ndarray]:
+    """Evaluates function arguments, expanding A2:C2 ranges into columns."""
+    values = []
+    for arg in args:
+        result = evaluate(arg)
+        if isinstance(result, list):
+            values.extend(result)
+        else:
+            values.append(result)
+    return values
+
+
+def _aggregate_inputs(
+    values: List[np.ndarray],
+) -> np.ndarray:
+    """Stacks arguments as numbers, with non-numeric cells as NaN."""
+    columns = []
+    for value in values:
+        if value.dtype == object:
+            numeric = _is_number(value).astype(bool)
+            column = np.full(len(value), np.nan)
+            column[numeric] = value[numeric].astype(
+                np.float64
+            )
+        else:
+            column = value.astype(np.float64, copy=False)
+        columns.append(column)
+    return np.vstack(columns)
+
+
+def _call(
+    name: str,
+    args: Tuple[Node, ...],
+    evaluate: Callable,
+    row_count: int,
+) -> np.ndarray:
+    if name == "IF":
+        condition = _numbers(evaluate(args[0])) != 0
+        when_true = (
+            evaluate(args[1])
+            if len(args) > 1
+            else np.full(row_count, True)
+        )
+        when_false = (
+            evaluate(args[2])
+            if len(args) > 2
+            else np.full(row_count, False)
+        )
+        if (
+            when_true.dtype.kind in "biuf"
+            and when_false.dtype.kind in "biuf"
+        ):
+            return np.where(
+                condition, when_true, when_false
+            )
+        return np.where(
+            condition,
+            _objects(when_true),
+            _objects(when_false),
+        )
+    if name == "IFERROR":
+        value = evaluate(args[0])
+        fallback = evaluate(args[1])
+        if value.dtype == object:
+            return value
+        return np.where(
+            np.isnan(_numbers(value)),
+            _objects(fallback),
+            _objects(value),
+        )
+    values = _arguments(args, evaluate)
+    if name == "_RANGE":
+        return values
+    if name in ("SUM", "AVERAGE", "MIN", "MAX", "COUNT"):
+        stacked = _aggregate_inputs(values)
+        present = ~np.isnan(stacked)
+        count = present.sum(axis=0)
+        if name == "COUNT":
+            return count.astype(np.float64)
+        total = np.where(present, stacked, 0).sum(axis=0)
+        if name == "SUM":
+            return total
+        if name == "AVERAGE":
+            with np.errstate(
+                divide="ignore", invalid="ignore"
+            ):
+                return np.where(
+                    count > 0, total / count, np.nan
+                )
+        extreme = (
+            np.where(present, stacked, np.inf).min(axis=0)
+            if name == "MIN"
+            else np.where(present, stacked, -np.inf).max(
+                axis=0
+            )
+        )
+        return np.where(count > 0, extreme, 0.0)
+    if name == "ISBLANK":
+        value = values[0]
+        if value.dtype == object:
+            return _is_blank(value).astype(bool)
+        return np.isnan(_numbers(value))
+    if name == "ISNUMBER":
+        value = values[0]
+        if value.dtype == object:
+            return _is_number(value).astype(bool)
+        return ~np.isnan(_numbers(value))
+    if name == "LEN":
+        return _text_length(_texts(values[0])).astype(
+            np.float64
+        )
+    if name == "TRIM":
+        return _text_trim(_texts(values[0]))
+    if name == "SUBSTITUTE":
+        return _text_substitute(
+            _texts(values[0]),
+            _texts(values[1]),
+            _texts(values[2]),
+        )
+    if name == "LOWER":
+        return _text_lower(_texts(values[0]))
+    if name == "UPPER":
+        return _text_upper(_texts(values[0]))
+    if name == "ROUND":
+        return _excel_round(
+            _numbers(values[0]), _numbers(values[1])
+        )
+    if name == "ABS":
+        return np.abs(_numbers(values[0]))
+    if name in ("AND", "OR"):
+        stacked = np.vstack(
+            [_numbers(value) != 0 for value in values]
+        )
+        return (
+            stacked.all(axis=0)
+            if name == "AND"
+            else stacked.any(axis=0)
+        )
+    if name == "NOT":
+        return _numbers(values[0]) == 0
+    raise FormulaError(f"Unsupported function {name}.")
+
+
+_FUNCTIONS = {
+    "IF",
+    "IFERROR",
+    "SUM",
+    "AVERAGE",
+    "MIN",
+    "MAX",
+    "COUNT",
+    "ISBLANK",
+    "ISNUMBER",
+    "LEN",
+    "TRIM",
+    "SUBSTITUTE",
+    "LOWER",
+    "UPPER",
+    "ROUND",
+    "ABS",
+    "AND",
+    "OR",
+    "NOT",
+}
+
+
+def evaluate_formula(
+    compiled: CompiledFormula,
+    columns: ColumnArrays,
+    row_count: int,
+) -> np.ndarray:
+    """
+    Evaluates a compiled formula for `row_count` rows at once. `columns`
+    maps column ids to 1-D arrays of cell values: float arrays (NaN for
+    blank) for numeric columns, object arrays of str/None for text. Columns
+    missing from `columns` are treated as blank, and NaN in a referenced
+    numeric column counts as a blank cell (0 in arithmetic, as in Excel).
+    """
+    if compiled.ast is None:
+        raise FormulaError(
+            compiled.error or "The formula did not compile."
+        )
+
+    def evaluate(node: Node):
+        if isinstance(node, Constant):
+            if isinstance(node.value, str):
+                return np.full(
+                    row_count, node.value, object
+                )
+            return np.full(row_count, node.value)
+        if isinstance(node, Ref):
+            value = columns.get(node.column_id)
+            if value is None:
+                return np.full(row_count, None, object)
+            return value
+        if isinstance(node, Unary):
+            operand = _operand(
+                node.operand, evaluate(node.operand)
+            )
+            return -operand if node.op == "-" else operand
+        if isinstance(node, Binary):
+            left = evaluate(node.left)
+            right = evaluate(node.right)
+            if node.op == "&":
+                return _text_concat(
+                    _texts(left), _texts(right)
+                )
+            if node.op in _BINARY_PRECEDENCE and (
+                _BINARY_PRECEDENCE[node.op] == 1
+            ):
+                return _compare(node.op, left, right)
+            left = _operand(node.left, left)
+            right = _operand(node.right, right)
+            with np.errstate(
+                divide="ignore", invalid="ignore"
+            ):
+                if node.op == "+":
+                    return left + right
+                if node.op == "-":
+                    return left - right
+                if node.op == "*":
+                    return left * right
+                if node.op == "^":
+                    return np.power(left, right)
+                return np.where(
+                    right == 0, np.nan, left / right
+                )
+        return _call(
+            node.name, node.args, evaluate, row_count
+        )
+
+    result = evaluate(compiled.ast)
+    if isinstance(result, list):
+        raise FormulaError(
+            "A range cannot be used as a formula result."
+        )
+    return result
+
+
+def formula_numbers(values: np.ndarray) -> np.ndarray:
+    """
+    Evaluated values as float64 scores: NaN for blanks, text, booleans and
+    errors (e.g. a division by zero), which a score cell cannot hold.
+    """
+    if values.dtype.kind in "iuf":
+        numbers = values.astype(np.float64)
+    else:
+        numbers = np.where(
+            _is_number(values).astype(bool),
+            _to_number(values),
+            np.nan,
+        ).astype(np.float64)
+    numbers[~np.isfinite(numbers)] = np.nan
+    return numbers
+
+
+def format_formula_result(value) -> str:
+    """Cell text for one evaluated value, as shown in the preview."""
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value) or math.isinf(value):
+            return ""
+        return f"{value:.6g}"
+    if isinstance(value, (bool, np.bool_)):
+        return "TRUE" if value else "FALSE"
+    return _cell_text(value)
\ No newline at end of file
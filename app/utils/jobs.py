@@ -0,0 +1,264 @@
+"""
+Server-side registry of long-running jobs (upload parsing, preview building,
+workbook writing).
+
+Jobs run off the event loop: synchronous work on a thread pool, async work
+(which itself fans out to the process pools) as its own task, so a big job
+never blocks an event handler. Each job reports progress through a
+JobContext; the registry turns that into a percentage and an ETA that
+JobState polls into a small client-facing snapshot. Jobs are owned by the
+server process rather than by a client's state, so a page reload only
+needs the job ids to pick them up again.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Literal,
+    Optional,
+    TypedDict,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+JOB_THREADS_ENV = "LTX_JOB_THREADS"
+FINISHED_JOB_TTL_SECONDS = 3600
+JobStatus = Literal[
+    "queued", "running", "done", "failed", "cancelled"
+]
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobSnapshot(TypedDict):
+    job_id: str
+    kind: str
+    label: str
+    status: JobStatus
+    percent: float
+    eta_seconds: float
+    eta_text: str
+    message: str
+    result: str
+    error: str
+
+
+def format_eta(seconds: float) -> str:
+    """Short remaining-time label, e.g. "about 2m 05s left"; empty if unknown."""
+    if seconds < 0:
+        return ""
+    minutes, secs = divmod(int(round(seconds)), 60)
+    if minutes >= 60:
+        hours, minutes = divmod(minutes, 60)
+        return f"about {hours}h {minutes:02d}m left"
+    if minutes:
+        return f"about {minutes}m {secs:02d}s left"
+    return f"about {secs}s left"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been asked to stop."""
+
+
+class JobContext:
+    """Handed to a job's work function to report progress and honour cancellation."""
+
+    def __init__(self, job: "_Job"):
+        self._job = job
+
+    @property
+    def cancelled(self) -> bool:
+        return self._job.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Raises JobCancelled if the job was cancelled; call between units of work."""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(
+        self,
+        completed: float,
+        total: float,
+        message: str = "",
+    ):
+        """Records progress as `completed` out of `total` units, then checks for cancellation."""
+        job = self._job
+        job.fraction = (
+            min(max(completed / total, 0.0), 1.0)
+            if total > 0
+            else 0.0
+        )
+        if message:
+            job.message = message
+        self.check_cancelled()
+
+
+class _Job:
+    def __init__(self, kind: str, label: str):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.label = label
+        self.status: JobStatus = "queued"
+        self.fraction = 0.0
+        self.message = ""
+        self.result = ""
+        self.error = ""
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    def eta_seconds(self) -> float:
+        """Remaining time extrapolated from the progress so far; -1 if unknown."""
+        if (
+            self.status != "running"
+            or self.started_at is None
+            or self.fraction <= 0
+        ):
+            return -1.0
+        elapsed = time.monotonic() - self.started_at
+        return elapsed * (1 - self.fraction) / self.fraction
+
+    def snapshot(self) -> JobSnapshot:
+        eta_seconds = self.eta_seconds()
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "label": self.label,
+            "status": self.status,
+            "percent": round(
+                (
+                    100.0
+                    if self.status == "done"
+                    else self.fraction * 100
+                ),
+                1,
+            ),
+            "eta_seconds": round(eta_seconds, 1),
+            "eta_text": format_eta(eta_seconds),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+JobWork = Callable[[JobContext], Union[Awaitable[Any], Any]]
+
+
+class JobRegistry:
+    """Runs jobs in the background and keeps their status for polling."""
+
+    def __init__(self, max_threads: int = 4):
+        self._jobs: Dict[str, _Job] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_threads,
+            thread_name_prefix="ltx-job",
+        )
+
+    def submit(
+        self, kind: str, label: str, work: JobWork
+    ) -> str:
+        """
+        Starts `work(context)` in the background and returns the job id.
+        Coroutine functions run as tasks on the running loop; plain
+        functions run on the job thread pool. The work's return value
+        (e.g. an output path) is kept as the job result.
+        """
+        self.prune()
+        job = _Job(kind, label)
+        self._jobs[job.job_id] = job
+        job.task = asyncio.get_running_loop().create_task(
+            self._run(job, work)
+        )
+        return job.job_id
+
+    async def _run(self, job: _Job, work: JobWork):
+        context = JobContext(job)
+        job.status = "running"
+        job.started_at = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(work):
+                result = await work(context)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, work, context
+                )
+            job.result = (
+                "" if result is None else str(result)
+            )
+            job.fraction = 1.0
+            job.status = "done"
+        except (JobCancelled, asyncio.CancelledError):
+            job.status = "cancelled"
+            logger.info(
+                f"Job {job.job_id} ({job.label}) was cancelled."
+            )
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            logger.error(
+                f"Job {job.job_id} ({job.label}) failed: {exc}"
+            )
+        finally:
+            job.finished_at = time.monotonic()
+
+    def snapshot(
+        self, job_id: str
+    ) -> Optional[JobSnapshot]:
+        job = self._jobs.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Asks a job to stop. Thread jobs stop at their next progress report;
+        async jobs are also cancelled at their current await.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return False
+        job.cancel_event.set()
+        if job.task is not None:
+            job.task.cancel()
+        return True
+
+    def forget(self, job_id: str):
+        """Drops a finished job from the registry."""
+        job = self._jobs.get(job_id)
+        if (
+            job is not None
+            and job.status in FINISHED_STATUSES
+        ):
+            del self._jobs[job_id]
+
+    def prune(self):
+        """Forgets jobs that finished more than FINISHED_JOB_TTL_SECONDS ago."""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if (
+                job.finished_at is not None
+                and now - job.finished_at
+                > FINISHED_JOB_TTL_SECONDS
+            ):
+                del self._jobs[job_id]
+
+
+_job_registry: Optional[JobRegistry] = None
+
+
+def get_job_registry() -> JobRegistry:
+    """Returns the process-wide job registry."""
+    global _job_registry
+    if _job_registry is None:
+        _job_registry = JobRegistry(
+            int(os.environ.get(JOB_THREADS_ENV) or 4)
+        )
+    return _job_registry
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Builds one page of the template preview from the segment store, without
+touching the rest of the uploads. Used by PreviewState and the benchmarks.
+"""
+
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from .formula_engine import (
+    compile_formula,
+    evaluate_formula,
+    format_formula_result,
+)
+from .segment_store import (
+    SegmentStore,
+    get_segment_store,
+    segment_text,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _evaluate_page_formulas(
+    columns: Dict[str, List[str]],
+    page_length: int,
+    headers: List[str],
+    layout: List[str],
+    formulas: Dict[str, str],
+):
+    """Adds the calculated columns of the page, evaluated server-side."""
+    column_layout = [
+        {"id": column_id} for column_id in layout
+    ]
+    headers_by_id = dict(zip(layout, headers))
+    arrays = {
+        column_id: np.array(
+            columns[header]
+            + [None] * (page_length - len(columns[header])),
+            dtype=object,
+        )
+        for column_id, header in headers_by_id.items()
+        if header in columns
+    }
+    for column_id, formula in formulas.items():
+        compiled = compile_formula(formula, column_layout)
+        if compiled.error:
+            logger.warning(
+                f"Not previewing column {column_id}: {compiled.error}"
+            )
+            continue
+        columns[headers_by_id[column_id]] = [
+            format_formula_result(value)
+            for value in evaluate_formula(
+                compiled, arrays, page_length
+            )
+        ]
+
+
+def load_preview_page(
+    sources: Dict[str, str],
+    headers: List[str],
+    start: int,
+    count: int,
+    layout: Optional[List[str]] = None,
+    formulas: Optional[Dict[str, str]] = None,
+    store: Optional[SegmentStore] = None,
+) -> List[Dict[str, str]]:
+    """
+    Reads rows `start` to `start + count` of the preview sources (header ->
+    upload id) and returns them as dicts over `headers`. With a `layout`
+    (column ids in sheet order, parallel to `headers`), the `formulas` of
+    the calculated columns are evaluated for the page.
+    """
+    store = store or get_segment_store()
+    columns: Dict[str, List[str]] = {}
+    for header, source in sources.items():
+        columns[header] = [
+            segment_text(row)
+            for row in store.read_rows(source, start, count)
+        ]
+    page_length = max(
+        (len(values) for values in columns.values()),
+        default=0,
+    )
+    if formulas and layout:
+        _evaluate_page_formulas(
+            columns, page_length, headers, layout, formulas
+        )
+    return [
+        {
+            header: (
+                columns[header][offset]
+                if offset < len(columns.get(header, []))
+                else ""
+            )
+            for header in headers
+        }
+        for offset in range(page_length)
+    ]
\ No newline at end of file
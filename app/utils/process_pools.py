@@ -0,0 +1,68 @@
+"""Named process pools shared by the heavy file-prep jobs."""
+
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict
+
+_pools: Dict[str, ProcessPoolExecutor] = {}
+
+
+def get_process_pool(
+    name: str, workers_env: str, default_workers: int
+) -> ProcessPoolExecutor:
+    """
+    Returns the process pool registered under `name`, creating it on first use.
+    Its size comes from the `workers_env` environment variable, falling back to
+    `default_workers` capped at the CPU count.
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        max_workers = int(
+            os.environ.get(workers_env)
+            or min(default_workers, os.cpu_count() or 1)
+        )
+        # Spawned workers avoid forking the server's event loop threads.
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        _pools[name] = pool
+    return pool
+
+
+def _discard_process_pool(
+    name: str, pool: ProcessPoolExecutor
+):
+    """
+    Drops a broken pool: once a worker dies, every pending and later task of
+    the pool fails with BrokenProcessPool. The next get_process_pool call
+    for `name` starts a fresh one.
+    """
+    if _pools.get(name) is pool:
+        del _pools[name]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_to_process_pool(
+    name: str,
+    workers_env: str,
+    default_workers: int,
+    fn: Callable[..., Any],
+    *args: Any,
+) -> Future:
+    """
+    Submits `fn(*args)` to the pool registered under `name` (see
+    get_process_pool). A pool broken by a dead worker is replaced first.
+    """
+    pool = get_process_pool(
+        name, workers_env, default_workers
+    )
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_process_pool(name, pool)
+        return get_process_pool(
+            name, workers_env, default_workers
+        ).submit(fn, *args)
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+Inter-annotator agreement for the Final Report.
+
+When several evaluators score the same segments, every rating is one
+(rater, item, value) triple, where an item is a segment as translated by
+one engine of one language pair and the rater comes from evaluator_of. The
+ratings of each metric are kept as three parallel arrays, a sparse
+rater x item matrix in coordinate form; nothing dense in raters x items is
+ever built. Krippendorff's alpha reduces them to an items x values count
+matrix and the values x values coincidence matrix, and Cohen's kappa is
+averaged over every pair of raters with overlapping items (Light's kappa),
+with both computed through np.bincount over integer codes.
+"""
+
+import logging
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import numpy as np
+from .report_manifest import IngestManifest
+from .report_stats import partition_engines
+from .results_store import (
+    ResultsStore,
+    evaluator_of,
+    get_results_store,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricAgreement(TypedDict):
+    metric: str
+    raters: int
+    # Items scored by at least two raters, and their ratings.
+    items: int
+    ratings: int
+    alpha: str
+    kappa: str
+    rater_pairs: int
+
+
+class Ratings(TypedDict):
+    raters: np.ndarray
+    items: np.ndarray
+    values: np.ndarray
+
+
+def collect_ratings(
+    project: str,
+    metric_names: List[str],
+    store: Optional[ResultsStore] = None,
+) -> Tuple[List[str], Dict[str, Ratings]]:
+    """
+    The evaluators of the project and, per metric, its ratings as rater
+    codes (into the evaluator list), item codes and values. A rater's
+    repeated ratings of an item are averaged.
+    """
+    store = store or get_results_store()
+    rater_codes: Dict[str, int] = {}
+    group_codes: Dict[Tuple[str, str], int] = {}
+    parts: Dict[str, List[Tuple[np.ndarray, ...]]] = {
+        name: [] for name in metric_names
+    }
+    for entry in IngestManifest.load(
+        store, project
+    ).entries.values():
+        info = store.get_partition(
+            project, entry["partition_id"]
+        )
+        if info is None:
+            continue
+        rater = rater_codes.setdefault(
+            evaluator_of(info), len(rater_codes)
+        )
+        columns = {
+            col["name"]: col["id"]
+            for col in info["columns"]
+            if col["name"] in parts
+        }
+        if not columns:
+            continue
+        language_pair = (
+            info["metadata"].get("Source Language", ""),
+            info["metadata"].get("Target Language", ""),
+        )
+        engines = partition_engines(info, store)
+        for name, column_id in columns.items():
+            values = store.read_column(
+                project, info["partition_id"], column_id
+            )
+            for engine, rows, segments in engines:
+                group = group_codes.setdefault(
+                    (*language_pair, engine),
+                    len(group_codes),
+                )
+                scored = ~np.isnan(values[rows])
+                parts[name].append(
+                    (
+                        np.full(
+                            int(scored.sum()),
+                            rater,
+                            dtype=np.int64,
+                        ),
+                        (np.int64(group) << 32)
+                        | segments[scored].astype(np.int64),
+                        values[rows][scored].astype(
+                            np.float64
+                        ),
+                    )
+                )
+    ratings: Dict[str, Ratings] = {}
+    for name, metric_parts in parts.items():
+        if not metric_parts:
+            ratings[name] = {
+                "raters": np.empty(0, np.int64),
+                "items": np.empty(0, np.int64),
+                "values": np.empty(0),
+            }
+            continue
+        raters, items, values = (
+            np.concatenate(arrays)
+            for arrays in zip(*metric_parts)
+        )
+        keys, inverse = np.unique(
+            np.column_stack([items, raters]),
+            axis=0,
+            return_inverse=True,
+        )
+        inverse = inverse.ravel()
+        ratings[name] = {
+            "raters": keys[:, 1],
+            "items": keys[:, 0],
+            "values": np.bincount(inverse, weights=values)
+            / np.bincount(inverse),
+        }
+    return list(rater_codes), ratings
+
+
+def _shared_items(ratings: Ratings) -> Ratings:
+    """Only the ratings of items scored by at least two raters."""
+    _, inverse, counts = np.unique(
+        ratings["items"],
+        return_inverse=True,
+        return_counts=True,
+    )
+    shared = counts[inverse] >= 2
+    return {
+        "raters": ratings["raters"][shared],
+        "items": ratings["items"][shared],
+        "values": ratings["values"][shared],
+    }
+
+
+def krippendorff_alpha(
+    items: np.ndarray,
+    values: np.ndarray,
+    level: str = "interval",
+) -> float:
+    """
+    Krippendorff's alpha of ratings given as item codes and values, at the
+    "interval" or "nominal" level of measurement; NaN when it is undefined
+    (fewer than two pairable ratings, or a single value overall).
+    """
+    _, item_index, counts = np.unique(
+        items, return_inverse=True, return_counts=True
+    )
+    pairable = counts[item_index] >= 2
+    if pairable.sum() < 2:
+        return float("nan")
+    item_index = np.unique(
+        item_index[pairable], return_inverse=True
+    )[1].ravel()
+    scale, value_index = np.unique(
+        values[pairable], return_inverse=True
+    )
+    value_index = value_index.ravel()
+    item_count = int(item_index.max()) + 1
+    # Items x values rating counts, then the values x values coincidences.
+    by_item = np.bincount(
+        item_index * len(scale) + value_index,
+        minlength=item_count * len(scale),
+    ).reshape(item_count, len(scale))
+    weighted = by_item / (by_item.sum(axis=1) - 1)[:, None]
+    coincidences = weighted.T @ by_item - np.diag(
+        weighted.sum(axis=0)
+    )
+    marginals = coincidences.sum(axis=1)
+    total = marginals.sum()
+    if level == "nominal":
+        delta = 1.0 - np.eye(len(scale))
+    else:
+        delta = np.subtract.outer(scale, scale) ** 2
+    expected = (
+        marginals
+        @ delta
+        @ marginals
+        / (total * (total - 1))
+    )
+    if expected == 0:
+        return float("nan")
+    observed = (coincidences * delta).sum() / total
+    return float(1.0 - observed / expected)
+
+
+def pairwise_cohen_kappa(
+    raters: np.ndarray,
+    items: np.ndarray,
+    values: np.ndarray,
+) -> Tuple[float, int]:
+    """
+    Cohen's kappa of every pair of raters on the items both scored,
+    averaged over the pairs where it is defined (Light's kappa). Returns
+    the mean and the number of rater pairs it covers. Ratings must be
+    unique per (rater, item).
+    """
+    order = np.lexsort((raters, items))
+    raters, items = raters[order], items[order]
+    _, codes = np.unique(values[order], return_inverse=True)
+    codes = codes.ravel()
+    first_raters, second_raters = [], []
+    first_codes, second_codes = [], []
+    # Within an item raters are sorted, so offset d pairs each rating with
+    # the d-th next rating of the same item, if any.
+    offset = 1
+    while offset < len(items):
+        same = items[:-offset] == items[offset:]
+        if not same.any():
+            break
+        first_raters.append(raters[:-offset][same])
+        second_raters.append(raters[offset:][same])
+        first_codes.append(codes[:-offset][same])
+        second_codes.append(codes[offset:][same])
+        offset += 1
+    if not first_raters:
+        return float("nan"), 0
+    rater_count = int(raters.max()) + 1
+    _, pair_index = np.unique(
+        np.concatenate(first_raters) * rater_count
+        + np.concatenate(second_raters),
+        return_inverse=True,
+    )
+    pair_index = pair_index.ravel()
+    first_codes = np.concatenate(first_codes)
+    second_codes = np.concatenate(second_codes)
+    pair_count = int(pair_index.max()) + 1
+    category_count = int(codes.max()) + 1
+    overlap = np.bincount(pair_index, minlength=pair_count)
+    observed = (
+        np.bincount(
+            pair_index,
+            weights=first_codes == second_codes,
+            minlength=pair_count,
+        )
+        / overlap
+    )
+    first_marginals = np.bincount(
+        pair_index * category_count + first_codes,
+        minlength=pair_count * category_count,
+    ).reshape(pair_count, category_count)
+    second_marginals = np.bincount(
+        pair_index * category_count + second_codes,
+        minlength=pair_count * category_count,
+    ).reshape(pair_count, category_count)
+    expected = (first_marginals * second_marginals).sum(
+        axis=1
+    ) / (overlap.astype(np.float64) ** 2)
+    defined = expected < 1
+    if not defined.any():
+        return float("nan"), 0
+    kappas = (observed[defined] - expected[defined]) / (
+        1 - expected[defined]
+    )
+    return float(kappas.mean()), int(defined.sum())
+
+
+def _format_coefficient(value: float) -> str:
+    return "" if np.isnan(value) else f"{value:.3f}"
+
+
+def metric_agreement(
+    project: str,
+    metric_names: List[str],
+    store: Optional[ResultsStore] = None,
+) -> List[MetricAgreement]:
+    """Krippendorff's alpha (interval) and Cohen's kappa of each metric."""
+    evaluators, ratings = collect_ratings(
+        project, metric_names, store
+    )
+    results: List[MetricAgreement] = []
+    for name in metric_names:
+        shared = _shared_items(ratings[name])
+        kappa, rater_pairs = pairwise_cohen_kappa(
+            shared["raters"],
+            shared["items"],
+            shared["values"],
+        )
+        results.append(
+            {
+                "metric": name,
+                "raters": len(np.unique(shared["raters"])),
+                "items": len(np.unique(shared["items"])),
+                "ratings": len(shared["values"]),
+                "alpha": _format_coefficient(
+                    krippendorff_alpha(
+                        shared["items"], shared["values"]
+                    )
+                ),
+                "kappa": _format_coefficient(kappa),
+                "rater_pairs": rater_pairs,
+            }
+        )
+    logger.info(
+        f"Agreement for '{project}': {len(evaluators)} evaluators, {len(metric_names)} metrics."
+    )
+    return results
\ No newline at end of file
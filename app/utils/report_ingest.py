@@ -0,0 +1,576 @@
+"""
+Ingestion of the scored workbooks evaluators send back.
+
+Each workbook is streamed with openpyxl in read-only mode. The hidden
+Metadata sheet written with the template maps column ids to sheet columns,
+so only the project's Scoring and Calculated Score columns are read, by id,
+even if an evaluator renamed a header; workbooks without it fall back to
+matching header names. Rows go straight into a results store partition, so
+memory stays flat however many workbooks are ingested.
+
+Parsing .xlsx is CPU-bound, so batches are spread over a process pool: each
+worker ingests whole workbooks into their own partitions and hands back the
+per-file summary and additive figures, which report_manifest merges into
+the project totals.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import math
+import os
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import numpy as np
+import openpyxl
+from openpyxl.utils import column_index_from_string
+from .process_pools import submit_to_process_pool
+from .results_store import (
+    LAST_MODIFIED_BY_KEY,
+    PartitionInfo,
+    ResultColumn,
+    ResultsStore,
+    evaluator_of,
+    get_results_store,
+)
+from .template_writer import (
+    DATA_SHEET_NAME,
+    FIRST_DATA_ROW,
+    METADATA_SHEET_NAME,
+    STACK_COLUMN_ID,
+)
+
+if TYPE_CHECKING:
+    from app.states.file_prep_state import ExcelColumn
+
+logger = logging.getLogger(__name__)
+REPORT_INGEST_WORKERS_ENV = "LTX_REPORT_INGEST_WORKERS"
+SCORE_GROUPS = ("Scoring", "Calculated Score")
+_COLUMN_TABLE_HEADER = "Column Id"
+
+
+class ReportIngestError(ValueError):
+    """A returned workbook cannot be read as an evaluation template."""
+
+
+class WorkbookColumn(TypedDict):
+    id: str
+    name: str
+    group: str
+    metric_type: str
+    index: int
+
+
+class PartitionAggregate(TypedDict):
+    row_count: int
+    scored_rows: int
+    # Sum and count of the non-blank values, and the name, by column id.
+    sums: Dict[str, float]
+    counts: Dict[str, int]
+    names: Dict[str, str]
+
+
+class ReportFileSummary(TypedDict):
+    partition_id: str
+    file_name: str
+    source_language: str
+    target_language: str
+    engine: str
+    evaluator: str
+    row_count: int
+    scored_rows: int
+    mean_overall: str
+
+
+def score_columns(
+    columns: List["ExcelColumn"],
+) -> List["ExcelColumn"]:
+    """The project columns read back from returned workbooks."""
+    return [
+        col
+        for col in columns
+        if col.get("group") in SCORE_GROUPS
+    ]
+
+
+def _cell_text(value: Any) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def read_template_metadata(
+    workbook,
+) -> Tuple[Dict[str, str], List[WorkbookColumn]]:
+    """
+    Reads the key/value metadata and the column table from the Metadata
+    sheet. Returns empty results if the sheet is missing.
+    """
+    metadata: Dict[str, str] = {}
+    columns: List[WorkbookColumn] = []
+    if METADATA_SHEET_NAME not in workbook.sheetnames:
+        return metadata, columns
+    in_column_table = False
+    for row in workbook[METADATA_SHEET_NAME].iter_rows(
+        max_col=5, values_only=True
+    ):
+        cells = [_cell_text(value) for value in row] + [
+            ""
+        ] * (5 - len(row))
+        if not cells[0]:
+            continue
+        if cells[0] == _COLUMN_TABLE_HEADER:
+            in_column_table = True
+        elif in_column_table:
+            column_id, name, group, metric_type, letter = (
+                cells[:5]
+            )
+            if letter:
+                columns.append(
+                    {
+                        "id": column_id,
+                        "name": name,
+                        "group": group,
+                        "metric_type": metric_type,
+                        "index": column_index_from_string(
+                            letter
+                        )
+                        - 1,
+                    }
+                )
+        else:
+            metadata[cells[0]] = cells[1]
+    return metadata, columns
+
+
+def _columns_from_headers(
+    sheet, project_columns: List["ExcelColumn"]
+) -> List[WorkbookColumn]:
+    """Fallback for workbooks without a Metadata sheet: match header names."""
+    headers = next(
+        sheet.iter_rows(max_row=1, values_only=True), ()
+    )
+    by_name = {
+        str(col["name"]): col for col in project_columns
+    }
+    columns: List[WorkbookColumn] = []
+    for index, header in enumerate(headers):
+        col = by_name.get(_cell_text(header))
+        if col is not None:
+            columns.append(
+                {
+                    "id": str(col["id"]),
+                    "name": str(col["name"]),
+                    "group": str(col.get("group") or ""),
+                    "metric_type": str(
+                        col.get("metric_type") or ""
+                    ),
+                    "index": index,
+                }
+            )
+    return columns
+
+
+def _score_value(value: Any) -> float:
+    """A score cell as a float; NaN for blank or non-numeric cells."""
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return math.nan
+
+
+def _int_metadata(
+    metadata: Dict[str, str], key: str
+) -> Optional[int]:
+    try:
+        return int(float(metadata.get(key) or ""))
+    except ValueError:
+        return None
+
+
+def ingest_returned_workbook(
+    path: str,
+    project: str,
+    project_columns: List["ExcelColumn"],
+    store: Optional[ResultsStore] = None,
+    file_name: Optional[str] = None,
+) -> PartitionInfo:
+    """
+    Streams one returned workbook into a new partition of `project` and
+    returns its info. Raises ReportIngestError if the workbook has none of
+    the project's score columns or cannot be opened as a workbook.
+    """
+    store = store or get_results_store()
+    file_name = file_name or os.path.basename(path)
+    wanted = {
+        str(col["id"]): col
+        for col in score_columns(project_columns)
+    }
+    try:
+        workbook = openpyxl.load_workbook(
+            path,
+            read_only=True,
+            data_only=True,
+            keep_links=False,
+        )
+    except Exception as exc:
+        raise ReportIngestError(
+            f"'{file_name}' is not a readable .xlsx workbook: {exc}"
+        ) from exc
+    try:
+        metadata, workbook_columns = read_template_metadata(
+            workbook
+        )
+        last_modified_by = _cell_text(
+            workbook.properties.lastModifiedBy
+        )
+        if last_modified_by:
+            metadata[LAST_MODIFIED_BY_KEY] = (
+                last_modified_by
+            )
+        sheet = (
+            workbook[DATA_SHEET_NAME]
+            if DATA_SHEET_NAME in workbook.sheetnames
+            else workbook.worksheets[0]
+        )
+        if not workbook_columns:
+            workbook_columns = _columns_from_headers(
+                sheet, project_columns
+            )
+        found = [
+            col
+            for col in workbook_columns
+            if col["id"] in wanted
+        ]
+        if not found:
+            raise ReportIngestError(
+                f"'{file_name}' has none of the project's score columns."
+            )
+        missing = set(wanted) - {col["id"] for col in found}
+        if missing:
+            logger.warning(
+                f"'{file_name}' is missing {len(missing)} of the project's score columns."
+            )
+        stack_column = next(
+            (
+                col
+                for col in workbook_columns
+                if col["id"] == STACK_COLUMN_ID
+            ),
+            None,
+        )
+        row_count = _int_metadata(metadata, "Row Count")
+        indexes = [col["index"] for col in found]
+        label_index = (
+            stack_column["index"]
+            if stack_column is not None
+            else None
+        )
+        result_columns: List[ResultColumn] = [
+            {
+                "id": col["id"],
+                "name": str(wanted[col["id"]]["name"]),
+                "group": col["group"],
+                "metric_type": col["metric_type"],
+            }
+            for col in found
+        ]
+        writer = store.open_partition(
+            project,
+            file_name,
+            metadata,
+            result_columns,
+            row_offset=_int_metadata(metadata, "Row Offset")
+            or 0,
+            has_labels=stack_column is not None,
+        )
+        try:
+            for row in sheet.iter_rows(
+                min_row=FIRST_DATA_ROW,
+                max_row=(
+                    FIRST_DATA_ROW - 1 + row_count
+                    if row_count is not None
+                    else None
+                ),
+                max_col=max(indexes + [label_index or 0])
+                + 1,
+                values_only=True,
+            ):
+                writer.append(
+                    [
+                        _score_value(
+                            row[index]
+                            if index < len(row)
+                            else None
+                        )
+                        for index in indexes
+                    ],
+                    (
+                        _cell_text(row[label_index])
+                        if label_index is not None
+                        and label_index < len(row)
+                        else None
+                    ),
+                )
+            info = writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+    except (ReportIngestError, MemoryError):
+        raise
+    except Exception as exc:
+        raise ReportIngestError(
+            f"'{file_name}' could not be read: {exc}"
+        ) from exc
+    finally:
+        workbook.close()
+    logger.info(
+        f"Ingested {info['row_count']} rows of '{file_name}' into project '{project}'."
+    )
+    return info
+
+
+def aggregate_partition(
+    info: PartitionInfo,
+    store: Optional[ResultsStore] = None,
+) -> PartitionAggregate:
+    """
+    The additive figures of one partition: rows, scored rows and the sum
+    and count of the non-blank values of each score column.
+    """
+    store = store or get_results_store()
+    scored = np.zeros(info["row_count"], dtype=bool)
+    aggregate: PartitionAggregate = {
+        "row_count": info["row_count"],
+        "scored_rows": 0,
+        "sums": {},
+        "counts": {},
+        "names": {},
+    }
+    for col in info["columns"]:
+        values = store.read_column(
+            info["project"], info["partition_id"], col["id"]
+        )
+        present = ~np.isnan(values)
+        scored |= present
+        aggregate["sums"][col["id"]] = float(
+            np.nansum(values, dtype=np.float64)
+        )
+        aggregate["counts"][col["id"]] = int(present.sum())
+        aggregate["names"][col["id"]] = col["name"]
+    aggregate["scored_rows"] = int(scored.sum())
+    return aggregate
+
+
+def summarize_partition(
+    info: PartitionInfo,
+    store: Optional[ResultsStore] = None,
+    aggregate: Optional[PartitionAggregate] = None,
+) -> ReportFileSummary:
+    """Per-file figures for the Final Report view."""
+    if aggregate is None:
+        aggregate = aggregate_partition(info, store)
+    mean_overall = ""
+    for col in info["columns"]:
+        count = aggregate["counts"].get(col["id"], 0)
+        if col["metric_type"] == "overall" and count:
+            mean_overall = f"{aggregate['sums'][col['id']] / count:.2f}"
+    metadata = info["metadata"]
+    return {
+        "partition_id": info["partition_id"],
+        "file_name": info["file_name"],
+        "source_language": metadata.get(
+            "Source Language", ""
+        ),
+        "target_language": metadata.get(
+            "Target Language", ""
+        ),
+        "engine": metadata.get("MT Engine", "")
+        or ", ".join(info["labels"]),
+        "evaluator": evaluator_of(info),
+        "row_count": info["row_count"],
+        "scored_rows": aggregate["scored_rows"],
+        "mean_overall": mean_overall,
+    }
+
+
+class IngestOutcome(TypedDict):
+    path: str
+    file_name: str
+    partition_id: str
+    summary: Optional[ReportFileSummary]
+    aggregate: Optional[PartitionAggregate]
+    error: str
+
+
+def _ingest_in_worker(
+    path: str,
+    project: str,
+    project_columns: List["ExcelColumn"],
+    store_root: str,
+    file_name: str,
+) -> IngestOutcome:
+    """
+    Worker entry point: ingests one workbook into its own partition and
+    returns the partition's summary as the worker's partial result.
+    """
+    store = ResultsStore(store_root)
+    try:
+        info = ingest_returned_workbook(
+            path, project, project_columns, store, file_name
+        )
+    except ReportIngestError as exc:
+        return {
+            "path": path,
+            "file_name": file_name,
+            "partition_id": "",
+            "summary": None,
+            "aggregate": None,
+            "error": str(exc),
+        }
+    aggregate = aggregate_partition(info, store)
+    return {
+        "path": path,
+        "file_name": file_name,
+        "partition_id": info["partition_id"],
+        "summary": summarize_partition(
+            info, store, aggregate
+        ),
+        "aggregate": aggregate,
+        "error": "",
+    }
+
+
+def _discard_late_partition(
+    store: ResultsStore,
+    project: str,
+    future: "concurrent.futures.Future[IngestOutcome]",
+):
+    """Drops the partition of a workbook that finished after its batch was cancelled."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    partition_id = future.result()["partition_id"]
+    if partition_id:
+        store.delete_partition(project, partition_id)
+
+
+async def ingest_returned_workbooks(
+    workbook_paths: Dict[str, str],
+    project: str,
+    project_columns: List["ExcelColumn"],
+    store: Optional[ResultsStore] = None,
+) -> AsyncIterator[IngestOutcome]:
+    """
+    Ingests returned workbooks (path -> original file name) in parallel on
+    the report ingestion process pool, yielding each file's outcome as it
+    finishes. A malformed workbook is reported as that file's error and
+    the rest of the batch carries on. A worker that dies breaks the pool
+    and fails every file in flight, so those are retried once, one at a
+    time on a fresh pool; a file that breaks it again is reported as an
+    error. A re-sent file replaces the partitions of its earlier copies
+    once it has been ingested.
+    """
+    store = store or get_results_store()
+    previous: Dict[str, List[str]] = {}
+    for info in store.list_partitions(project):
+        previous.setdefault(info["file_name"], []).append(
+            info["partition_id"]
+        )
+    pending: Dict[
+        "asyncio.Future[IngestOutcome]",
+        Tuple[
+            str, "concurrent.futures.Future[IngestOutcome]"
+        ],
+    ] = {}
+    # Files failed by a dead worker, rerun one at a time once the others
+    # are done, so a file that kills its worker again fails on its own.
+    retries: List[str] = []
+    retried = set()
+
+    def submit(path: str):
+        submitted = submit_to_process_pool(
+            "report_ingest",
+            REPORT_INGEST_WORKERS_ENV,
+            os.cpu_count() or 1,
+            _ingest_in_worker,
+            path,
+            project,
+            project_columns,
+            store.root_dir,
+            workbook_paths[path],
+        )
+        pending[asyncio.wrap_future(submitted)] = (
+            path,
+            submitted,
+        )
+
+    try:
+        for path in workbook_paths:
+            submit(path)
+        while pending or retries:
+            if not pending:
+                submit(retries.pop(0))
+            done, _ = await asyncio.wait(
+                pending.keys(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for future in done:
+                path, submitted = pending.pop(future)
+                file_name = workbook_paths[path]
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool as exc:
+                    if path not in retried:
+                        retried.add(path)
+                        retries.append(path)
+                        continue
+                    outcome = {
+                        "path": path,
+                        "file_name": file_name,
+                        "partition_id": "",
+                        "summary": None,
+                        "aggregate": None,
+                        "error": f"'{file_name}' could not be read: its ingest worker died ({exc})",
+                    }
+                except Exception as exc:
+                    outcome = {
+                        "path": path,
+                        "file_name": file_name,
+                        "partition_id": "",
+                        "summary": None,
+                        "aggregate": None,
+                        "error": f"'{file_name}' could not be read: {exc}",
+                    }
+                if outcome["error"]:
+                    logger.warning(outcome["error"])
+                else:
+                    for partition_id in previous.pop(
+                        file_name, []
+                    ):
+                        store.delete_partition(
+                            project, partition_id
+                        )
+                yield outcome
+    finally:
+        for future, (_, submitted) in pending.items():
+            future.cancel()
+            if not submitted.cancel():
+                submitted.add_done_callback(
+                    partial(
+                        _discard_late_partition,
+                        store,
+                        project,
+                    )
+                )
\ No newline at end of file
@@ -0,0 +1,404 @@
+"""
+Incremental Final Report runs.
+
+Every returned workbook kept for a project is recorded in the project's
+ingestion manifest with its size, modification time, content hash and the
+results partition it was ingested into, along with that partition's
+additive figures (rows, scored rows, per-column sums and counts). A re-run
+compares the returned workbooks on disk against the manifest: files with an
+unchanged size and mtime are skipped without being read, files whose stat
+changed but whose content hash did not are only re-stamped, and just the new
+or changed workbooks are parsed. The project totals are then updated by
+subtracting the replaced partitions' figures and adding the new ones, never
+recomputed from every partition.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+from .jobs import JobContext, JobWork
+from .report_ingest import (
+    PartitionAggregate,
+    ReportFileSummary,
+    ingest_returned_workbooks,
+)
+from .results_store import ResultsStore, get_results_store
+
+if TYPE_CHECKING:
+    from app.states.file_prep_state import ExcelColumn
+
+logger = logging.getLogger(__name__)
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ManifestEntry(TypedDict):
+    file_name: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    partition_id: str
+    summary: ReportFileSummary
+    aggregate: PartitionAggregate
+
+
+class MetricMean(TypedDict):
+    name: str
+    mean: str
+    count: int
+
+
+class ReportRerunResult(TypedDict):
+    ingested: List[str]
+    errors: Dict[str, str]
+    unchanged: int
+    removed: int
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(
+            lambda: handle.read(_HASH_CHUNK_SIZE), b""
+        ):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def empty_aggregate() -> PartitionAggregate:
+    return {
+        "row_count": 0,
+        "scored_rows": 0,
+        "sums": {},
+        "counts": {},
+        "names": {},
+    }
+
+
+def combine_aggregates(
+    total: PartitionAggregate,
+    part: PartitionAggregate,
+    sign: int = 1,
+):
+    """Adds (sign=1) or removes (sign=-1) one partition's figures from `total` in place."""
+    total["row_count"] += sign * part["row_count"]
+    total["scored_rows"] += sign * part["scored_rows"]
+    for column_id, count in part["counts"].items():
+        remaining = (
+            total["counts"].get(column_id, 0) + sign * count
+        )
+        if remaining <= 0:
+            total["counts"].pop(column_id, None)
+            total["sums"].pop(column_id, None)
+            total["names"].pop(column_id, None)
+            continue
+        total["counts"][column_id] = remaining
+        total["sums"][column_id] = (
+            total["sums"].get(column_id, 0.0)
+            + sign * part["sums"][column_id]
+        )
+        total["names"][column_id] = part["names"][column_id]
+
+
+def metric_means(
+    totals: PartitionAggregate,
+) -> List[MetricMean]:
+    """Project-wide mean of each score column, from the running totals."""
+    return [
+        {
+            "name": totals["names"][column_id],
+            "mean": f"{totals['sums'][column_id] / count:.2f}",
+            "count": count,
+        }
+        for column_id, count in totals["counts"].items()
+    ]
+
+
+class IngestManifest:
+    """The manifest of one project: returned workbook path -> ManifestEntry, plus totals."""
+
+    def __init__(
+        self,
+        path: str,
+        entries: Dict[str, ManifestEntry],
+        totals: PartitionAggregate,
+    ):
+        self.path = path
+        self.entries = entries
+        self.totals = totals
+
+    @classmethod
+    def load(
+        cls, store: ResultsStore, project: str
+    ) -> "IngestManifest":
+        path = store.manifest_path(project)
+        try:
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+            return cls(
+                path, data["entries"], data["totals"]
+            )
+        except (OSError, ValueError, KeyError):
+            return cls(path, {}, empty_aggregate())
+
+    def save(self):
+        staging = f"{self.path}.tmp"
+        with open(staging, "w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "entries": self.entries,
+                    "totals": self.totals,
+                },
+                handle,
+            )
+        os.replace(staging, self.path)
+
+    def record(
+        self,
+        workbook_path: str,
+        entry: ManifestEntry,
+    ) -> Optional[ManifestEntry]:
+        """Records a (re-)ingested workbook; returns the entry it replaced."""
+        previous = self.entries.get(workbook_path)
+        if previous is not None:
+            combine_aggregates(
+                self.totals, previous["aggregate"], -1
+            )
+        combine_aggregates(self.totals, entry["aggregate"])
+        self.entries[workbook_path] = entry
+        return previous
+
+    def remove(
+        self, workbook_path: str
+    ) -> Optional[ManifestEntry]:
+        entry = self.entries.pop(workbook_path, None)
+        if entry is not None:
+            combine_aggregates(
+                self.totals, entry["aggregate"], -1
+            )
+        return entry
+
+    def find_partition(
+        self, partition_id: str
+    ) -> Optional[str]:
+        """The workbook path recorded for a partition, if any."""
+        return next(
+            (
+                path
+                for path, entry in self.entries.items()
+                if entry["partition_id"] == partition_id
+            ),
+            None,
+        )
+
+    def summaries(self) -> List[ReportFileSummary]:
+        return sorted(
+            (
+                entry["summary"]
+                for entry in self.entries.values()
+            ),
+            key=lambda summary: summary["file_name"],
+        )
+
+
+def plan_rerun(
+    manifest: IngestManifest, returns_dir: str
+) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+    """
+    Compares the returned workbooks on disk with the manifest. Returns the
+    workbooks to parse (path -> file name), the content hash of each of
+    them, and the recorded paths whose file is gone. Entries whose stat
+    changed but whose content did not are re-stamped in place.
+    """
+    to_ingest: Dict[str, str] = {}
+    hashes: Dict[str, str] = {}
+    present = set()
+    for dir_entry in os.scandir(returns_dir):
+        if not dir_entry.is_file():
+            continue
+        path = dir_entry.path
+        present.add(path)
+        stat = dir_entry.stat()
+        recorded = manifest.entries.get(path)
+        if (
+            recorded is not None
+            and recorded["size"] == stat.st_size
+            and recorded["mtime_ns"] == stat.st_mtime_ns
+        ):
+            continue
+        content_hash = hash_file(path)
+        if (
+            recorded is not None
+            and recorded["content_hash"] == content_hash
+        ):
+            recorded["size"] = stat.st_size
+            recorded["mtime_ns"] = stat.st_mtime_ns
+            continue
+        to_ingest[path] = dir_entry.name
+        hashes[path] = content_hash
+    removed = [
+        path
+        for path in manifest.entries
+        if path not in present
+    ]
+    return to_ingest, hashes, removed
+
+
+_project_locks: Dict[str, asyncio.Lock] = {}
+
+
+def report_rerun_work(
+    project: str,
+    project_columns: List["ExcelColumn"],
+    store: Optional[ResultsStore] = None,
+) -> JobWork:
+    """
+    Brings the project's results up to date with its returned workbooks,
+    parsing only new or changed files. The result is the JSON-encoded
+    ReportRerunResult.
+    """
+    store = store or get_results_store()
+
+    async def work(context: JobContext) -> str:
+        lock = _project_locks.setdefault(
+            project, asyncio.Lock()
+        )
+        async with lock:
+            return await _rerun(context)
+
+    async def _rerun(context: JobContext) -> str:
+        manifest = await asyncio.to_thread(
+            IngestManifest.load, store, project
+        )
+        # Files whose partition is gone from the store are read again.
+        for path, entry in list(manifest.entries.items()):
+            if (
+                store.get_partition(
+                    project, entry["partition_id"]
+                )
+                is None
+            ):
+                manifest.remove(path)
+        to_ingest, hashes, removed = (
+            await asyncio.to_thread(
+                plan_rerun,
+                manifest,
+                store.returns_dir(project),
+            )
+        )
+        result: ReportRerunResult = {
+            "ingested": [],
+            "errors": {},
+            "unchanged": len(manifest.entries)
+            - len(removed)
+            - len(
+                [
+                    path
+                    for path in to_ingest
+                    if path in manifest.entries
+                ]
+            ),
+            "removed": len(removed),
+        }
+        try:
+            for path in removed:
+                entry = manifest.remove(path)
+                store.delete_partition(
+                    project, entry["partition_id"]
+                )
+            done = 0
+            async for outcome in ingest_returned_workbooks(
+                to_ingest, project, project_columns, store
+            ):
+                done += 1
+                path = outcome["path"]
+                if outcome["error"]:
+                    result["errors"][
+                        outcome["file_name"]
+                    ] = outcome["error"]
+                else:
+                    stat = os.stat(path)
+                    previous = manifest.record(
+                        path,
+                        {
+                            "file_name": outcome[
+                                "file_name"
+                            ],
+                            "size": stat.st_size,
+                            "mtime_ns": stat.st_mtime_ns,
+                            "content_hash": hashes[path],
+                            "partition_id": outcome[
+                                "partition_id"
+                            ],
+                            "summary": outcome["summary"],
+                            "aggregate": outcome[
+                                "aggregate"
+                            ],
+                        },
+                    )
+                    if previous is not None:
+                        store.delete_partition(
+                            project,
+                            previous["partition_id"],
+                        )
+                    result["ingested"].append(
+                        outcome["partition_id"]
+                    )
+                context.report(
+                    done,
+                    len(to_ingest),
+                    f"{done} of {len(to_ingest)} new or changed workbooks read",
+                )
+        finally:
+            await asyncio.to_thread(manifest.save)
+        logger.info(
+            f"Final Report for '{project}': {len(result['ingested'])} ingested, {result['unchanged']} unchanged, {result['removed']} removed, {len(result['errors'])} failed."
+        )
+        return json.dumps(result)
+
+    return work
+
+
+async def remove_returned_workbook(
+    project: str,
+    partition_id: str,
+    store: Optional[ResultsStore] = None,
+):
+    """
+    Drops an ingested workbook: its file, its partition and its share of the
+    totals. Holds the project's lock, so a rerun in progress cannot save
+    its manifest over the removal.
+    """
+    store = store or get_results_store()
+    lock = _project_locks.setdefault(
+        project, asyncio.Lock()
+    )
+    async with lock:
+        await asyncio.to_thread(
+            _remove_returned_workbook,
+            project,
+            partition_id,
+            store,
+        )
+
+
+def _remove_returned_workbook(
+    project: str, partition_id: str, store: ResultsStore
+):
+    manifest = IngestManifest.load(store, project)
+    path = manifest.find_partition(partition_id)
+    if path is not None:
+        manifest.remove(path)
+        manifest.save()
+        if os.path.exists(path):
+            os.remove(path)
+    store.delete_partition(project, partition_id)
\ No newline at end of file
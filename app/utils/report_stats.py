@@ -0,0 +1,475 @@
+"""
+Paired bootstrap comparisons of MT engines for the Final Report.
+
+Segment i of every partition built from the same inputs is the same source
+segment (see results_store), so two engines of a language pair can be
+compared segment by segment. Per engine, the scores of each segment are
+averaged over the files that scored it; each engine pair of a language
+pair is then compared per metric on the segments both engines have a score
+for. The confidence interval of the mean difference and of the win rate
+comes from a percentile bootstrap over those paired segments: resamples are
+drawn as index matrices, a chunk of resamples at a time, and reduced with
+a gather and a row-sum per chunk. The (pair, metric) cells are
+independent and run on a process pool.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import logging
+import os
+from concurrent.futures.process import BrokenProcessPool
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import numpy as np
+from .jobs import JobContext, JobWork
+from .process_pools import submit_to_process_pool
+from .report_manifest import IngestManifest
+from .results_store import (
+    PartitionInfo,
+    ResultsStore,
+    get_results_store,
+)
+from .scoring import OverallScorer, load_score_matrix
+
+if TYPE_CHECKING:
+    from app.states.file_prep_state import ExcelColumn
+
+logger = logging.getLogger(__name__)
+REPORT_STATS_WORKERS_ENV = "LTX_REPORT_STATS_WORKERS"
+BOOTSTRAP_RESAMPLES = 10_000
+CONFIDENCE_LEVEL = 0.95
+OVERALL_METRIC_NAME = "Overall Score"
+# Indices drawn per chunk of resamples; small enough for the gathered
+# values to stay in cache, which beats larger chunks.
+_RESAMPLE_CHUNK_VALUES = 1 << 20
+
+
+class EngineComparison(TypedDict):
+    language_pair: str
+    metric: str
+    engine_a: str
+    engine_b: str
+    segments: int
+    mean_a: str
+    mean_b: str
+    # Mean of engine_a minus engine_b, with its confidence interval.
+    mean_difference: str
+    difference_ci: str
+    # Share of segments engine_a scores higher on (ties count half).
+    win_rate: str
+    win_rate_ci: str
+    # Why the cell could not be computed; its figures are blank then.
+    error: str
+
+
+class BootstrapResult(TypedDict):
+    mean_a: float
+    mean_b: float
+    mean_difference: float
+    difference_low: float
+    difference_high: float
+    win_rate: float
+    win_rate_low: float
+    win_rate_high: float
+
+
+def partition_engines(
+    info: PartitionInfo,
+    store: Optional[ResultsStore] = None,
+) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    (engine, row indexes, segment indexes) of each engine in a partition.
+    A stacked partition holds one block of rows per stack label, each
+    starting again at the template's first segment.
+    """
+    store = store or get_results_store()
+    rows = np.arange(info["row_count"])
+    codes = store.read_labels(
+        info["project"], info["partition_id"]
+    )
+    if codes is None:
+        return [
+            (
+                info["metadata"].get("MT Engine", ""),
+                rows,
+                rows + info["row_offset"],
+            )
+        ]
+    engines = []
+    for code, label in enumerate(info["labels"]):
+        label_rows = rows[codes == code]
+        engines.append(
+            (
+                label,
+                label_rows,
+                np.arange(len(label_rows))
+                + info["row_offset"],
+            )
+        )
+    return engines
+
+
+def engine_segment_scores(
+    project: str,
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, Optional[int]],
+    store: Optional[ResultsStore] = None,
+) -> Tuple[List[str], Dict[Tuple[str, str], np.ndarray]]:
+    """
+    Metric names (the scoring columns, then the Overall Score) and, by
+    (language pair, engine), a segments x metrics matrix of each segment's
+    mean score over the files that scored it (NaN where none did).
+    """
+    store = store or get_results_store()
+    metric_ids = [
+        str(col["id"])
+        for col in columns
+        if col.get("group") == "Scoring"
+    ]
+    metric_names = [
+        str(col["name"])
+        for col in columns
+        if col.get("group") == "Scoring"
+    ]
+    scorer = OverallScorer(columns, metric_weights)
+    collected: Dict[
+        Tuple[str, str], List[Tuple[np.ndarray, np.ndarray]]
+    ] = {}
+    for entry in IngestManifest.load(
+        store, project
+    ).entries.values():
+        info = store.get_partition(
+            project, entry["partition_id"]
+        )
+        if info is None:
+            continue
+        scores = load_score_matrix(info, metric_ids, store)
+        scores = np.column_stack(
+            [
+                scores,
+                scorer(scores, metric_ids),
+            ]
+        )
+        language_pair = f"{info['metadata'].get('Source Language', '')} → {info['metadata'].get('Target Language', '')}"
+        for engine, rows, segments in partition_engines(
+            info, store
+        ):
+            collected.setdefault(
+                (language_pair, engine), []
+            ).append((segments, scores[rows]))
+    means: Dict[Tuple[str, str], np.ndarray] = {}
+    for key, parts in collected.items():
+        segments = np.concatenate([s for s, _ in parts])
+        scores = np.concatenate([v for _, v in parts])
+        length = (
+            int(segments.max()) + 1 if len(segments) else 0
+        )
+        matrix = np.full((length, scores.shape[1]), np.nan)
+        for metric in range(scores.shape[1]):
+            present = ~np.isnan(scores[:, metric])
+            counts = np.bincount(
+                segments[present], minlength=length
+            )
+            sums = np.bincount(
+                segments[present],
+                weights=scores[present, metric],
+                minlength=length,
+            )
+            scored = counts > 0
+            matrix[scored, metric] = (
+                sums[scored] / counts[scored]
+            )
+        means[key] = matrix
+    return metric_names + [OVERALL_METRIC_NAME], means
+
+
+def paired_bootstrap(
+    scores_a: np.ndarray,
+    scores_b: np.ndarray,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE_LEVEL,
+    rng: Optional[np.random.Generator] = None,
+) -> BootstrapResult:
+    """
+    Mean difference and win rate of paired scores (no NaN) with percentile
+    bootstrap intervals. Each chunk of resamples is a resamples x segments
+    index matrix; a win counts 1 and a tie 0.5, so both statistics are row
+    means of values gathered through the same indexes.
+    """
+    rng = rng or np.random.default_rng()
+    count = len(scores_a)
+    differences = (scores_a - scores_b).astype(np.float32)
+    # 2 for a win, 1 for a tie, 0 for a loss; halved after averaging.
+    outcomes = (np.sign(differences) + 1).astype(np.float32)
+    boot_differences = np.empty(resamples)
+    boot_wins = np.empty(resamples)
+    chunk = max(1, _RESAMPLE_CHUNK_VALUES // count)
+    for start in range(0, resamples, chunk):
+        size = min(chunk, resamples - start)
+        indexes = rng.integers(
+            0, count, (size, count), dtype=np.int32
+        )
+        boot_differences[start : start + size] = np.take(
+            differences, indexes
+        ).sum(axis=1, dtype=np.float64)
+        boot_wins[start : start + size] = np.take(
+            outcomes, indexes
+        ).sum(axis=1, dtype=np.float64)
+    boot_differences /= count
+    boot_wins /= 2 * count
+    tail = (1 - confidence) / 2
+    difference_low, difference_high = np.quantile(
+        boot_differences, [tail, 1 - tail]
+    )
+    win_low, win_high = np.quantile(
+        boot_wins, [tail, 1 - tail]
+    )
+    return {
+        "mean_a": float(scores_a.mean()),
+        "mean_b": float(scores_b.mean()),
+        "mean_difference": float(
+            differences.mean(dtype=np.float64)
+        ),
+        "difference_low": float(difference_low),
+        "difference_high": float(difference_high),
+        "win_rate": float(
+            outcomes.mean(dtype=np.float64) / 2
+        ),
+        "win_rate_low": float(win_low),
+        "win_rate_high": float(win_high),
+    }
+
+
+def _bootstrap_in_worker(
+    scores_a: np.ndarray,
+    scores_b: np.ndarray,
+    resamples: int,
+    confidence: float,
+    seed: Tuple[int, int],
+) -> BootstrapResult:
+    """Worker entry point: one (pair, metric) cell with its own seeded generator."""
+    return paired_bootstrap(
+        scores_a,
+        scores_b,
+        resamples,
+        confidence,
+        np.random.default_rng(list(seed)),
+    )
+
+
+def _comparison(
+    cell: Tuple[str, str, str, str],
+    segments: int,
+    result: BootstrapResult,
+) -> EngineComparison:
+    language_pair, metric, engine_a, engine_b = cell
+    return {
+        "language_pair": language_pair,
+        "metric": metric,
+        "engine_a": engine_a,
+        "engine_b": engine_b,
+        "segments": segments,
+        "mean_a": f"{result['mean_a']:.2f}",
+        "mean_b": f"{result['mean_b']:.2f}",
+        "mean_difference": f"{result['mean_difference']:+.3f}",
+        "difference_ci": f"[{result['difference_low']:+.3f}, {result['difference_high']:+.3f}]",
+        "win_rate": f"{result['win_rate']:.1%}",
+        "win_rate_ci": f"[{result['win_rate_low']:.1%}, {result['win_rate_high']:.1%}]",
+        "error": "",
+    }
+
+
+def _failed_comparison(
+    cell: Tuple[str, str, str, str],
+    segments: int,
+    error: str,
+) -> EngineComparison:
+    language_pair, metric, engine_a, engine_b = cell
+    return {
+        "language_pair": language_pair,
+        "metric": metric,
+        "engine_a": engine_a,
+        "engine_b": engine_b,
+        "segments": segments,
+        "mean_a": "",
+        "mean_b": "",
+        "mean_difference": "",
+        "difference_ci": "",
+        "win_rate": "",
+        "win_rate_ci": "",
+        "error": error,
+    }
+
+
+def engine_comparison_work(
+    project: str,
+    project_columns: List["ExcelColumn"],
+    metric_weights: Dict[str, Optional[int]],
+    store: Optional[ResultsStore] = None,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE_LEVEL,
+    seed: int = 0,
+) -> JobWork:
+    """
+    Compares every engine pair of every language pair, per metric, on the
+    report statistics process pool. The result is the JSON-encoded list of
+    EngineComparison; a fixed `seed` makes re-runs reproducible. A cell that
+    fails is kept with its error and the other cells carry on; cells failed
+    by a dead worker are retried once, one at a time, on a fresh pool.
+    """
+    store = store or get_results_store()
+
+    async def work(context: JobContext) -> str:
+        metric_names, means = await asyncio.to_thread(
+            engine_segment_scores,
+            project,
+            project_columns,
+            metric_weights,
+            store,
+        )
+        engines_by_pair: Dict[str, List[str]] = {}
+        for language_pair, engine in sorted(means):
+            engines_by_pair.setdefault(
+                language_pair, []
+            ).append(engine)
+        cells: List[
+            Tuple[
+                Tuple[str, str, str, str],
+                np.ndarray,
+                np.ndarray,
+            ]
+        ] = []
+        for (
+            language_pair,
+            engines,
+        ) in engines_by_pair.items():
+            for (
+                engine_a,
+                engine_b,
+            ) in itertools.combinations(engines, 2):
+                matrix_a = means[(language_pair, engine_a)]
+                matrix_b = means[(language_pair, engine_b)]
+                length = min(len(matrix_a), len(matrix_b))
+                for metric, name in enumerate(metric_names):
+                    scores_a = matrix_a[:length, metric]
+                    scores_b = matrix_b[:length, metric]
+                    paired = ~np.isnan(
+                        scores_a
+                    ) & ~np.isnan(scores_b)
+                    if paired.sum() < 2:
+                        continue
+                    cells.append(
+                        (
+                            (
+                                language_pair,
+                                name,
+                                engine_a,
+                                engine_b,
+                            ),
+                            scores_a[paired],
+                            scores_b[paired],
+                        )
+                    )
+        pending: Dict[
+            "asyncio.Future[BootstrapResult]",
+            Tuple[int, concurrent.futures.Future],
+        ] = {}
+        # Cells failed by a dead worker, rerun one at a time once the others
+        # are done, so a cell that kills its worker again fails on its own.
+        retries: List[int] = []
+        retried = set()
+
+        def submit(index: int):
+            _, scores_a, scores_b = cells[index]
+            submitted = submit_to_process_pool(
+                "report_stats",
+                REPORT_STATS_WORKERS_ENV,
+                os.cpu_count() or 1,
+                _bootstrap_in_worker,
+                scores_a,
+                scores_b,
+                resamples,
+                confidence,
+                (seed, index),
+            )
+            pending[asyncio.wrap_future(submitted)] = (
+                index,
+                submitted,
+            )
+
+        comparisons: List[EngineComparison] = []
+        try:
+            for index in range(len(cells)):
+                submit(index)
+            while pending or retries:
+                if not pending:
+                    submit(retries.pop(0))
+                done, _ = await asyncio.wait(
+                    pending.keys(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for future in done:
+                    index, _ = pending.pop(future)
+                    cell, scores_a, _ = cells[index]
+                    try:
+                        comparisons.append(
+                            _comparison(
+                                cell,
+                                len(scores_a),
+                                future.result(),
+                            )
+                        )
+                    except BrokenProcessPool as exc:
+                        if index not in retried:
+                            retried.add(index)
+                            retries.append(index)
+                            continue
+                        comparisons.append(
+                            _failed_comparison(
+                                cell,
+                                len(scores_a),
+                                f"Worker died: {exc}",
+                            )
+                        )
+                    except Exception as exc:
+                        logger.error(
+                            f"Engine comparison {cell} failed: {exc}"
+                        )
+                        comparisons.append(
+                            _failed_comparison(
+                                cell,
+                                len(scores_a),
+                                str(exc),
+                            )
+                        )
+                context.report(
+                    len(comparisons),
+                    len(cells),
+                    f"{len(comparisons)} of {len(cells)} engine comparisons done",
+                )
+        finally:
+            for future, (_, submitted) in pending.items():
+                future.cancel()
+                submitted.cancel()
+        comparisons.sort(
+            key=lambda row: (
+                row["language_pair"],
+                row["engine_a"],
+                row["engine_b"],
+                metric_names.index(row["metric"]),
+            )
+        )
+        logger.info(
+            f"Compared engines of '{project}': {len(comparisons)} (pair, metric) cells, {resamples} resamples each."
+        )
+        return json.dumps(comparisons)
+
+    return work
\ No newline at end of file
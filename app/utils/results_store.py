@@ -0,0 +1,611 @@
+"""
+Columnar store of the scores read back from returned evaluator workbooks.
+
+Each ingested workbook becomes one partition: a directory holding one
+float32 file per score column (NaN for a blank cell) and a partition.json
+with the workbook's metadata, column layout and row count. Row i of a
+partition is segment `row_offset + i` of the template's input set, so
+partitions built from the same inputs line up for paired comparisons.
+Values are appended in fixed-size chunks while a workbook is streamed and
+read back through memory maps, so neither ingestion nor aggregation holds
+more than one chunk of a project in memory.
+
+Partitions are laid out as project/language pair/engine/partition, with
+stacked workbooks under a "stacked" engine directory. A SQLite catalog at
+the store root records every committed partition with its project,
+language pair, evaluator, file name and ingestion time, and each of its
+engines (one per stack label for a stacked workbook), all indexed, so a
+query such as the last three EN -> JA DeepL runs opens only the matching
+partitions. A partition becomes visible to readers when its catalog rows
+are written.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from contextlib import closing
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    TypedDict,
+)
+import numpy as np
+
+logger = logging.getLogger(__name__)
+RESULTS_STORE_DIR_ENV = "LTX_RESULTS_STORE_DIR"
+APPEND_CHUNK_ROWS = 8192
+_PARTITION_INFO_FILE = "partition.json"
+_LABELS_FILE = "labels.i32"
+_RETURNS_DIR = ".returns"
+_MANIFEST_FILE = ".manifest.json"
+_CATALOG_FILE = "catalog.sqlite3"
+_STACKED_DIR = "stacked"
+EVALUATOR_KEY = "Evaluator"
+LAST_MODIFIED_BY_KEY = "Last Modified By"
+_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS partitions (
+    partition_id TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    evaluator TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partition_engines (
+    partition_id TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    label_code INTEGER NOT NULL,
+    PRIMARY KEY (partition_id, label_code)
+);
+CREATE INDEX IF NOT EXISTS partitions_by_pair
+    ON partitions (project, source_language, target_language, ingested_at);
+CREATE INDEX IF NOT EXISTS partitions_by_evaluator
+    ON partitions (project, evaluator);
+CREATE INDEX IF NOT EXISTS partitions_by_file
+    ON partitions (project, file_name);
+CREATE INDEX IF NOT EXISTS partitions_by_time
+    ON partitions (project, ingested_at);
+CREATE INDEX IF NOT EXISTS engines_by_engine
+    ON partition_engines (engine, partition_id);
+"""
+_VALUES_DTYPE = np.dtype("<f4")
+_LABELS_DTYPE = np.dtype("<i4")
+
+
+class ResultColumn(TypedDict):
+    id: str
+    name: str
+    group: str
+    metric_type: str
+
+
+class PartitionInfo(TypedDict):
+    partition_id: str
+    project: str
+    file_name: str
+    metadata: Dict[str, str]
+    columns: List[ResultColumn]
+    row_count: int
+    row_offset: int
+    # Distinct values of the stack column (e.g. MT engines) of a stacked
+    # template, indexed by the codes in labels.i32; empty otherwise.
+    labels: List[str]
+    ingested_at: float
+
+
+class PartitionSlice(TypedDict):
+    """One engine's rows of a partition, as matched in the catalog."""
+
+    info: PartitionInfo
+    engine: str
+    # Stack label code of the engine's rows; -1 for every row.
+    label_code: int
+
+
+def evaluator_of(info: PartitionInfo) -> str:
+    """
+    Who scored a partition: the template's Evaluator metadata if set, else
+    the author the workbook was last saved by, else the file name.
+    """
+    metadata = info["metadata"]
+    return (
+        metadata.get(EVALUATOR_KEY)
+        or metadata.get(LAST_MODIFIED_BY_KEY)
+        or os.path.splitext(info["file_name"])[0]
+    )
+
+
+def _column_file(column_id: str) -> str:
+    return f"{column_id}.f32"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", text)[:40]
+
+
+def _key_dir(text: str) -> str:
+    """A directory name for a key value: readable slug plus a short hash."""
+    digest = hashlib.blake2b(
+        text.encode("utf-8"), digest_size=4
+    ).hexdigest()
+    return f"{_slug(text)}-{digest}"
+
+
+class PartitionWriter:
+    """Appends the rows of one workbook to a staged partition."""
+
+    def __init__(
+        self,
+        store: "ResultsStore",
+        staging_dir: str,
+        info: PartitionInfo,
+        has_labels: bool,
+    ):
+        self._store = store
+        self._staging_dir = staging_dir
+        self._info = info
+        self._buffers = [
+            array("f") for _ in info["columns"]
+        ]
+        # Counted apart from the buffers: a partition may have no columns.
+        self._buffered_rows = 0
+        self._labels: Optional[array] = (
+            array("i") if has_labels else None
+        )
+        self._label_codes: Dict[str, int] = {}
+        self._files = [
+            open(
+                os.path.join(
+                    staging_dir, _column_file(col["id"])
+                ),
+                "wb",
+            )
+            for col in info["columns"]
+        ]
+        self._labels_file = (
+            open(
+                os.path.join(staging_dir, _LABELS_FILE),
+                "wb",
+            )
+            if has_labels
+            else None
+        )
+
+    def append(
+        self,
+        values: Sequence[float],
+        label: Optional[str] = None,
+    ):
+        """Adds one row: a value per column (NaN for blank) and, if stacked, its label."""
+        for buffer, value in zip(self._buffers, values):
+            buffer.append(value)
+        if self._labels is not None:
+            label = label or ""
+            code = self._label_codes.get(label)
+            if code is None:
+                code = len(self._label_codes)
+                self._label_codes[label] = code
+            self._labels.append(code)
+        self._info["row_count"] += 1
+        self._buffered_rows += 1
+        if self._buffered_rows >= APPEND_CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        for buffer, column_file in zip(
+            self._buffers, self._files
+        ):
+            buffer.tofile(column_file)
+            del buffer[:]
+        if self._labels is not None:
+            self._labels.tofile(self._labels_file)
+            del self._labels[:]
+        self._buffered_rows = 0
+
+    def _close_files(self):
+        for column_file in self._files:
+            column_file.close()
+        if self._labels_file is not None:
+            self._labels_file.close()
+
+    def commit(self) -> PartitionInfo:
+        """Publishes the partition; it becomes visible to readers only now."""
+        self._flush()
+        self._close_files()
+        self._info["labels"] = list(self._label_codes)
+        self._info["ingested_at"] = time.time()
+        with open(
+            os.path.join(
+                self._staging_dir, _PARTITION_INFO_FILE
+            ),
+            "w",
+            encoding="utf-8",
+        ) as info_file:
+            json.dump(self._info, info_file)
+        self._store._publish(
+            self._staging_dir,
+            self._info,
+            self._labels is not None,
+        )
+        return self._info
+
+    def abort(self):
+        self._close_files()
+        shutil.rmtree(self._staging_dir, ignore_errors=True)
+
+
+class ResultsStore:
+    """Partitions of ingested scores, grouped by project."""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._catalog_path = os.path.join(
+            root_dir, _CATALOG_FILE
+        )
+        # Directories of committed partitions never move, so lookups are cached.
+        self._partition_dirs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        with closing(self._connect()) as catalog:
+            catalog.execute("PRAGMA journal_mode=WAL")
+            catalog.executescript(_CATALOG_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: the store is shared by the
+        # server's threads and by ingestion worker processes.
+        return sqlite3.connect(
+            self._catalog_path, timeout=30
+        )
+
+    def _project_dir(self, project: str) -> str:
+        return os.path.join(
+            self.root_dir, _key_dir(project)
+        )
+
+    def _partition_dir(
+        self, project: str, partition_id: str
+    ) -> Optional[str]:
+        with self._lock:
+            path = self._partition_dirs.get(partition_id)
+        if path is not None:
+            return path
+        with closing(self._connect()) as catalog:
+            row = catalog.execute(
+                "SELECT path FROM partitions WHERE partition_id = ? AND project = ?",
+                (partition_id, project),
+            ).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(self.root_dir, row[0])
+        with self._lock:
+            self._partition_dirs[partition_id] = path
+        return path
+
+    def _committed_dir(
+        self, project: str, partition_id: str
+    ) -> str:
+        path = self._partition_dir(project, partition_id)
+        if path is None:
+            raise FileNotFoundError(
+                f"Partition {partition_id} of project '{project}' is not in the results store."
+            )
+        return path
+
+    def _publish(
+        self,
+        staging_dir: str,
+        info: PartitionInfo,
+        stacked: bool,
+    ):
+        """Moves a staged partition into place and records it in the catalog."""
+        metadata = info["metadata"]
+        source_language = metadata.get(
+            "Source Language", ""
+        )
+        target_language = metadata.get(
+            "Target Language", ""
+        )
+        engine = metadata.get("MT Engine", "")
+        path = os.path.join(
+            self._project_dir(info["project"]),
+            _key_dir(
+                f"{source_language}-{target_language}"
+            ),
+            _STACKED_DIR if stacked else _key_dir(engine),
+            info["partition_id"],
+        )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staging_dir, path)
+        engines = (
+            list(enumerate(info["labels"]))
+            if stacked
+            else [(-1, engine)]
+        )
+        try:
+            with closing(
+                self._connect()
+            ) as catalog, catalog:
+                catalog.execute(
+                    "INSERT INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        info["partition_id"],
+                        info["project"],
+                        source_language,
+                        target_language,
+                        evaluator_of(info),
+                        info["file_name"],
+                        info["row_count"],
+                        info["ingested_at"],
+                        os.path.relpath(
+                            path, self.root_dir
+                        ),
+                    ),
+                )
+                catalog.executemany(
+                    "INSERT INTO partition_engines VALUES (?, ?, ?)",
+                    [
+                        (info["partition_id"], label, code)
+                        for code, label in engines
+                    ],
+                )
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+
+    def returns_dir(self, project: str) -> str:
+        """Where the returned workbooks of a project are kept once uploaded."""
+        path = os.path.join(
+            self._project_dir(project), _RETURNS_DIR
+        )
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def manifest_path(self, project: str) -> str:
+        """The ingestion manifest of a project (see report_manifest)."""
+        return os.path.join(
+            self._project_dir(project), _MANIFEST_FILE
+        )
+
+    def open_partition(
+        self,
+        project: str,
+        file_name: str,
+        metadata: Dict[str, str],
+        columns: List[ResultColumn],
+        row_offset: int = 0,
+        has_labels: bool = False,
+    ) -> PartitionWriter:
+        """Starts a new partition; commit() or abort() the returned writer."""
+        project_dir = self._project_dir(project)
+        os.makedirs(project_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(
+            prefix=".staging-", dir=project_dir
+        )
+        info: PartitionInfo = {
+            "partition_id": uuid.uuid4().hex,
+            "project": project,
+            "file_name": file_name,
+            "metadata": metadata,
+            "columns": columns,
+            "row_count": 0,
+            "row_offset": row_offset,
+            "labels": [],
+            "ingested_at": 0.0,
+        }
+        return PartitionWriter(
+            self, staging_dir, info, has_labels
+        )
+
+    def list_partitions(
+        self, project: str
+    ) -> List[PartitionInfo]:
+        """Committed partitions of a project, oldest first."""
+        with closing(self._connect()) as catalog:
+            partition_ids = catalog.execute(
+                "SELECT partition_id FROM partitions WHERE project = ? ORDER BY ingested_at",
+                (project,),
+            ).fetchall()
+        partitions = []
+        for (partition_id,) in partition_ids:
+            info = self.get_partition(project, partition_id)
+            if info is not None:
+                partitions.append(info)
+        return partitions
+
+    def find_partitions(
+        self,
+        project: str,
+        source_language: Optional[str] = None,
+        target_language: Optional[str] = None,
+        engine: Optional[str] = None,
+        evaluator: Optional[str] = None,
+        file_name: Optional[str] = None,
+        latest: Optional[int] = None,
+    ) -> List[PartitionSlice]:
+        """
+        The engine slices of the project's partitions that match every given
+        key, newest first, through the catalog indexes; with `latest`, only
+        the slices of that many of the most recent matching partitions. Only
+        matching partitions are opened.
+        """
+        conditions = ["p.project = ?"]
+        parameters: List[object] = [project]
+        for column, value in (
+            ("p.source_language", source_language),
+            ("p.target_language", target_language),
+            ("e.engine", engine),
+            ("p.evaluator", evaluator),
+            ("p.file_name", file_name),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        matches = (
+            " FROM partitions p JOIN partition_engines e"
+            " ON e.partition_id = p.partition_id"
+            f" WHERE {' AND '.join(conditions)}"
+        )
+        query = (
+            "SELECT p.partition_id, e.engine, e.label_code"
+            + matches
+        )
+        if latest is not None:
+            # The limit counts partitions, not their engine rows.
+            query += (
+                " AND p.partition_id IN (SELECT p.partition_id"
+                + matches
+                + " GROUP BY p.partition_id"
+                " ORDER BY MAX(p.ingested_at) DESC LIMIT ?)"
+            )
+            parameters = parameters + parameters + [latest]
+        query += (
+            " ORDER BY p.ingested_at DESC, e.label_code"
+        )
+        with closing(self._connect()) as catalog:
+            rows = catalog.execute(
+                query, parameters
+            ).fetchall()
+        slices: List[PartitionSlice] = []
+        infos: Dict[str, Optional[PartitionInfo]] = {}
+        for partition_id, label, label_code in rows:
+            if partition_id not in infos:
+                infos[partition_id] = self.get_partition(
+                    project, partition_id
+                )
+            info = infos[partition_id]
+            if info is not None:
+                slices.append(
+                    {
+                        "info": info,
+                        "engine": label,
+                        "label_code": label_code,
+                    }
+                )
+        return slices
+
+    def catalog_keys(
+        self, project: str
+    ) -> Dict[str, List[str]]:
+        """Distinct language pairs, engines and evaluators of a project's partitions."""
+        with closing(self._connect()) as catalog:
+            pairs = catalog.execute(
+                "SELECT DISTINCT source_language, target_language FROM partitions WHERE project = ? ORDER BY 1, 2",
+                (project,),
+            ).fetchall()
+            engines = catalog.execute(
+                "SELECT DISTINCT e.engine FROM partitions p JOIN partition_engines e ON e.partition_id = p.partition_id WHERE p.project = ? ORDER BY 1",
+                (project,),
+            ).fetchall()
+            evaluators = catalog.execute(
+                "SELECT DISTINCT evaluator FROM partitions WHERE project = ? ORDER BY 1",
+                (project,),
+            ).fetchall()
+        return {
+            "language_pairs": [
+                f"{source} → {target}"
+                for source, target in pairs
+            ],
+            "engines": [engine for (engine,) in engines],
+            "evaluators": [
+                evaluator for (evaluator,) in evaluators
+            ],
+        }
+
+    def get_partition(
+        self, project: str, partition_id: str
+    ) -> Optional[PartitionInfo]:
+        path = self._partition_dir(project, partition_id)
+        if path is None:
+            return None
+        try:
+            with open(
+                os.path.join(path, _PARTITION_INFO_FILE),
+                encoding="utf-8",
+            ) as info_file:
+                return json.load(info_file)
+        except (OSError, ValueError):
+            return None
+
+    def _read_array(
+        self, path: str, dtype: np.dtype
+    ) -> np.ndarray:
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def read_column(
+        self,
+        project: str,
+        partition_id: str,
+        column_id: str,
+    ) -> np.ndarray:
+        """Memory-mapped float32 values of one column (NaN for blank)."""
+        return self._read_array(
+            os.path.join(
+                self._committed_dir(project, partition_id),
+                _column_file(column_id),
+            ),
+            _VALUES_DTYPE,
+        )
+
+    def read_labels(
+        self, project: str, partition_id: str
+    ) -> Optional[np.ndarray]:
+        """Per-row codes into the partition's `labels`, or None if not stacked."""
+        path = os.path.join(
+            self._committed_dir(project, partition_id),
+            _LABELS_FILE,
+        )
+        if not os.path.exists(path):
+            return None
+        return self._read_array(path, _LABELS_DTYPE)
+
+    def delete_partition(
+        self, project: str, partition_id: str
+    ):
+        """Removes a partition from the catalog first, then from disk."""
+        path = self._partition_dir(project, partition_id)
+        if path is None:
+            return
+        with closing(self._connect()) as catalog, catalog:
+            catalog.execute(
+                "DELETE FROM partition_engines WHERE partition_id = ?",
+                (partition_id,),
+            )
+            catalog.execute(
+                "DELETE FROM partitions WHERE partition_id = ?",
+                (partition_id,),
+            )
+        with self._lock:
+            self._partition_dirs.pop(partition_id, None)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+_results_store: Optional[ResultsStore] = None
+
+
+def get_results_store() -> ResultsStore:
+    """Returns the process-wide results store."""
+    global _results_store
+    if _results_store is None:
+        _results_store = ResultsStore(
+            os.environ.get(RESULTS_STORE_DIR_ENV)
+            or os.path.join(
+                tempfile.gettempdir(), "ltx_results"
+            )
+        )
+    return _results_store
\ No newline at end of file
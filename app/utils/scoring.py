@@ -0,0 +1,376 @@
+"""
+Server-side Overall Score and pass/fail for ingested results.
+
+Mirrors the Overall Score formula of the template (overall_score_formula):
+the scoring columns with a positive weight in project_metric_weights are
+loaded as a segments x metrics matrix, blanks count as 0, and the weighted
+average is one matrix-vector product divided by the total weight. A
+segment with no score at all stays blank, as the formula's COUNT(...)=0
+guard leaves the cell empty. Scores on the score scale and integer weights
+keep every partial sum exact in floating point, so the product gives
+bit-for-bit the same value as Excel's left-to-right evaluation; only the
+final division rounds, in both. Pass/fail follows the template's
+conditional formatting: a scored segment passes when its Overall Score is
+at least project_pass_threshold. An Overall Score formula edited on the
+formula review step replaces the generated one in the workbook, so it is
+evaluated with the formula engine over the scoring columns instead.
+"""
+
+import logging
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import numpy as np
+from .formula_engine import (
+    CompiledFormula,
+    compile_formula,
+    evaluate_formula,
+    formula_numbers,
+)
+from .report_manifest import IngestManifest
+from .results_store import (
+    PartitionInfo,
+    ResultsStore,
+    get_results_store,
+)
+from .template_writer import (
+    overall_score_formula,
+    resolve_column_formulas,
+    weighted_scoring_columns,
+)
+
+if TYPE_CHECKING:
+    from app.states.file_prep_state import ExcelColumn
+
+logger = logging.getLogger(__name__)
+PASS = 1
+FAIL = 0
+UNSCORED = -1
+
+
+class PartitionScores(TypedDict):
+    partition_id: str
+    scored_segments: int
+    passed_segments: int
+    overall_sum: float
+
+
+class MetricQueryResult(TypedDict):
+    metric: str
+    mean: str
+    count: int
+    partitions: int
+
+
+class ProjectScores(TypedDict):
+    scored_segments: int
+    passed_segments: int
+    mean_overall: str
+    pass_rate: str
+    by_partition: Dict[str, PartitionScores]
+
+
+def scoring_weights(
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, Optional[int]],
+) -> Tuple[List[str], np.ndarray]:
+    """Column ids and weight vector of the Overall Score, in sheet order."""
+    weighted = weighted_scoring_columns(
+        columns, metric_weights
+    )
+    return (
+        [str(col["id"]) for col, _ in weighted],
+        np.array(
+            [weight for _, weight in weighted],
+            dtype=np.float64,
+        ),
+    )
+
+
+def overall_scores(
+    scores: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """
+    Overall Score of every row of a segments x metrics score matrix (NaN
+    for blank); NaN where the segment has no score at all.
+    """
+    if scores.shape[1] == 0 or weights.sum() == 0:
+        return np.full(scores.shape[0], np.nan)
+    present = ~np.isnan(scores)
+    overall = np.where(present, scores, 0.0) @ weights
+    overall /= weights.sum()
+    overall[~present.any(axis=1)] = np.nan
+    return overall
+
+
+def custom_overall_formula(
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, Optional[int]],
+) -> Optional[CompiledFormula]:
+    """
+    The Overall Score formula edited on the formula review step, compiled
+    against the column layout; None while the generated formula applies.
+    """
+    overall = next(
+        (
+            col
+            for col in columns
+            if col.get("metric_type") == "overall"
+        ),
+        None,
+    )
+    if overall is None:
+        return None
+    formula = resolve_column_formulas(
+        columns, metric_weights
+    ).get(str(overall["id"]), "")
+    if not formula or formula == overall_score_formula(
+        columns, metric_weights
+    ):
+        return None
+    return compile_formula(formula, columns)
+
+
+class OverallScorer:
+    """
+    Overall Score of segments x scoring-column matrices, as the workbook
+    computes it: the weighted average of the generated formula, or the
+    edited formula. The edited formula only sees the scoring columns; other
+    cells it refers to are blank, as only scores are ingested.
+    """
+
+    def __init__(
+        self,
+        columns: List["ExcelColumn"],
+        metric_weights: Dict[str, Optional[int]],
+    ):
+        self.weighted_ids, self.weights = scoring_weights(
+            columns, metric_weights
+        )
+        self.formula = custom_overall_formula(
+            columns, metric_weights
+        )
+        if self.formula is not None and self.formula.error:
+            logger.warning(
+                f"Overall Score formula does not compile, segments stay unscored: {self.formula.error}"
+            )
+        self.column_ids = (
+            self.weighted_ids
+            if self.formula is None
+            else [
+                str(col["id"])
+                for col in columns
+                if col.get("group") == "Scoring"
+            ]
+        )
+
+    def __call__(
+        self, scores: np.ndarray, column_ids: List[str]
+    ) -> np.ndarray:
+        """Overall Score of every row of `scores`, whose columns are `column_ids`."""
+        if self.formula is None:
+            positions = [
+                column_ids.index(column_id)
+                for column_id in self.weighted_ids
+            ]
+            return overall_scores(
+                scores[:, positions], self.weights
+            )
+        if self.formula.error:
+            return np.full(scores.shape[0], np.nan)
+        return formula_numbers(
+            np.asarray(
+                evaluate_formula(
+                    self.formula,
+                    {
+                        column_id: scores[:, index]
+                        for index, column_id in enumerate(
+                            column_ids
+                        )
+                    },
+                    scores.shape[0],
+                )
+            )
+        )
+
+
+def pass_status(
+    overall: np.ndarray, pass_threshold: Optional[float]
+) -> np.ndarray:
+    """PASS, FAIL or UNSCORED for every segment; UNSCORED for all without a threshold."""
+    status = np.full(overall.shape, UNSCORED, dtype=np.int8)
+    if pass_threshold is None:
+        return status
+    scored = ~np.isnan(overall)
+    status[scored] = np.where(
+        overall[scored] >= pass_threshold, PASS, FAIL
+    )
+    return status
+
+
+def load_score_matrix(
+    info: PartitionInfo,
+    column_ids: List[str],
+    store: Optional[ResultsStore] = None,
+) -> np.ndarray:
+    """The partition's scores of `column_ids` as a float64 matrix; missing columns are blank."""
+    store = store or get_results_store()
+    present = {col["id"] for col in info["columns"]}
+    scores = np.full(
+        (info["row_count"], len(column_ids)), np.nan
+    )
+    for index, column_id in enumerate(column_ids):
+        if column_id in present:
+            scores[:, index] = store.read_column(
+                info["project"],
+                info["partition_id"],
+                column_id,
+            )
+    return scores
+
+
+def score_partition(
+    info: PartitionInfo,
+    scorer: OverallScorer,
+    pass_threshold: Optional[float],
+    store: Optional[ResultsStore] = None,
+) -> PartitionScores:
+    overall = scorer(
+        load_score_matrix(info, scorer.column_ids, store),
+        scorer.column_ids,
+    )
+    scored = ~np.isnan(overall)
+    return {
+        "partition_id": info["partition_id"],
+        "scored_segments": int(scored.sum()),
+        "passed_segments": int(
+            (
+                pass_status(overall, pass_threshold) == PASS
+            ).sum()
+        ),
+        "overall_sum": float(overall[scored].sum()),
+    }
+
+
+def score_project(
+    project: str,
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, Optional[int]],
+    pass_threshold: Optional[float],
+    store: Optional[ResultsStore] = None,
+) -> ProjectScores:
+    """
+    Overall Score and pass/fail of every ingested segment of the project,
+    with the current weights and threshold; one partition in memory at a time.
+    """
+    store = store or get_results_store()
+    scorer = OverallScorer(columns, metric_weights)
+    by_partition: Dict[str, PartitionScores] = {}
+    for entry in IngestManifest.load(
+        store, project
+    ).entries.values():
+        info = store.get_partition(
+            project, entry["partition_id"]
+        )
+        if info is not None:
+            by_partition[info["partition_id"]] = (
+                score_partition(
+                    info,
+                    scorer,
+                    pass_threshold,
+                    store,
+                )
+            )
+    scored = sum(
+        scores["scored_segments"]
+        for scores in by_partition.values()
+    )
+    passed = sum(
+        scores["passed_segments"]
+        for scores in by_partition.values()
+    )
+    overall_sum = sum(
+        scores["overall_sum"]
+        for scores in by_partition.values()
+    )
+    return {
+        "scored_segments": scored,
+        "passed_segments": passed,
+        "mean_overall": (
+            f"{overall_sum / scored:.2f}" if scored else ""
+        ),
+        "pass_rate": (
+            f"{passed / scored:.1%}"
+            if scored and pass_threshold is not None
+            else ""
+        ),
+        "by_partition": by_partition,
+    }
+
+
+def query_metric_mean(
+    project: str,
+    metric: str,
+    source_language: Optional[str] = None,
+    target_language: Optional[str] = None,
+    engine: Optional[str] = None,
+    evaluator: Optional[str] = None,
+    latest: Optional[int] = None,
+    store: Optional[ResultsStore] = None,
+) -> MetricQueryResult:
+    """
+    Mean of one score column (by name) over the partitions matching the
+    given keys, e.g. the last 3 EN -> JA DeepL runs. The catalog selects the
+    partitions, so only those are read; for a stacked partition only the
+    matched engine's rows count.
+    """
+    store = store or get_results_store()
+    total = 0.0
+    count = 0
+    partitions = 0
+    for partition in store.find_partitions(
+        project,
+        source_language=source_language,
+        target_language=target_language,
+        engine=engine,
+        evaluator=evaluator,
+        latest=latest,
+    ):
+        info = partition["info"]
+        column = next(
+            (
+                col
+                for col in info["columns"]
+                if col["name"] == metric
+            ),
+            None,
+        )
+        if column is None:
+            continue
+        values = store.read_column(
+            project, info["partition_id"], column["id"]
+        )
+        if partition["label_code"] >= 0:
+            values = values[
+                store.read_labels(
+                    project, info["partition_id"]
+                )
+                == partition["label_code"]
+            ]
+        present = ~np.isnan(values)
+        total += float(
+            values[present].sum(dtype=np.float64)
+        )
+        count += int(present.sum())
+        partitions += 1
+    return {
+        "metric": metric,
+        "mean": f"{total / count:.2f}" if count else "",
+        "count": count,
+        "partitions": partitions,
+    }
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+Server-side spool for parsed upload segments.
+
+Parsed rows are written to disk, one spool per upload id, so rx.State only
+ever carries an UploadSummary handle instead of the segment data itself.
+Upload ids are derived from the upload's content hash, which makes the store
+a cache shared by all sessions; it is kept under a disk cap by evicting the
+least recently used spools.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from array import array
+from typing import (
+    BinaryIO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypedDict,
+)
+
+logger = logging.getLogger(__name__)
+SEGMENT_STORE_DIR_ENV = "LTX_SEGMENT_STORE_DIR"
+SEGMENT_STORE_MAX_BYTES_ENV = "LTX_SEGMENT_STORE_MAX_BYTES"
+DEFAULT_SEGMENT_STORE_MAX_BYTES = 10 * 1024**3
+INDEX_STRIDE = 256
+_ROWS_FILE = "rows.jsonl"
+_INDEX_FILE = "rows.idx"
+_META_FILE = "meta.json"
+_INCOMING_DIR = ".incoming"
+
+
+class UploadSummary(TypedDict):
+    upload_id: str
+    file_name: str
+    row_count: int
+    byte_size: int
+    encoding: str
+    file_names_upload_id: Optional[str]
+
+
+def segment_text(row: List[str]) -> str:
+    """Cell text of a spooled row; multi-cell rows are re-joined with tabs."""
+    return row[0] if len(row) == 1 else "\t".join(row)
+
+
+class SegmentStore:
+    """
+    Stores parsed rows as JSON lines with a sparse offset index
+    (one entry every INDEX_STRIDE rows) for random access.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        max_bytes: int = DEFAULT_SEGMENT_STORE_MAX_BYTES,
+    ):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _upload_dir(self, upload_id: str) -> str:
+        return os.path.join(self.root_dir, upload_id)
+
+    def write_rows(
+        self,
+        rows: Iterable[List[str]],
+        file_name: str,
+        byte_size: int,
+        encoding: str,
+        upload_id: Optional[str] = None,
+        file_names_upload_id: Optional[str] = None,
+    ) -> UploadSummary:
+        """Spools rows to disk and returns the summary handle kept in state."""
+        upload_id = upload_id or uuid.uuid4().hex
+        staging_dir = tempfile.mkdtemp(
+            prefix=f".{upload_id}-", dir=self.root_dir
+        )
+        offsets = array("Q")
+        row_count = 0
+        try:
+            with open(
+                os.path.join(staging_dir, _ROWS_FILE), "wb"
+            ) as rows_file:
+                for row in rows:
+                    if row_count % INDEX_STRIDE == 0:
+                        offsets.append(rows_file.tell())
+                    rows_file.write(
+                        json.dumps(
+                            row, ensure_ascii=False
+                        ).encode("utf-8")
+                        + b"\n"
+                    )
+                    row_count += 1
+            with open(
+                os.path.join(staging_dir, _INDEX_FILE), "wb"
+            ) as index_file:
+                offsets.tofile(index_file)
+            summary: UploadSummary = {
+                "upload_id": upload_id,
+                "file_name": file_name,
+                "row_count": row_count,
+                "byte_size": byte_size,
+                "encoding": encoding,
+                "file_names_upload_id": file_names_upload_id,
+            }
+            with open(
+                os.path.join(staging_dir, _META_FILE),
+                "w",
+                encoding="utf-8",
+            ) as meta_file:
+                json.dump(summary, meta_file)
+            try:
+                os.replace(
+                    staging_dir, self._upload_dir(upload_id)
+                )
+            except OSError:
+                # Another session spooled the same content first.
+                if self.get_summary(upload_id) is None:
+                    raise
+                shutil.rmtree(
+                    staging_dir, ignore_errors=True
+                )
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        logger.info(
+            f"Spooled {row_count} rows for upload '{file_name}' ({upload_id})."
+        )
+        self.evict(keep=upload_id)
+        return summary
+
+    def get_summary(
+        self, upload_id: str
+    ) -> Optional[UploadSummary]:
+        """Returns the stored summary for an upload, or None if it is gone."""
+        try:
+            with open(
+                os.path.join(
+                    self._upload_dir(upload_id), _META_FILE
+                ),
+                encoding="utf-8",
+            ) as meta_file:
+                return json.load(meta_file)
+        except FileNotFoundError:
+            return None
+
+    def _load_index(self, upload_id: str) -> array:
+        offsets = array("Q")
+        path = os.path.join(
+            self._upload_dir(upload_id), _INDEX_FILE
+        )
+        with open(path, "rb") as index_file:
+            offsets.frombytes(index_file.read())
+        return offsets
+
+    def iter_rows(
+        self, upload_id: str, start: int = 0
+    ) -> Iterator[List[str]]:
+        """Streams rows back from the spool, starting at row index `start`."""
+        offsets = self._load_index(upload_id)
+        block = start // INDEX_STRIDE
+        if block >= len(offsets):
+            return
+        with open(
+            os.path.join(
+                self._upload_dir(upload_id), _ROWS_FILE
+            ),
+            "rb",
+        ) as rows_file:
+            rows_file.seek(offsets[block])
+            for row_index, line in enumerate(
+                rows_file, start=block * INDEX_STRIDE
+            ):
+                if row_index >= start:
+                    yield json.loads(line)
+
+    def read_rows(
+        self, upload_id: str, start: int, count: int
+    ) -> List[List[str]]:
+        """Reads a window of `count` rows starting at `start`."""
+        rows: List[List[str]] = []
+        if count <= 0:
+            return rows
+        for row in self.iter_rows(upload_id, start):
+            rows.append(row)
+            if len(rows) >= count:
+                break
+        return rows
+
+    def lookup(
+        self, upload_id: str
+    ) -> Optional[UploadSummary]:
+        """Like get_summary, but marks the spool as recently used on a hit."""
+        summary = self.get_summary(upload_id)
+        if summary is not None:
+            try:
+                os.utime(
+                    os.path.join(
+                        self._upload_dir(upload_id),
+                        _META_FILE,
+                    )
+                )
+            except FileNotFoundError:
+                return None
+        return summary
+
+    def _spool_disk_usage(self, upload_id: str) -> int:
+        upload_dir = self._upload_dir(upload_id)
+        try:
+            return sum(
+                entry.stat().st_size
+                for entry in os.scandir(upload_dir)
+            )
+        except FileNotFoundError:
+            return 0
+
+    def evict(self, keep: Optional[str] = None):
+        """Deletes least recently used spools until the store fits in max_bytes."""
+        spools = []
+        for entry in os.scandir(self.root_dir):
+            if not entry.is_dir() or entry.name.startswith(
+                "."
+            ):
+                continue
+            try:
+                last_used = os.stat(
+                    os.path.join(entry.path, _META_FILE)
+                ).st_mtime
+            except FileNotFoundError:
+                continue
+            spools.append(
+                (
+                    last_used,
+                    entry.name,
+                    self._spool_disk_usage(entry.name),
+                )
+            )
+        total_bytes = sum(size for _, _, size in spools)
+        for _, upload_id, size in sorted(spools):
+            if total_bytes <= self.max_bytes:
+                break
+            if upload_id == keep:
+                continue
+            self.delete(upload_id)
+            total_bytes -= size
+            logger.info(
+                f"Evicted upload spool {upload_id} ({size} bytes)."
+            )
+
+    def spool_incoming(
+        self,
+        stream: BinaryIO,
+        chunk_size: int = 1024 * 1024,
+    ) -> str:
+        """Copies a raw upload stream to a file under the store, chunk by chunk."""
+        incoming_dir = os.path.join(
+            self.root_dir, _INCOMING_DIR
+        )
+        os.makedirs(incoming_dir, exist_ok=True)
+        path = os.path.join(incoming_dir, uuid.uuid4().hex)
+        with open(path, "wb") as incoming_file:
+            shutil.copyfileobj(
+                stream, incoming_file, chunk_size
+            )
+        return path
+
+    def delete(self, upload_id: str):
+        """Removes an upload's spool, if present."""
+        shutil.rmtree(
+            self._upload_dir(upload_id), ignore_errors=True
+        )
+
+
+_segment_store: Optional[SegmentStore] = None
+
+
+def get_segment_store() -> SegmentStore:
+    """Returns the process-wide segment store."""
+    global _segment_store
+    if _segment_store is None:
+        _segment_store = SegmentStore(
+            os.environ.get(SEGMENT_STORE_DIR_ENV)
+            or os.path.join(
+                tempfile.gettempdir(), "ltx_segment_store"
+            ),
+            max_bytes=int(
+                os.environ.get(SEGMENT_STORE_MAX_BYTES_ENV)
+                or DEFAULT_SEGMENT_STORE_MAX_BYTES
+            ),
+        )
+    return _segment_store
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+On-disk cache of generated evaluation templates.
+
+A workbook is identified by a fingerprint of everything that affects its
+content: the column layout and formulas, metric weights, pass threshold,
+Read Me, metadata, word count mode and the uploads feeding the input columns
+(upload ids are derived from the upload content hashes). Regenerating with an
+unchanged configuration is served from the cache instead of rewriting the
+workbook. The cache is bounded by total size and entry age.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import List, Optional
+from .segment_store import SegmentStore
+from .template_writer import StackedInput, TemplateSpec
+
+logger = logging.getLogger(__name__)
+TEMPLATE_CACHE_DIR_ENV = "LTX_TEMPLATE_CACHE_DIR"
+TEMPLATE_CACHE_MAX_BYTES_ENV = (
+    "LTX_TEMPLATE_CACHE_MAX_BYTES"
+)
+TEMPLATE_CACHE_MAX_AGE_ENV = (
+    "LTX_TEMPLATE_CACHE_MAX_AGE_SECONDS"
+)
+DEFAULT_TEMPLATE_CACHE_MAX_BYTES = 2 * 1024**3
+DEFAULT_TEMPLATE_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+# Bump when the writer's output changes, so stale workbooks are not served.
+TEMPLATE_FORMAT_VERSION = 3
+_FINGERPRINT_COLUMN_KEYS = (
+    "id",
+    "name",
+    "group",
+    "formula_excel_style",
+    "metric_type",
+    "requires_upload",
+    "is_word_count_column",
+)
+
+
+def fingerprint_payload(payload: dict) -> str:
+    """Stable hash of a JSON-serializable payload."""
+    encoded = json.dumps(
+        payload, sort_keys=True, ensure_ascii=False
+    ).encode("utf-8")
+    return hashlib.blake2b(
+        encoded, digest_size=20
+    ).hexdigest()
+
+
+def column_fingerprint(columns: List[dict]) -> List[dict]:
+    """The parts of the column definitions that show up in a workbook."""
+    return [
+        {
+            key: col.get(key)
+            for key in _FINGERPRINT_COLUMN_KEYS
+        }
+        for col in columns
+    ]
+
+
+def template_fingerprint(
+    spec: TemplateSpec,
+    stacked_inputs: Optional[List[StackedInput]] = None,
+    stack_column_name: str = "MT Engine",
+) -> str:
+    """Hash of every input that changes the generated workbook."""
+    payload = {
+        "version": TEMPLATE_FORMAT_VERSION,
+        "columns": column_fingerprint(spec["columns"]),
+        "input_uploads": spec["input_uploads"],
+        "metric_weights": spec["metric_weights"],
+        "pass_threshold": spec["pass_threshold"],
+        "readme_html": spec["readme_html"],
+        "metadata": spec["metadata"],
+        "word_count_mode": spec.get(
+            "word_count_mode", "formula"
+        ),
+        "stacked_inputs": stacked_inputs,
+        "stack_column_name": (
+            stack_column_name if stacked_inputs else None
+        ),
+    }
+    return fingerprint_payload(payload)
+
+
+class TemplateCache:
+    """
+    Stores one workbook per fingerprint. Entries older than max_age_seconds
+    (by last use) are dropped, then the least recently used ones until the
+    cache fits in max_bytes. Also used for the per-section parts of
+    template_sections, with a different `extension`.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        max_bytes: int = DEFAULT_TEMPLATE_CACHE_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_TEMPLATE_CACHE_MAX_AGE_SECONDS,
+        extension: str = ".xlsx",
+    ):
+        self.root_dir = root_dir
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _entry_path(self, fingerprint: str) -> str:
+        return os.path.join(
+            self.root_dir, f"{fingerprint}{self.extension}"
+        )
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        """Returns the cached workbook path and marks it as used, or None."""
+        path = self._entry_path(fingerprint)
+        try:
+            if (
+                time.time() - os.stat(path).st_mtime
+                > self.max_age_seconds
+            ):
+                os.remove(path)
+                return None
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(
+        self, fingerprint: str, workbook_path: str
+    ) -> str:
+        """Moves a freshly written workbook into the cache and returns its new path."""
+        path = self._entry_path(fingerprint)
+        os.replace(workbook_path, path)
+        self.evict(keep=fingerprint)
+        return path
+
+    def evict(self, keep: Optional[str] = None):
+        """Drops expired entries, then the least recently used ones above max_bytes."""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.root_dir):
+            if entry.name.startswith(
+                "."
+            ) or not entry.name.endswith(self.extension):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append(
+                (stat.st_mtime, entry.name, stat.st_size)
+            )
+        total_bytes = sum(size for _, _, size in entries)
+        for last_used, name, size in sorted(entries):
+            if name == f"{keep}{self.extension}":
+                continue
+            if (
+                now - last_used <= self.max_age_seconds
+                and total_bytes <= self.max_bytes
+            ):
+                break
+            try:
+                os.remove(os.path.join(self.root_dir, name))
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            logger.info(
+                f"Evicted cached template {name} ({size} bytes)."
+            )
+
+    def staging_path(self) -> str:
+        """A fresh path inside the cache directory for an entry being written."""
+        handle, path = tempfile.mkstemp(
+            prefix=".staging-",
+            suffix=self.extension,
+            dir=self.root_dir,
+        )
+        os.close(handle)
+        return path
+
+    def generate(
+        self,
+        spec: TemplateSpec,
+        store: Optional[SegmentStore] = None,
+        stacked_inputs: Optional[List[StackedInput]] = None,
+        stack_column_name: str = "MT Engine",
+    ) -> str:
+        """
+        Returns the path of the workbook for this configuration, writing it
+        only if no cached copy exists. A new workbook is assembled from the
+        section cache, so only the sections that changed are rewritten.
+        """
+        from .template_sections import (
+            build_template_from_sections,
+        )
+
+        fingerprint = template_fingerprint(
+            spec, stacked_inputs, stack_column_name
+        )
+        cached = self.get(fingerprint)
+        if cached is not None:
+            logger.info(
+                f"Serving template {fingerprint} from the cache."
+            )
+            return cached
+        staging = self.staging_path()
+        try:
+            build_template_from_sections(
+                staging,
+                spec,
+                store=store,
+                stacked_inputs=stacked_inputs,
+                stack_column_name=stack_column_name,
+            )
+            return self.put(fingerprint, staging)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+
+_template_cache: Optional[TemplateCache] = None
+
+
+def get_template_cache() -> TemplateCache:
+    """Returns the process-wide template cache."""
+    global _template_cache
+    if _template_cache is None:
+        _template_cache = TemplateCache(
+            os.environ.get(TEMPLATE_CACHE_DIR_ENV)
+            or os.path.join(
+                tempfile.gettempdir(), "ltx_template_cache"
+            ),
+            max_bytes=int(
+                os.environ.get(TEMPLATE_CACHE_MAX_BYTES_ENV)
+                or DEFAULT_TEMPLATE_CACHE_MAX_BYTES
+            ),
+            max_age_seconds=float(
+                os.environ.get(TEMPLATE_CACHE_MAX_AGE_ENV)
+                or DEFAULT_TEMPLATE_CACHE_MAX_AGE_SECONDS
+            ),
+        )
+    return _template_cache
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Job bodies for the heavy file-prep steps, ready to hand to
+JobRegistry.submit: they run the existing pipeline functions and translate
+their progress into JobContext reports.
+"""
+
+import json
+from typing import List, Optional
+from .batch_generation import (
+    TemplateJob,
+    generate_template_batch,
+)
+from .jobs import JobContext, JobWork
+from .segment_store import SegmentStore, get_segment_store
+from .template_writer import (
+    StackedInput,
+    TemplateSpec,
+    write_evaluation_template,
+)
+from .upload_ingest import join_upload_parses
+
+
+def _expected_rows(
+    spec: TemplateSpec,
+    store: SegmentStore,
+    stacked_inputs: Optional[List[StackedInput]],
+) -> int:
+    """Data rows the template will have, from the spooled upload summaries."""
+    input_sets = (
+        [
+            stacked["input_uploads"]
+            for stacked in stacked_inputs
+        ]
+        if stacked_inputs is not None
+        else [spec["input_uploads"]]
+    )
+    total = 0
+    for input_uploads in input_sets:
+        row_counts = [
+            summary["row_count"]
+            for summary in (
+                store.get_summary(upload_id)
+                for upload_id in input_uploads.values()
+            )
+            if summary is not None
+        ]
+        total += max(row_counts, default=0)
+    return total
+
+
+def template_build_work(
+    spec: TemplateSpec,
+    output_path: str,
+    store: Optional[SegmentStore] = None,
+    stacked_inputs: Optional[List[StackedInput]] = None,
+) -> JobWork:
+    """Writes one template on the job thread pool; the result is the output path."""
+    store = store or get_segment_store()
+
+    def work(context: JobContext) -> str:
+        total_rows = _expected_rows(
+            spec, store, stacked_inputs
+        )
+        write_evaluation_template(
+            output_path,
+            spec,
+            store=store,
+            stacked_inputs=stacked_inputs,
+            on_progress=lambda rows: context.report(
+                rows,
+                total_rows,
+                f"{rows:,} of {total_rows:,} rows written",
+            ),
+        )
+        return output_path
+
+    return work
+
+
+def template_batch_work(
+    jobs: List[TemplateJob],
+    output_zip_path: str,
+    store: Optional[SegmentStore] = None,
+) -> JobWork:
+    """Generates a batch of templates into a zip; the result is the zip path."""
+
+    async def work(context: JobContext) -> str:
+        async for progress in generate_template_batch(
+            jobs, output_zip_path, store
+        ):
+            context.report(
+                progress["completed_jobs"],
+                progress["total_jobs"],
+                f"{progress['file_name']}: {progress['status']}",
+            )
+        return output_zip_path
+
+    return work
+
+
+def upload_parse_work(job_keys: List[str]) -> JobWork:
+    """
+    Waits for submitted upload parses; the result is the JSON-encoded
+    summaries by job key.
+    """
+
+    async def work(context: JobContext) -> str:
+        summaries = {}
+        for done, job_key in enumerate(job_keys, start=1):
+            summaries.update(
+                await join_upload_parses([job_key])
+            )
+            context.report(
+                done,
+                len(job_keys),
+                f"{done} of {len(job_keys)} uploads parsed",
+            )
+        return json.dumps(summaries)
+
+    return work
\ No newline at end of file
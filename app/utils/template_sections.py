@@ -0,0 +1,447 @@
+"""
+Incremental template builds from independently cached sections.
+
+An .xlsx file is a zip of XML parts, and in constant_memory mode every sheet
+part is self-contained (strings are written inline). Each section of the
+template (the data, Read Me, metadata and score lists sheets) is therefore
+written on its own, and its sheet part is cached, still deflated, under a
+key covering only the inputs of that section. A build writes the sections
+whose inputs changed plus a small skeleton workbook (content types,
+workbook with its defined names, styles and document properties) and
+copies the cached parts into
+the result byte for byte. Editing the Read Me of a 200k-row template only
+rewrites the Read Me sheet.
+"""
+
+import json
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from .segment_store import SegmentStore, get_segment_store
+from .template_cache import (
+    TEMPLATE_FORMAT_VERSION,
+    TemplateCache,
+    column_fingerprint,
+    fingerprint_payload,
+)
+from .template_writer import (
+    StackedInput,
+    TemplateSpec,
+    _iter_template_input_rows,
+    _open_template_workbook,
+    _resolve_template_inputs,
+    _write_data_sheet,
+    _write_lists_sheet,
+    _write_metadata_sheet,
+    _write_readme_sheet,
+)
+
+logger = logging.getLogger(__name__)
+SECTION_CACHE_DIR_ENV = "LTX_TEMPLATE_SECTION_CACHE_DIR"
+SECTION_CACHE_MAX_BYTES_ENV = (
+    "LTX_TEMPLATE_SECTION_CACHE_MAX_BYTES"
+)
+DEFAULT_SECTION_CACHE_MAX_BYTES = 2 * 1024**3
+# Sheet part of each section, in the order _open_template_workbook adds them.
+SECTION_PARTS = {
+    "data": "xl/worksheets/sheet1.xml",
+    "readme": "xl/worksheets/sheet2.xml",
+    "metadata": "xl/worksheets/sheet3.xml",
+    "lists": "xl/worksheets/sheet4.xml",
+}
+_SECTION_INFO_MEMBER = "section.json"
+_COPY_CHUNK_SIZE = 1024 * 1024
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = 0x04034B50
+_CENTRAL_HEADER_SIGNATURE = 0x02014B50
+_END_OF_CENTRAL_DIRECTORY_SIGNATURE = 0x06054B50
+_ZIP_VERSION = 20
+_DATA_DESCRIPTOR_FLAG = 0x08
+_UTF8_NAME_FLAG = 0x800
+
+
+class _RawZipWriter:
+    """
+    Writes a zip archive whose members are copied from other zip files still
+    compressed. zipfile has no public API for raw copies, so the local
+    headers and the central directory are written here; a member is read
+    from its source file at the offset and sizes its ZipInfo records.
+    Archives stay within plain zip limits (no zip64).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._central_directory: List[bytes] = []
+
+    def __enter__(self) -> "_RawZipWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._file.name)
+
+    def _add(
+        self,
+        info: zipfile.ZipInfo,
+        chunks: Iterator[bytes],
+    ):
+        if (
+            len(self._central_directory) >= 0xFFFF
+            or info.compress_size > 0xFFFFFFFF
+            or info.file_size > 0xFFFFFFFF
+        ):
+            raise zipfile.LargeZipFile(
+                f"Member {info.filename} needs zip64."
+            )
+        flags = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+        name = info.filename.encode(
+            "utf-8" if flags & _UTF8_NAME_FLAG else "cp437"
+        )
+        year, month, day, hour, minute, second = (
+            info.date_time
+        )
+        fields = struct.pack(
+            "<HHHHIIIH",
+            flags,
+            info.compress_type,
+            hour << 11 | minute << 5 | second // 2,
+            (year - 1980) << 9 | month << 5 | day,
+            info.CRC,
+            info.compress_size,
+            info.file_size,
+            len(name),
+        )
+        offset = self._file.tell()
+        self._file.write(
+            struct.pack(
+                "<IH", _LOCAL_HEADER_SIGNATURE, _ZIP_VERSION
+            )
+            + fields
+            + struct.pack("<H", 0)
+            + name
+        )
+        for chunk in chunks:
+            self._file.write(chunk)
+        self._central_directory.append(
+            struct.pack(
+                "<IHH",
+                _CENTRAL_HEADER_SIGNATURE,
+                info.create_system << 8 | _ZIP_VERSION,
+                _ZIP_VERSION,
+            )
+            + fields
+            + struct.pack(
+                "<HHHHII",
+                0,
+                0,
+                0,
+                0,
+                info.external_attr,
+                offset,
+            )
+            + name
+        )
+
+    def copy_member(
+        self, source_path: str, info: zipfile.ZipInfo
+    ):
+        """Copies one member of the zip file at `source_path` without decompressing it."""
+
+        def chunks() -> Iterator[bytes]:
+            with open(source_path, "rb") as source:
+                source.seek(info.header_offset)
+                header = source.read(_LOCAL_HEADER_SIZE)
+                if (
+                    len(header) < _LOCAL_HEADER_SIZE
+                    or struct.unpack("<I", header[:4])[0]
+                    != _LOCAL_HEADER_SIGNATURE
+                ):
+                    raise zipfile.BadZipFile(
+                        f"Bad local header for {info.filename}."
+                    )
+                name_length, extra_length = struct.unpack(
+                    "<HH", header[26:30]
+                )
+                source.seek(name_length + extra_length, 1)
+                remaining = info.compress_size
+                while remaining > 0:
+                    chunk = source.read(
+                        min(_COPY_CHUNK_SIZE, remaining)
+                    )
+                    if not chunk:
+                        raise zipfile.BadZipFile(
+                            f"Truncated member {info.filename}."
+                        )
+                    remaining -= len(chunk)
+                    yield chunk
+
+        self._add(info, chunks())
+
+    def write_bytes(self, name: str, data: bytes):
+        """Adds a small member, stored uncompressed."""
+        info = zipfile.ZipInfo(name)
+        info.compress_type = zipfile.ZIP_STORED
+        info.external_attr = 0o600 << 16
+        info.CRC = zlib.crc32(data)
+        info.compress_size = info.file_size = len(data)
+        self._add(info, iter([data]))
+
+    def close(self):
+        """Writes the central directory and closes the file."""
+        start = self._file.tell()
+        for entry in self._central_directory:
+            self._file.write(entry)
+        self._file.write(
+            struct.pack(
+                "<IHHHHIIH",
+                _END_OF_CENTRAL_DIRECTORY_SIGNATURE,
+                0,
+                0,
+                len(self._central_directory),
+                len(self._central_directory),
+                self._file.tell() - start,
+                start,
+                0,
+            )
+        )
+        self._file.close()
+
+
+def _section_keys(
+    spec: TemplateSpec,
+    columns: List[dict],
+    stacked_inputs: Optional[List[StackedInput]],
+) -> Dict[str, dict]:
+    """Cache key payloads of the data, Read Me, metadata and lists sections."""
+    layout = column_fingerprint(columns)
+    return {
+        "data": {
+            "version": TEMPLATE_FORMAT_VERSION,
+            "columns": layout,
+            "input_uploads": spec["input_uploads"],
+            "metric_weights": spec["metric_weights"],
+            "stacked_inputs": stacked_inputs,
+        },
+        "readme": {
+            "version": TEMPLATE_FORMAT_VERSION,
+            "readme_html": spec["readme_html"],
+        },
+        "metadata": {
+            "version": TEMPLATE_FORMAT_VERSION,
+            "columns": layout,
+            "metadata": spec["metadata"],
+            "pass_threshold": spec["pass_threshold"],
+        },
+        "lists": {
+            "version": TEMPLATE_FORMAT_VERSION,
+            "pass_threshold": spec["pass_threshold"],
+        },
+    }
+
+
+def _write_section(
+    section_path: str,
+    section: str,
+    write: Callable[..., Optional[int]],
+    tmpdir: str,
+) -> int:
+    """
+    Writes one section into a throwaway workbook (the other sheets left empty)
+    and keeps only its sheet part, plus the data row count, in `section_path`.
+    """
+    handle, workbook_path = tempfile.mkstemp(
+        suffix=".xlsx", dir=tmpdir
+    )
+    os.close(handle)
+    try:
+        position = list(SECTION_PARTS).index(section)
+        # Style indices are pinned on a sheet whose part is thrown away.
+        workbook, formats, *sheets = (
+            _open_template_workbook(
+                workbook_path,
+                tmpdir,
+                style_sheet=(position + 1)
+                % len(SECTION_PARTS),
+            )
+        )
+        sheet = sheets[position]
+        row_count = write(sheet, formats) or 0
+        workbook.close()
+        with zipfile.ZipFile(workbook_path) as source:
+            info = source.getinfo(SECTION_PARTS[section])
+        with _RawZipWriter(section_path) as target:
+            target.copy_member(workbook_path, info)
+            target.write_bytes(
+                _SECTION_INFO_MEMBER,
+                json.dumps(
+                    {"row_count": row_count}
+                ).encode(),
+            )
+    finally:
+        os.remove(workbook_path)
+    return row_count
+
+
+def _section_row_count(section_path: str) -> int:
+    with zipfile.ZipFile(section_path) as section:
+        return json.loads(
+            section.read(_SECTION_INFO_MEMBER)
+        )["row_count"]
+
+
+def build_template_from_sections(
+    output_path: str,
+    spec: TemplateSpec,
+    store: Optional[SegmentStore] = None,
+    section_cache: Optional[TemplateCache] = None,
+    stacked_inputs: Optional[List[StackedInput]] = None,
+    stack_column_name: str = "MT Engine",
+) -> Tuple[int, List[str]]:
+    """
+    Builds the same workbook as write_evaluation_template, reusing every
+    cached section whose inputs are unchanged. Returns the data row count
+    and the names of the sections that had to be rebuilt.
+    """
+    store = store or get_segment_store()
+    section_cache = section_cache or get_section_cache()
+    spec, columns, stacked_inputs = (
+        _resolve_template_inputs(
+            spec, store, stacked_inputs, stack_column_name
+        )
+    )
+    work_dir = tempfile.mkdtemp(
+        prefix=".build-", dir=section_cache.root_dir
+    )
+    key_payloads = _section_keys(
+        spec, columns, stacked_inputs
+    )
+    rebuilt: List[str] = []
+
+    def section_part(
+        section: str,
+        write: Callable[..., Optional[int]],
+        payload: dict,
+    ) -> str:
+        key = f"{section}-{fingerprint_payload(payload)}"
+        cached = section_cache.get(key)
+        if cached is not None:
+            return cached
+        rebuilt.append(section)
+        staging = section_cache.staging_path()
+        try:
+            _write_section(
+                staging, section, write, work_dir
+            )
+            return section_cache.put(key, staging)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+    try:
+
+        def write_data(sheet, formats) -> int:
+            return _write_data_sheet(
+                sheet,
+                formats,
+                columns,
+                spec["metric_weights"],
+                _iter_template_input_rows(
+                    spec, stacked_inputs, store
+                ),
+            )
+
+        data_part = section_part(
+            "data", write_data, key_payloads["data"]
+        )
+        row_count = _section_row_count(data_part)
+        readme_part = section_part(
+            "readme",
+            lambda sheet, formats: _write_readme_sheet(
+                sheet, formats, spec["readme_html"]
+            ),
+            key_payloads["readme"],
+        )
+        metadata_part = section_part(
+            "metadata",
+            lambda sheet, formats: _write_metadata_sheet(
+                sheet, formats, spec, columns, row_count, 0
+            ),
+            {
+                **key_payloads["metadata"],
+                "row_count": row_count,
+            },
+        )
+        lists_part = section_part(
+            "lists",
+            lambda sheet, formats: _write_lists_sheet(
+                sheet, formats, spec["pass_threshold"]
+            ),
+            key_payloads["lists"],
+        )
+        parts = {
+            SECTION_PARTS["data"]: data_part,
+            SECTION_PARTS["readme"]: readme_part,
+            SECTION_PARTS["metadata"]: metadata_part,
+            SECTION_PARTS["lists"]: lists_part,
+        }
+        skeleton_path = os.path.join(
+            work_dir, "skeleton.xlsx"
+        )
+        skeleton, *_ = _open_template_workbook(
+            skeleton_path, work_dir, style_sheet=0
+        )
+        skeleton.close()
+        with zipfile.ZipFile(skeleton_path) as source:
+            skeleton_members = source.infolist()
+        with _RawZipWriter(output_path) as target:
+            for info in skeleton_members:
+                part_path = parts.get(info.filename)
+                if part_path is None:
+                    target.copy_member(skeleton_path, info)
+                    continue
+                with zipfile.ZipFile(part_path) as part:
+                    part_info = part.getinfo(info.filename)
+                target.copy_member(part_path, part_info)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    logger.info(
+        f"Assembled template with {row_count} rows to {output_path}; rebuilt sections: {', '.join(rebuilt) or 'none'}."
+    )
+    return row_count, rebuilt
+
+
+_section_cache: Optional[TemplateCache] = None
+
+
+def get_section_cache() -> TemplateCache:
+    """Returns the process-wide cache of template sections."""
+    global _section_cache
+    if _section_cache is None:
+        _section_cache = TemplateCache(
+            os.environ.get(SECTION_CACHE_DIR_ENV)
+            or os.path.join(
+                tempfile.gettempdir(),
+                "ltx_template_sections",
+            ),
+            max_bytes=int(
+                os.environ.get(SECTION_CACHE_MAX_BYTES_ENV)
+                or DEFAULT_SECTION_CACHE_MAX_BYTES
+            ),
+            extension=".zip",
+        )
+    return _section_cache
\ No newline at end of file
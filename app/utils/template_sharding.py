@@ -0,0 +1,212 @@
+"""
+Splits one evaluation template into several workbooks sized for a single
+evaluator, capped by row count and/or total source word count.
+
+The segment set is read once; each shard is streamed straight to disk by
+write_evaluation_template as rows arrive, and a manifest maps every shard
+back to the row ids (0-based positions in the full segment set) it holds.
+"""
+
+import json
+import logging
+import os
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TypedDict,
+)
+from .segment_store import SegmentStore, get_segment_store
+from .template_writer import (
+    StackedInput,
+    TemplateSpec,
+    _find_column,
+    _iter_template_input_rows,
+    _resolve_template_inputs,
+    write_evaluation_template,
+)
+from .word_counts import (
+    WordCountRule,
+    count_words,
+    word_count_rule,
+)
+
+logger = logging.getLogger(__name__)
+SHARD_MANIFEST_FILE = "manifest.json"
+
+
+class ShardInfo(TypedDict):
+    shard_index: int
+    file_name: str
+    first_row_id: int
+    last_row_id: int
+    row_count: int
+    word_count: int
+
+
+class ShardManifest(TypedDict):
+    total_rows: int
+    max_rows: Optional[int]
+    max_words: Optional[int]
+    shards: List[ShardInfo]
+
+
+class _ShardCursor:
+    """
+    Hands out the rows of the full segment set one shard at a time.
+    The row that would overflow a shard's budget is held back and opens
+    the next shard, so every shard gets at least one row.
+    """
+
+    def __init__(
+        self,
+        rows: Iterator[Dict[str, str]],
+        source_column_id: Optional[str],
+        max_rows: Optional[int],
+        max_words: Optional[int],
+        word_rule: WordCountRule = "space",
+    ):
+        self._rows = rows
+        self._source_column_id = source_column_id
+        self._max_rows = max_rows
+        self._max_words = max_words
+        self._word_rule = word_rule
+        self._held: Optional[Dict[str, str]] = None
+        self.next_row_id = 0
+        self.shard_words = 0
+
+    def has_rows(self) -> bool:
+        if self._held is None:
+            self._held = next(self._rows, None)
+        return self._held is not None
+
+    def _row_words(self, row: Dict[str, str]) -> int:
+        if self._source_column_id is None:
+            return 0
+        return count_words(
+            row.get(self._source_column_id, ""),
+            self._word_rule,
+        )
+
+    def iter_shard(self) -> Iterator[Dict[str, str]]:
+        shard_rows = 0
+        self.shard_words = 0
+        while self.has_rows():
+            row = self._held
+            words = self._row_words(row)
+            if shard_rows > 0 and (
+                (
+                    self._max_rows is not None
+                    and shard_rows >= self._max_rows
+                )
+                or (
+                    self._max_words is not None
+                    and self.shard_words + words
+                    > self._max_words
+                )
+            ):
+                return
+            self._held = None
+            shard_rows += 1
+            self.shard_words += words
+            self.next_row_id += 1
+            yield row
+
+
+def write_template_shards(
+    output_dir: str,
+    spec: TemplateSpec,
+    file_stem: str,
+    max_rows: Optional[int] = None,
+    max_words: Optional[int] = None,
+    store: Optional[SegmentStore] = None,
+    stacked_inputs: Optional[List[StackedInput]] = None,
+    stack_column_name: str = "MT Engine",
+) -> ShardManifest:
+    """
+    Writes `{file_stem}_part{N}.xlsx` shards plus a manifest.json into
+    `output_dir` and returns the manifest. Each shard has the full column
+    layout, formulas and Read Me of the unsharded template; its Metadata
+    sheet records the shard number and the row offset of its first row.
+    """
+    if max_rows is None and max_words is None:
+        raise ValueError(
+            "A row or word count budget is required to shard a template."
+        )
+    if (max_rows is not None and max_rows <= 0) or (
+        max_words is not None and max_words <= 0
+    ):
+        raise ValueError("Shard budgets must be positive.")
+    store = store or get_segment_store()
+    os.makedirs(output_dir, exist_ok=True)
+    # Resolved once for all shards, so precomputed word counts reach the
+    # shard rows exactly as they would the unsharded template's.
+    spec, columns, stacked_inputs = (
+        _resolve_template_inputs(
+            spec, store, stacked_inputs, stack_column_name
+        )
+    )
+    source_column = _find_column(columns, "Source")
+    cursor = _ShardCursor(
+        _iter_template_input_rows(
+            spec, stacked_inputs, store
+        ),
+        (
+            str(source_column["id"])
+            if source_column is not None
+            else None
+        ),
+        max_rows,
+        max_words,
+        word_count_rule(
+            spec["metadata"].get("Source Language")
+        ),
+    )
+    shards: List[ShardInfo] = []
+    while cursor.has_rows():
+        shard_index = len(shards) + 1
+        first_row_id = cursor.next_row_id
+        file_name = f"{file_stem}_part{shard_index}.xlsx"
+        row_count = write_evaluation_template(
+            os.path.join(output_dir, file_name),
+            {
+                **spec,
+                "metadata": {
+                    **spec["metadata"],
+                    "Shard": str(shard_index),
+                },
+            },
+            store=store,
+            tmpdir=output_dir,
+            stacked_inputs=stacked_inputs,
+            stack_column_name=stack_column_name,
+            input_rows=cursor.iter_shard(),
+            row_offset=first_row_id,
+        )
+        shards.append(
+            {
+                "shard_index": shard_index,
+                "file_name": file_name,
+                "first_row_id": first_row_id,
+                "last_row_id": first_row_id + row_count - 1,
+                "row_count": row_count,
+                "word_count": cursor.shard_words,
+            }
+        )
+    manifest: ShardManifest = {
+        "total_rows": cursor.next_row_id,
+        "max_rows": max_rows,
+        "max_words": max_words,
+        "shards": shards,
+    }
+    with open(
+        os.path.join(output_dir, SHARD_MANIFEST_FILE),
+        "w",
+        encoding="utf-8",
+    ) as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    logger.info(
+        f"Split {manifest['total_rows']} rows into {len(shards)} shards in {output_dir}."
+    )
+    return manifest
\ No newline at end of file
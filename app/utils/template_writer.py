@@ -0,0 +1,873 @@
+"""
+Evaluation template generation.
+
+Workbooks are written with xlsxwriter in constant_memory mode: each row is
+flushed to disk as soon as the next one starts, so generation time and memory
+grow linearly with the number of segments and the workbook is never held in
+memory as a whole.
+"""
+
+import html
+import logging
+import os
+import re
+import shutil
+import tempfile
+from html.parser import HTMLParser
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import xlsxwriter
+from xlsxwriter.format import Format
+from xlsxwriter.utility import xl_col_to_name
+from xlsxwriter.worksheet import Worksheet
+from .segment_store import (
+    SegmentStore,
+    get_segment_store,
+    segment_text,
+)
+
+if TYPE_CHECKING:
+    from app.states.file_prep_state import ExcelColumn
+
+logger = logging.getLogger(__name__)
+DATA_SHEET_NAME = "Evaluation"
+README_SHEET_NAME = "Read Me"
+METADATA_SHEET_NAME = "Metadata"
+LISTS_SHEET_NAME = "Lists"
+SCORE_VALUES = (1, 2, 3, 4, 5)
+SCORE_VALUES_NAME = "ScoreValues"
+PASS_THRESHOLD_NAME = "PassThreshold"
+FIRST_DATA_ROW = 2
+STACK_COLUMN_ID = "stacked_input_label"
+PROGRESS_INTERVAL_ROWS = 1000
+WordCountMode = Literal["formula", "values"]
+_CELL_REFERENCE_PATTERN = re.compile(
+    r"(?<![A-Za-z0-9_.])(\$?)([A-Z]{1,3})(\$?)(\d+)(?![\w(])"
+)
+_STRING_LITERAL_PATTERN = re.compile(r'("(?:[^"]|"")*")')
+
+
+class StackedInput(TypedDict):
+    label: str
+    input_uploads: Dict[str, str]
+
+
+class TemplateSpec(TypedDict):
+    columns: List["ExcelColumn"]
+    input_uploads: Dict[str, str]
+    metric_weights: Dict[str, int]
+    pass_threshold: Optional[float]
+    readme_html: str
+    metadata: Dict[str, str]
+    word_count_mode: WordCountMode
+
+
+class FormulaRowTemplate:
+    """
+    A formula written for the first data row (row 2), pre-split around its
+    relative row numbers so it can be rendered for any row without re-parsing.
+    Absolute rows ($A$1) and text inside string literals are left untouched.
+    """
+
+    def __init__(self, formula: str):
+        self.literals: List[str] = []
+        self.rows: List[int] = []
+        pending = ""
+        for part in _STRING_LITERAL_PATTERN.split(formula):
+            if part.startswith('"'):
+                pending += part
+                continue
+            position = 0
+            for match in _CELL_REFERENCE_PATTERN.finditer(
+                part
+            ):
+                if match.group(3):
+                    continue
+                pending += part[position : match.start(4)]
+                self.literals.append(pending)
+                self.rows.append(int(match.group(4)))
+                pending = ""
+                position = match.end(4)
+            pending += part[position:]
+        self.literals.append(pending)
+
+    def render(self, row_offset: int) -> str:
+        """Returns the formula moved down by `row_offset` rows."""
+        pieces = []
+        for literal, row in zip(self.literals, self.rows):
+            pieces.append(literal)
+            pieces.append(str(row + row_offset))
+        pieces.append(self.literals[-1])
+        return "".join(pieces)
+
+
+def shift_formula_rows(
+    formula: str, row_offset: int
+) -> str:
+    """Moves the relative row references of a first-row formula down by `row_offset` rows."""
+    return FormulaRowTemplate(formula).render(row_offset)
+
+
+class FormatCache:
+    """
+    Hands out one shared Format per distinct set of properties, kept apart
+    for cell and conditional (dxf) formatting. xlsxwriter numbers styles in
+    order of first use; pin_style_indices() fixes that order for workbooks
+    whose sheets are written separately and combined (see
+    template_sections).
+    """
+
+    def __init__(self, workbook: xlsxwriter.Workbook):
+        self._workbook = workbook
+        self._formats: Dict[Tuple, Format] = {}
+
+    def get(
+        self, properties: Dict, conditional: bool = False
+    ) -> Format:
+        key = (conditional,) + tuple(
+            sorted(properties.items())
+        )
+        cell_format = self._formats.get(key)
+        if cell_format is None:
+            cell_format = self._workbook.add_format(
+                properties
+            )
+            self._formats[key] = cell_format
+        return cell_format
+
+    def pin_style_indices(self, sheet: Worksheet):
+        """
+        Uses every format once, in request order, in the first row of
+        `sheet`, before anything else is written: cell formats as styled
+        blank cells, conditional formats as a rule each. Only for a sheet
+        whose part is thrown away.
+        """
+        for column, (key, cell_format) in enumerate(
+            self._formats.items()
+        ):
+            if key[0]:
+                sheet.conditional_format(
+                    0,
+                    column,
+                    0,
+                    column,
+                    {
+                        "type": "no_blanks",
+                        "format": cell_format,
+                    },
+                )
+            else:
+                sheet.write_blank(
+                    0, column, None, cell_format
+                )
+        # In constant_memory mode a row, and with it the style of each of
+        # its cells, is only written once the next row starts.
+        sheet.write_number(1, 0, 0)
+
+
+def column_letters(
+    columns: List["ExcelColumn"],
+) -> Dict[str, str]:
+    """Maps column ids to their Excel column letters in the data sheet."""
+    return {
+        str(col["id"]): xl_col_to_name(index)
+        for index, col in enumerate(columns)
+    }
+
+
+def _find_column(
+    columns: List["ExcelColumn"], name: str
+) -> Optional["ExcelColumn"]:
+    return next(
+        (col for col in columns if col.get("name") == name),
+        None,
+    )
+
+
+def default_word_count_formula(source_letter: str) -> str:
+    """Word count of the Source cell, for the first data row."""
+    cell = f"{source_letter}{FIRST_DATA_ROW}"
+    return f'=IF(ISBLANK({cell}),0,LEN(TRIM({cell}))-LEN(SUBSTITUTE(TRIM({cell})," ",""))+1)'
+
+
+def weighted_scoring_columns(
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, Optional[int]],
+) -> List[Tuple["ExcelColumn", int]]:
+    """
+    The scoring columns that count towards the Overall Score, with their
+    weights. Weights that are not set (None) or not integers count as 0,
+    as in ProjectState.current_project_metric_weights.
+    """
+    weighted = []
+    for col in columns:
+        if col.get("group") != "Scoring":
+            continue
+        weight = metric_weights.get(str(col["name"]))
+        if isinstance(weight, int) and weight > 0:
+            weighted.append((col, weight))
+    return weighted
+
+
+def overall_score_formula(
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, int],
+) -> str:
+    """
+    Weighted average of the scoring columns, for the first data row.
+    Blank scores count as 0; the cell stays empty until any score is entered.
+    """
+    letters = column_letters(columns)
+    weighted_terms = []
+    cells = []
+    total_weight = 0
+    for col, weight in weighted_scoring_columns(
+        columns, metric_weights
+    ):
+        cell = f"{letters[str(col['id'])]}{FIRST_DATA_ROW}"
+        cells.append(cell)
+        weighted_terms.append(f"{weight}*{cell}")
+        total_weight += weight
+    if total_weight == 0:
+        return ""
+    return f'=IF(COUNT({",".join(cells)})=0,"",({"+".join(weighted_terms)})/{total_weight})'
+
+
+def resolve_column_formulas(
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, int],
+) -> Dict[str, str]:
+    """
+    Returns the first-row formula of every calculated column by column id.
+    Formulas edited on the formula review step win; otherwise the Word Count
+    and Overall Score columns get their generated defaults.
+    """
+    letters = column_letters(columns)
+    source_column = _find_column(columns, "Source")
+    formulas: Dict[str, str] = {}
+    for col in columns:
+        formula = (
+            col.get("formula_excel_style") or ""
+        ).strip()
+        if (
+            not formula
+            and col.get("is_word_count_column")
+            and source_column is not None
+        ):
+            formula = default_word_count_formula(
+                letters[str(source_column["id"])]
+            )
+        elif (
+            not formula
+            and col.get("metric_type") == "overall"
+        ):
+            formula = overall_score_formula(
+                columns, metric_weights
+            )
+        if formula:
+            if not formula.startswith("="):
+                formula = f"={formula}"
+            formulas[str(col["id"])] = formula
+    return formulas
+
+
+class _ReadmeTextExtractor(HTMLParser):
+    """Flattens the Read Me HTML into plain-text lines."""
+
+    _BLOCK_TAGS = {
+        "p",
+        "div",
+        "br",
+        "li",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "tr",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.lines: List[str] = []
+        self._current: List[str] = []
+
+    def _flush(self):
+        line = " ".join("".join(self._current).split())
+        if line:
+            self.lines.append(line)
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._BLOCK_TAGS:
+            self._flush()
+        if tag == "li":
+            self._current.append("• ")
+
+    def handle_endtag(self, tag):
+        if tag in self._BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        self._current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def readme_lines(readme_html: str) -> List[str]:
+    """Converts the Read Me HTML into the lines written to the Read Me sheet."""
+    extractor = _ReadmeTextExtractor()
+    extractor.feed(readme_html or "")
+    extractor.close()
+    return [html.unescape(line) for line in extractor.lines]
+
+
+def _iter_input_rows(
+    input_uploads: Dict[str, str],
+    store: SegmentStore,
+) -> Iterator[Dict[str, str]]:
+    """Streams the uploaded input columns side by side, one dict per row."""
+    iterators = {
+        column_id: store.iter_rows(upload_id)
+        for column_id, upload_id in input_uploads.items()
+    }
+    while iterators:
+        row: Dict[str, str] = {}
+        exhausted = []
+        for column_id, rows in iterators.items():
+            value = next(rows, None)
+            if value is None:
+                exhausted.append(column_id)
+            else:
+                row[column_id] = segment_text(value)
+        for column_id in exhausted:
+            del iterators[column_id]
+        if not row:
+            return
+        yield row
+
+
+def _iter_stacked_input_rows(
+    stacked_inputs: List[StackedInput],
+    store: SegmentStore,
+) -> Iterator[Dict[str, str]]:
+    """Streams several input sets one after another, tagging rows with their label."""
+    for stacked in stacked_inputs:
+        for row in _iter_input_rows(
+            stacked["input_uploads"], store
+        ):
+            row[STACK_COLUMN_ID] = stacked["label"]
+            yield row
+
+
+def _resolve_template_inputs(
+    spec: TemplateSpec,
+    store: SegmentStore,
+    stacked_inputs: Optional[List[StackedInput]],
+    stack_column_name: str,
+) -> Tuple[
+    TemplateSpec,
+    List["ExcelColumn"],
+    Optional[List[StackedInput]],
+]:
+    """
+    Applies the word count mode and the stack column: returns the spec and
+    stacked inputs to read rows from, and the columns of the data sheet.
+    """
+    if spec.get("word_count_mode") == "values":
+        from .word_counts import (
+            with_precomputed_word_counts,
+        )
+
+        source_language = spec["metadata"].get(
+            "Source Language"
+        )
+        spec = with_precomputed_word_counts(
+            spec, source_language, store
+        )
+        if stacked_inputs is not None:
+            stacked_inputs = [
+                {
+                    "label": stacked["label"],
+                    "input_uploads": with_precomputed_word_counts(
+                        {
+                            **spec,
+                            "input_uploads": stacked[
+                                "input_uploads"
+                            ],
+                        },
+                        source_language,
+                        store,
+                    )[
+                        "input_uploads"
+                    ],
+                }
+                for stacked in stacked_inputs
+            ]
+    columns = spec["columns"]
+    if stacked_inputs is not None:
+        columns = columns + [
+            {
+                "id": STACK_COLUMN_ID,
+                "name": stack_column_name,
+                "group": "Input",
+            }
+        ]
+    return spec, columns, stacked_inputs
+
+
+def _iter_template_input_rows(
+    spec: TemplateSpec,
+    stacked_inputs: Optional[List[StackedInput]],
+    store: SegmentStore,
+) -> Iterator[Dict[str, str]]:
+    """The data rows of inputs resolved by _resolve_template_inputs."""
+    if stacked_inputs is not None:
+        return _iter_stacked_input_rows(
+            stacked_inputs, store
+        )
+    return _iter_input_rows(spec["input_uploads"], store)
+
+
+def _open_template_workbook(
+    output_path: str,
+    tmpdir: Optional[str],
+    style_sheet: Optional[int] = None,
+) -> Tuple[
+    xlsxwriter.Workbook,
+    Dict[str, Format],
+    Worksheet,
+    Worksheet,
+    Worksheet,
+    Worksheet,
+]:
+    """
+    Creates the workbook with its four sheets, the named ranges and the
+    shared formats. With `style_sheet` (a sheet position) the formats get
+    their style indices up front on that sheet, in a fixed order, so every
+    workbook gets the same styles part whichever sheets end up using them;
+    sheets written separately can then be combined (see template_sections).
+    """
+    workbook = xlsxwriter.Workbook(
+        output_path,
+        {
+            "constant_memory": True,
+            "tmpdir": tmpdir,
+            "strings_to_formulas": False,
+            "strings_to_numbers": False,
+            "strings_to_urls": False,
+        },
+    )
+    format_cache = FormatCache(workbook)
+    formats = {
+        "header": format_cache.get(
+            {
+                "bold": True,
+                "bg_color": "#E5E7EB",
+                "border": 1,
+                "text_wrap": True,
+                "valign": "top",
+            }
+        ),
+        "text": format_cache.get(
+            {"text_wrap": True, "valign": "top"}
+        ),
+        "readme_title": format_cache.get(
+            {"bold": True, "font_size": 14}
+        ),
+        "pass": format_cache.get(
+            {
+                "bg_color": "#DCFCE7",
+                "font_color": "#166534",
+            },
+            conditional=True,
+        ),
+        "fail": format_cache.get(
+            {
+                "bg_color": "#FEE2E2",
+                "font_color": "#991B1B",
+            },
+            conditional=True,
+        ),
+    }
+    data_sheet = workbook.add_worksheet(DATA_SHEET_NAME)
+    readme_sheet = workbook.add_worksheet(README_SHEET_NAME)
+    metadata_sheet = workbook.add_worksheet(
+        METADATA_SHEET_NAME
+    )
+    metadata_sheet.hide()
+    lists_sheet = workbook.add_worksheet(LISTS_SHEET_NAME)
+    lists_sheet.hide()
+    # The lists are defined once and referenced by name from the validation
+    # and conditional format rules of the data sheet.
+    workbook.define_name(
+        SCORE_VALUES_NAME,
+        f"='{LISTS_SHEET_NAME}'!$A$2:$A${len(SCORE_VALUES) + 1}",
+    )
+    workbook.define_name(
+        PASS_THRESHOLD_NAME, f"='{LISTS_SHEET_NAME}'!$B$2"
+    )
+    if style_sheet is not None:
+        format_cache.pin_style_indices(
+            [
+                data_sheet,
+                readme_sheet,
+                metadata_sheet,
+                lists_sheet,
+            ][style_sheet]
+        )
+    return (
+        workbook,
+        formats,
+        data_sheet,
+        readme_sheet,
+        metadata_sheet,
+        lists_sheet,
+    )
+
+
+def _apply_score_rules(
+    data_sheet: Worksheet,
+    formats: Dict[str, Format],
+    columns: List["ExcelColumn"],
+):
+    """
+    Adds the score dropdown and the pass/fail highlighting as one rule each
+    over the whole score columns, instead of one rule per cell. The rules
+    read the score values and the pass threshold through the workbook names
+    defined in _open_template_workbook.
+    """
+    letters = column_letters(columns)
+    last_row = data_sheet.xls_rowmax
+
+    def column_ranges(group: str) -> List[str]:
+        return [
+            f"{letters[str(col['id'])]}{FIRST_DATA_ROW}:{letters[str(col['id'])]}{last_row}"
+            for col in columns
+            if col.get("group") == group
+        ]
+
+    scoring_ranges = column_ranges("Scoring")
+    if scoring_ranges:
+        data_sheet.data_validation(
+            FIRST_DATA_ROW - 1,
+            0,
+            last_row - 1,
+            0,
+            {
+                "validate": "list",
+                "source": f"={SCORE_VALUES_NAME}",
+                "multi_range": " ".join(scoring_ranges),
+                "error_title": "Invalid score",
+                "error_message": f"Choose a score from {SCORE_VALUES[0]} to {SCORE_VALUES[-1]}.",
+            },
+        )
+    score_ranges = scoring_ranges + column_ranges(
+        "Calculated Score"
+    )
+    if not score_ranges:
+        return
+    anchor = score_ranges[0].split(":")[0]
+    for criteria, rule_format in (
+        (f"{anchor}>={PASS_THRESHOLD_NAME}", "pass"),
+        (f"{anchor}<{PASS_THRESHOLD_NAME}", "fail"),
+    ):
+        data_sheet.conditional_format(
+            FIRST_DATA_ROW - 1,
+            0,
+            last_row - 1,
+            0,
+            {
+                "type": "formula",
+                "criteria": f"=AND(ISNUMBER({anchor}),ISNUMBER({PASS_THRESHOLD_NAME}),{criteria})",
+                "format": formats[rule_format],
+                "multi_range": " ".join(score_ranges),
+            },
+        )
+
+
+def _write_data_sheet(
+    data_sheet: Worksheet,
+    formats: Dict[str, Format],
+    columns: List["ExcelColumn"],
+    metric_weights: Dict[str, int],
+    input_rows: Iterable[Dict[str, str]],
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Writes the header and one row per input row; returns the row count.
+    `on_progress` is called with the rows written so far every
+    PROGRESS_INTERVAL_ROWS rows; it may raise to abort the write.
+    """
+    formulas = resolve_column_formulas(
+        columns, metric_weights
+    )
+    for col_index, col in enumerate(columns):
+        is_text_input = bool(
+            col.get("requires_upload")
+        ) and (col.get("name") != "File Name")
+        data_sheet.set_column(
+            col_index,
+            col_index,
+            50 if is_text_input else 18,
+            formats["text"] if is_text_input else None,
+        )
+        data_sheet.write_string(
+            0,
+            col_index,
+            str(col["name"]),
+            formats["header"],
+        )
+    data_sheet.freeze_panes(1, 0)
+    _apply_score_rules(data_sheet, formats, columns)
+    # Each formula is split once per column; every row only renders its
+    # row numbers into the text handed to write_formula.
+    formula_templates = {
+        column_id: FormulaRowTemplate(formula)
+        for column_id, formula in formulas.items()
+    }
+    # Precomputed word counts arrive as input values and are written as
+    # numbers so they still sum and sort like the formula results.
+    numeric_column_ids = {
+        str(col["id"])
+        for col in columns
+        if col.get("is_word_count_column")
+    }
+
+    row_count = 0
+    for row_count, input_row in enumerate(
+        input_rows, start=1
+    ):
+        for col_index, col in enumerate(columns):
+            column_id = str(col["id"])
+            if column_id in numeric_column_ids and (
+                input_row.get(column_id, "").isdigit()
+            ):
+                data_sheet.write_number(
+                    row_count,
+                    col_index,
+                    int(input_row[column_id]),
+                )
+            elif column_id in input_row:
+                data_sheet.write_string(
+                    row_count,
+                    col_index,
+                    input_row[column_id],
+                )
+            elif column_id in formula_templates:
+                data_sheet.write_formula(
+                    row_count,
+                    col_index,
+                    formula_templates[column_id].render(
+                        row_count - 1
+                    ),
+                )
+        if (
+            on_progress is not None
+            and row_count % PROGRESS_INTERVAL_ROWS == 0
+        ):
+            on_progress(row_count)
+    return row_count
+
+
+def _write_readme_sheet(
+    readme_sheet: Worksheet,
+    formats: Dict[str, Format],
+    readme_html: str,
+):
+    readme_sheet.set_column(0, 0, 120)
+    readme_sheet.write_string(
+        0, 0, "Read Me", formats["readme_title"]
+    )
+    for line_index, line in enumerate(
+        readme_lines(readme_html), start=2
+    ):
+        readme_sheet.write_string(line_index, 0, line)
+
+
+def _write_metadata_sheet(
+    metadata_sheet: Worksheet,
+    formats: Dict[str, Format],
+    spec: TemplateSpec,
+    columns: List["ExcelColumn"],
+    row_count: int,
+    row_offset: int,
+):
+    """Writes the project metadata and the column table used on ingestion."""
+    metadata_sheet.set_column(0, 4, 24)
+    metadata_rows = list(spec["metadata"].items()) + [
+        ("Row Count", str(row_count)),
+        ("Row Offset", str(row_offset)),
+        (
+            "Pass Threshold",
+            (
+                ""
+                if spec["pass_threshold"] is None
+                else str(spec["pass_threshold"])
+            ),
+        ),
+    ]
+    for row_index, (key, value) in enumerate(metadata_rows):
+        metadata_sheet.write_string(row_index, 0, key)
+        metadata_sheet.write_string(row_index, 1, value)
+    columns_header_row = len(metadata_rows) + 1
+    for col_index, header in enumerate(
+        [
+            "Column Id",
+            "Column Name",
+            "Group",
+            "Metric Type",
+            "Letter",
+        ]
+    ):
+        metadata_sheet.write_string(
+            columns_header_row,
+            col_index,
+            header,
+            formats["header"],
+        )
+    letters = column_letters(columns)
+    for offset, col in enumerate(columns, start=1):
+        for col_index, value in enumerate(
+            [
+                str(col["id"]),
+                str(col["name"]),
+                str(col.get("group") or ""),
+                str(col.get("metric_type") or ""),
+                letters[str(col["id"])],
+            ]
+        ):
+            metadata_sheet.write_string(
+                columns_header_row + offset,
+                col_index,
+                value,
+            )
+
+
+def _write_lists_sheet(
+    lists_sheet: Worksheet,
+    formats: Dict[str, Format],
+    pass_threshold: Optional[float],
+):
+    """Writes the score values and the pass threshold behind the workbook names."""
+    lists_sheet.set_column(0, 1, 16)
+    lists_sheet.write_string(
+        0, 0, "Score Values", formats["header"]
+    )
+    lists_sheet.write_string(
+        0, 1, "Pass Threshold", formats["header"]
+    )
+    for row_index, value in enumerate(
+        SCORE_VALUES, start=1
+    ):
+        lists_sheet.write_number(row_index, 0, value)
+        if row_index == 1 and pass_threshold is not None:
+            lists_sheet.write_number(
+                row_index, 1, pass_threshold
+            )
+
+
+def write_evaluation_template(
+    output_path: str,
+    spec: TemplateSpec,
+    store: Optional[SegmentStore] = None,
+    tmpdir: Optional[str] = None,
+    stacked_inputs: Optional[List[StackedInput]] = None,
+    stack_column_name: str = "MT Engine",
+    input_rows: Optional[Iterable[Dict[str, str]]] = None,
+    row_offset: int = 0,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Writes the evaluation template workbook to `output_path` and returns the
+    number of data rows. Input columns are streamed from the segment store.
+    With `stacked_inputs`, the rows of each input set are written one after
+    another instead of spec["input_uploads"], and a `stack_column_name`
+    column holding each set's label is appended after the last column (so
+    the letters referenced by existing formulas do not move).
+    `input_rows` overrides the rows read from the store (used for shards, whose
+    first row sits at `row_offset` in the full segment set); they must come
+    from the inputs as resolved by _resolve_template_inputs.
+    With spec["word_count_mode"] set to "values", the Word Count column holds
+    precomputed static counts instead of a per-row formula.
+    `on_progress` receives the number of data rows written so far; if it
+    raises (e.g. JobCancelled), no output file is left behind.
+    """
+    store = store or get_segment_store()
+    spec, columns, stacked_inputs = (
+        _resolve_template_inputs(
+            spec, store, stacked_inputs, stack_column_name
+        )
+    )
+    if input_rows is None:
+        input_rows = _iter_template_input_rows(
+            spec, stacked_inputs, store
+        )
+    # xlsxwriter leaves the temp row files of empty sheets behind, so each
+    # workbook gets its own temp dir, removed once the workbook is written.
+    work_dir = tempfile.mkdtemp(
+        prefix=".workbook-", dir=tmpdir
+    )
+    try:
+        (
+            workbook,
+            formats,
+            data_sheet,
+            readme_sheet,
+            metadata_sheet,
+            lists_sheet,
+        ) = _open_template_workbook(output_path, work_dir)
+        try:
+            row_count = _write_data_sheet(
+                data_sheet,
+                formats,
+                columns,
+                spec["metric_weights"],
+                input_rows,
+                on_progress,
+            )
+            _write_readme_sheet(
+                readme_sheet, formats, spec["readme_html"]
+            )
+            _write_metadata_sheet(
+                metadata_sheet,
+                formats,
+                spec,
+                columns,
+                row_count,
+                row_offset,
+            )
+            _write_lists_sheet(
+                lists_sheet,
+                formats,
+                spec["pass_threshold"],
+            )
+        except BaseException:
+            # Cancelled or failed: closing releases the temp files, and the
+            # partial workbook it assembles is dropped.
+            try:
+                workbook.close()
+            finally:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+            raise
+        workbook.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    logger.info(
+        f"Wrote evaluation template with {row_count} rows to {output_path}."
+    )
+    return row_count
\ No newline at end of file
@@ -0,0 +1,356 @@
+"""Ingestion of Step 7 uploads into the server-side segment store."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Iterator,
+    Tuple,
+)
+from .process_pools import submit_to_process_pool
+from .segment_store import (
+    SegmentStore,
+    UploadSummary,
+    get_segment_store,
+)
+from .upload_parsing import (
+    DEFAULT_PREVIEW_ROWS,
+    Row,
+    UploadDialect,
+    get_upload_dialect,
+    hash_upload_stream,
+    GZIP_ENCODING,
+    ZIP_ENCODING,
+    XlsxColumnChoice,
+    archive_member_names,
+    iter_archive_rows,
+    iter_parsed_rows,
+    sniff_upload_dialect,
+    split_preview,
+)
+
+logger = logging.getLogger(__name__)
+UPLOAD_PARSE_WORKERS_ENV = "LTX_UPLOAD_PARSE_WORKERS"
+ParsedUpload = Tuple[UploadSummary, List[Row]]
+
+
+def ingest_upload(
+    stream: BinaryIO,
+    file_name: str,
+    byte_size: int,
+    preview_rows: int = DEFAULT_PREVIEW_ROWS,
+    on_preview: Optional[
+        Callable[[List[Row]], None]
+    ] = None,
+    store: Optional[SegmentStore] = None,
+    dialect: Optional[UploadDialect] = None,
+    upload_id: Optional[str] = None,
+    xlsx_column: Optional[XlsxColumnChoice] = None,
+) -> Tuple[UploadSummary, List[Row]]:
+    """
+    Parses an upload straight into the segment store.
+    Returns the summary handle and the preview rows; only these two small
+    values are meant to be stored on the state. `on_preview` is called with
+    the preview rows before the remainder of the file is spooled. Without
+    a `dialect` the stream is sniffed first, so it must be seekable.
+    `xlsx_column` picks the sheet/column read from .xlsx uploads.
+
+    A .gz/.zip upload is decompressed member by member straight into the
+    parser. When a zip holds several files, a second spool with the member
+    name of every row is written for the File Name column; its id is
+    returned as `file_names_upload_id` on the summary.
+    """
+    store = store or get_segment_store()
+    upload_id = upload_id or uuid.uuid4().hex
+    dialect = dialect or sniff_upload_dialect(
+        stream, file_name
+    )
+    file_names_upload_id = None
+    member_runs: List[List[Any]] = []
+    if dialect["encoding"] in (GZIP_ENCODING, ZIP_ENCODING):
+        if len(archive_member_names(stream, file_name)) > 1:
+            file_names_upload_id = f"{upload_id}-file-names"
+        rows = _track_member_runs(
+            iter_archive_rows(
+                stream, file_name, xlsx_column
+            ),
+            member_runs,
+        )
+    else:
+        rows = iter_parsed_rows(
+            stream, file_name, dialect, xlsx_column
+        )
+    preview, rows = split_preview(rows, preview_rows)
+    if on_preview is not None:
+        on_preview(preview)
+    summary = store.write_rows(
+        rows,
+        file_name=file_name,
+        byte_size=byte_size,
+        encoding=dialect["encoding"],
+        upload_id=upload_id,
+        file_names_upload_id=file_names_upload_id,
+    )
+    if file_names_upload_id is not None:
+        store.write_rows(
+            (
+                [member_name]
+                for member_name, row_count in member_runs
+                for _ in range(row_count)
+            ),
+            file_name=f"{file_name} (member names)",
+            byte_size=0,
+            encoding=dialect["encoding"],
+            upload_id=file_names_upload_id,
+        )
+    return summary, preview
+
+
+def _track_member_runs(
+    member_rows: Iterator[Tuple[str, Row]],
+    member_runs: List[List[Any]],
+) -> Iterator[Row]:
+    """Passes rows through, recording [member name, row count] runs."""
+    for member_name, row in member_rows:
+        if (
+            member_runs
+            and member_runs[-1][0] == member_name
+        ):
+            member_runs[-1][1] += 1
+        else:
+            member_runs.append([member_name, 1])
+        yield row
+
+
+def parsed_upload_key(
+    content_hash: str,
+    dialect: UploadDialect,
+    xlsx_column: Optional[XlsxColumnChoice] = None,
+) -> str:
+    """Content-addressed upload id: the same bytes parsed the same way share a spool."""
+    delimiter = dialect["delimiter"]
+    delimiter_code = (
+        "none"
+        if delimiter is None
+        else f"{ord(delimiter):x}"
+    )
+    key = f"{content_hash}-{dialect['encoding']}-{delimiter_code}"
+    if xlsx_column is not None:
+        sheet_code = hashlib.blake2b(
+            xlsx_column["sheet_name"].encode("utf-8"),
+            digest_size=4,
+        ).hexdigest()
+        key += (
+            f"-{sheet_code}-{xlsx_column['column_index']}"
+        )
+    return key
+
+
+def _ingest_spooled_upload(
+    path: str,
+    file_name: str,
+    byte_size: int,
+    store_root: str,
+    store_max_bytes: int,
+    preview_rows: int,
+    dialect: UploadDialect,
+    upload_id: str,
+    xlsx_column: Optional[XlsxColumnChoice],
+) -> ParsedUpload:
+    """Worker entry point: parses a raw upload spooled to disk, then removes it."""
+    try:
+        with open(path, "rb") as stream:
+            return ingest_upload(
+                stream,
+                file_name,
+                byte_size,
+                preview_rows=preview_rows,
+                store=SegmentStore(
+                    store_root, store_max_bytes
+                ),
+                dialect=dialect,
+                upload_id=upload_id,
+                xlsx_column=xlsx_column,
+            )
+    finally:
+        os.remove(path)
+
+
+_pending_parses: Dict[
+    str, "asyncio.Future[ParsedUpload]"
+] = {}
+
+
+def _prepare_upload(
+    stream: BinaryIO,
+    file_name: str,
+    preview_rows: int,
+    store: SegmentStore,
+    xlsx_column: Optional[XlsxColumnChoice],
+) -> Tuple[
+    str,
+    UploadDialect,
+    Optional[UploadSummary],
+    List[Row],
+    Optional[str],
+]:
+    """
+    The blocking part of submit_upload_parse: hashes the upload and sniffs
+    its dialect, then reads the preview from the cached spool if the content
+    was parsed before, or parses it from the head of the upload and spools
+    the raw upload to disk for the worker. Returns the upload id, dialect,
+    cached summary, preview rows and the incoming spool path (None if
+    cached).
+    """
+    content_hash = hash_upload_stream(stream)
+    dialect = get_upload_dialect(
+        stream, file_name, content_hash
+    )
+    upload_id = parsed_upload_key(
+        content_hash, dialect, xlsx_column
+    )
+    cached = store.lookup(upload_id)
+    if (
+        cached is not None
+        and cached["file_names_upload_id"] is not None
+        and store.lookup(cached["file_names_upload_id"])
+        is None
+    ):
+        cached = None
+    if cached is not None:
+        preview = store.read_rows(
+            upload_id, 0, preview_rows
+        )
+        return upload_id, dialect, cached, preview, None
+    preview, _ = split_preview(
+        iter_parsed_rows(
+            stream, file_name, dialect, xlsx_column
+        ),
+        preview_rows,
+    )
+    stream.seek(0)
+    path = store.spool_incoming(stream)
+    return upload_id, dialect, None, preview, path
+
+
+async def submit_upload_parse(
+    job_key: str,
+    stream: BinaryIO,
+    file_name: str,
+    byte_size: int,
+    preview_rows: int = DEFAULT_PREVIEW_ROWS,
+    store: Optional[SegmentStore] = None,
+    xlsx_column: Optional[XlsxColumnChoice] = None,
+) -> List[Row]:
+    """
+    Queues an upload for parsing in the worker pool and returns its preview rows.
+    The upload is hashed and its dialect sniffed from a head sample (cached by
+    content hash). If the same content was parsed before, by any session, the
+    cached spool is reused and no parse is queued. Otherwise the raw upload is
+    spooled to disk for the worker process, and the preview is parsed from its
+    head right away. These reads of the whole upload run on a thread, so the
+    event loop stays free. `job_key` identifies the parse (e.g. client token +
+    column id) for join_upload_parses. For .xlsx uploads `xlsx_column` is the
+    choice made in the column picker (see list_xlsx_columns).
+    """
+    store = store or get_segment_store()
+    upload_id, dialect, cached, preview, path = (
+        await asyncio.to_thread(
+            _prepare_upload,
+            stream,
+            file_name,
+            preview_rows,
+            store,
+            xlsx_column,
+        )
+    )
+    cancel_upload_parse(job_key)
+    if cached is not None:
+        parsed = asyncio.get_running_loop().create_future()
+        parsed.set_result(
+            ({**cached, "file_name": file_name}, preview)
+        )
+        _pending_parses[job_key] = parsed
+        logger.info(
+            f"Upload '{file_name}' served from segment cache ({upload_id})."
+        )
+        return preview
+    _pending_parses[job_key] = asyncio.wrap_future(
+        submit_to_process_pool(
+            "upload_parse",
+            UPLOAD_PARSE_WORKERS_ENV,
+            3,
+            _ingest_spooled_upload,
+            path,
+            file_name,
+            byte_size,
+            store.root_dir,
+            store.max_bytes,
+            preview_rows,
+            dialect,
+            upload_id,
+            xlsx_column,
+        )
+    )
+    return preview
+
+
+def cancel_upload_parse(job_key: str):
+    """Forgets a pending parse, e.g. when its upload is cleared or replaced."""
+    pending = _pending_parses.pop(job_key, None)
+    if pending is not None:
+        pending.cancel()
+
+
+async def join_upload_parses(
+    job_keys: List[str],
+) -> Dict[str, UploadSummary]:
+    """
+    Waits for the given parses, which run concurrently, and returns their
+    summaries. Keys without a pending parse are skipped.
+    """
+    pending = {
+        key: _pending_parses[key]
+        for key in job_keys
+        if key in _pending_parses
+    }
+    results = await asyncio.gather(*pending.values())
+    for key in pending:
+        _pending_parses.pop(key, None)
+    return {
+        key: result[0]
+        for key, result in zip(pending.keys(), results)
+    }
+
+
+def row_count_mismatch_message(
+    summaries: Dict[str, UploadSummary],
+    column_names: Optional[Dict[str, str]] = None,
+) -> Optional[str]:
+    """
+    Checks that all input uploads have the same number of rows.
+    `summaries` is keyed by job key, as returned by join_upload_parses, and
+    `column_names` names the column of each job key for the message (the
+    job key itself if missing). Returns a user-facing error message, or
+    None if the counts line up.
+    """
+    column_names = column_names or {}
+    counts = {
+        summary["row_count"]
+        for summary in summaries.values()
+    }
+    if len(counts) <= 1:
+        return None
+    details = ", ".join(
+        f"{column_names.get(key, key)} '{summary['file_name']}': {summary['row_count']}"
+        for key, summary in summaries.items()
+    )
+    return f"Uploaded files have different row counts ({details}). Each input file must have one row per segment."
\ No newline at end of file
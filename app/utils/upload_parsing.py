@@ -0,0 +1,522 @@
+"""Streaming parsers for the Step 7 input uploads."""
+
+import codecs
+import csv
+import gzip
+import hashlib
+import itertools
+import logging
+import os
+import re
+import zipfile
+from collections import OrderedDict
+from typing import (
+    Any,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import openpyxl
+
+logger = logging.getLogger(__name__)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_PREVIEW_ROWS = 10
+DIALECT_SAMPLE_BYTES = 64 * 1024
+DIALECT_CACHE_SIZE = 256
+CANDIDATE_DELIMITERS = "\t,;|"
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+XLSX_ENCODING = "xlsx"
+GZIP_ENCODING = "gzip"
+ZIP_ENCODING = "zip"
+Row = List[str]
+_LINE_PATTERN = re.compile(
+    r"[^\r\n]*(?:\r\n|\n|\r)|[^\r\n]+$"
+)
+
+
+def iter_binary_chunks(
+    stream: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Reads a binary stream in fixed-size chunks."""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_decoded_text(
+    chunks: Iterable[bytes], encoding: str = "utf-8"
+) -> Iterator[str]:
+    """
+    Decodes byte chunks incrementally, so multi-byte characters
+    split across chunk boundaries are decoded correctly.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(
+        errors="replace"
+    )
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_text_lines(
+    text_chunks: Iterable[str],
+) -> Iterator[str]:
+    """Splits decoded text chunks into lines, keeping line endings for the csv reader."""
+    pending = ""
+    for text in text_chunks:
+        lines = _LINE_PATTERN.findall(pending + text)
+        # The last piece is either an unterminated line or a trailing "\r"
+        # whose "\n" may arrive with the next chunk.
+        pending = lines.pop() if lines else ""
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _trim_trailing_blank_rows(
+    rows: Iterable[Row],
+) -> Iterator[Row]:
+    """
+    Yields blank rows as empty segments, keeping row positions, except
+    for the run of blank rows at the end.
+    """
+    blank_rows = 0
+    for row in rows:
+        if not any(cell.strip() for cell in row):
+            blank_rows += 1
+            continue
+        for _ in range(blank_rows):
+            yield [""]
+        blank_rows = 0
+        yield row
+
+
+def iter_upload_rows(
+    stream: BinaryIO,
+    delimiter: Optional[str] = None,
+    encoding: str = "utf-8",
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Iterator[Row]:
+    """
+    Parses an uploaded .txt/.csv/.tsv stream into rows lazily.
+    With no delimiter every line is a single-cell row (.txt uploads). Blank
+    lines are kept as empty segments so parallel Source/Target files stay
+    aligned; only blank lines at the end of the file are dropped.
+    Only one chunk of the file is held in memory at a time.
+    """
+    lines = iter_text_lines(
+        iter_decoded_text(
+            iter_binary_chunks(stream, chunk_size), encoding
+        )
+    )
+    if delimiter is None:
+        rows: Iterator[Row] = (
+            [line.rstrip("\r\n")] for line in lines
+        )
+    else:
+        rows = (
+            row or [""]
+            for row in csv.reader(
+                lines, delimiter=delimiter
+            )
+        )
+    yield from _trim_trailing_blank_rows(rows)
+
+
+def delimiter_for_filename(filename: str) -> Optional[str]:
+    """Picks the delimiter implied by an upload's file extension."""
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return ","
+    if lowered.endswith(".tsv"):
+        return "\t"
+    return None
+
+
+class UploadDialect(TypedDict):
+    encoding: str
+    delimiter: Optional[str]
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Guesses the encoding of an upload from a head sample."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith(
+        (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+    ):
+        return "utf-16"
+    # BOM-less UTF-16 text has a NUL byte in every other position.
+    if len(sample) >= 4:
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        half = len(sample) // 2
+        if odd_nuls > half * 0.3 and even_nuls == 0:
+            return "utf-16-le"
+        if even_nuls > half * 0.3 and odd_nuls == 0:
+            return "utf-16-be"
+    try:
+        # The sample may end mid-character, so decode it as a partial stream.
+        codecs.getincrementaldecoder("utf-8")().decode(
+            sample
+        )
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def detect_delimiter(
+    text_sample: str, filename: str
+) -> Optional[str]:
+    """
+    The delimiter of an upload: a .csv or .tsv extension is trusted as is;
+    other text uploads are sniffed from a decoded head sample and read as
+    single-column lines unless the sniffed delimiter splits every sampled
+    line into the same number of columns. A 2-column split on anything but
+    a tab is rejected too, as it is more likely punctuation in the text.
+    """
+    implied = delimiter_for_filename(filename)
+    if implied is not None:
+        return implied
+    # Drop the (probably truncated) last line of the sample.
+    complete_lines = text_sample[
+        : max(
+            text_sample.rfind("\n"), text_sample.rfind("\r")
+        )
+        + 1
+    ]
+    if not complete_lines:
+        return None
+    try:
+        delimiter = (
+            csv.Sniffer()
+            .sniff(
+                complete_lines,
+                delimiters=CANDIDATE_DELIMITERS,
+            )
+            .delimiter
+        )
+    except csv.Error:
+        return None
+    widths = {
+        len(row)
+        for row in csv.reader(
+            complete_lines.splitlines(), delimiter=delimiter
+        )
+        if any(cell.strip() for cell in row)
+    }
+    if len(widths) != 1:
+        return None
+    width = widths.pop()
+    if width < 2 or (width == 2 and delimiter != "\t"):
+        return None
+    return delimiter
+
+
+def sniff_upload_dialect(
+    stream: BinaryIO, filename: str
+) -> UploadDialect:
+    """
+    Detects encoding and delimiter from the first DIALECT_SAMPLE_BYTES of a
+    seekable upload stream, then rewinds it.
+    """
+    if is_xlsx_filename(filename):
+        return {
+            "encoding": XLSX_ENCODING,
+            "delimiter": None,
+        }
+    archive_encoding = archive_encoding_for_filename(
+        filename
+    )
+    if archive_encoding is not None:
+        # Archive members are sniffed one by one as they are decompressed.
+        return {
+            "encoding": archive_encoding,
+            "delimiter": None,
+        }
+    sample = stream.read(DIALECT_SAMPLE_BYTES)
+    stream.seek(0)
+    encoding = detect_encoding(sample)
+    text_sample = codecs.getincrementaldecoder(encoding)(
+        errors="replace"
+    ).decode(sample)
+    return {
+        "encoding": encoding,
+        "delimiter": detect_delimiter(
+            text_sample, filename
+        ),
+    }
+
+
+_dialect_cache: "OrderedDict[str, UploadDialect]" = (
+    OrderedDict()
+)
+
+
+def get_upload_dialect(
+    stream: BinaryIO, filename: str, content_hash: str
+) -> UploadDialect:
+    """
+    Returns the dialect of an upload, sniffing it only the first time a
+    given content hash (and file extension) is seen.
+    """
+    cache_key = f"{content_hash}:{delimiter_for_filename(filename)!r}"
+    cached = _dialect_cache.get(cache_key)
+    if cached is not None:
+        _dialect_cache.move_to_end(cache_key)
+        return cached
+    dialect = sniff_upload_dialect(stream, filename)
+    _dialect_cache[cache_key] = dialect
+    if len(_dialect_cache) > DIALECT_CACHE_SIZE:
+        _dialect_cache.popitem(last=False)
+    return dialect
+
+
+def hash_upload_stream(
+    stream: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> str:
+    """Fingerprints a seekable upload stream's contents, then rewinds it."""
+    hasher = hashlib.blake2b(digest_size=20)
+    for chunk in iter_binary_chunks(stream, chunk_size):
+        hasher.update(chunk)
+    stream.seek(0)
+    return hasher.hexdigest()
+
+
+def is_xlsx_filename(filename: str) -> bool:
+    """Checks whether an upload is an Excel workbook."""
+    return filename.lower().endswith(XLSX_EXTENSIONS)
+
+
+class XlsxColumnChoice(TypedDict):
+    sheet_name: str
+    column_index: int
+
+
+class XlsxColumnOption(TypedDict):
+    label: str
+    sheet_name: str
+    column_index: int
+
+
+def _xlsx_cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def list_xlsx_columns(
+    stream: BinaryIO,
+) -> List[XlsxColumnOption]:
+    """
+    Lists every sheet/column of a workbook for the column picker, labelled
+    by the column's header (first row). Only the first row of each sheet is read.
+    """
+    workbook = openpyxl.load_workbook(
+        stream, read_only=True, data_only=True
+    )
+    options: List[XlsxColumnOption] = []
+    try:
+        for worksheet in workbook.worksheets:
+            header = next(
+                worksheet.iter_rows(
+                    max_row=1, values_only=True
+                ),
+                (),
+            )
+            for column_index, value in enumerate(header):
+                name = _xlsx_cell_text(value).strip()
+                if not name:
+                    continue
+                label = (
+                    f"{worksheet.title} › {name}"
+                    if len(workbook.worksheets) > 1
+                    else name
+                )
+                options.append(
+                    {
+                        "label": label,
+                        "sheet_name": worksheet.title,
+                        "column_index": column_index,
+                    }
+                )
+    finally:
+        workbook.close()
+        stream.seek(0)
+    return options
+
+
+def iter_xlsx_rows(
+    stream: BinaryIO,
+    column: Optional[XlsxColumnChoice] = None,
+) -> Iterator[Row]:
+    """
+    Streams one column of a workbook as single-cell rows, skipping the header
+    row. Uses openpyxl's read-only mode so rows are parsed lazily from the
+    sheet XML instead of loading the whole workbook. Without a column choice
+    the first column of the first sheet is used. Blank cells are kept as
+    empty segments, except at the end of the column.
+    """
+    workbook = openpyxl.load_workbook(
+        stream, read_only=True, data_only=True
+    )
+    try:
+        if column is None:
+            worksheet = workbook.worksheets[0]
+            column_number = 1
+        else:
+            worksheet = workbook[column["sheet_name"]]
+            column_number = column["column_index"] + 1
+        yield from _trim_trailing_blank_rows(
+            [_xlsx_cell_text(value)]
+            for (value,) in worksheet.iter_rows(
+                min_row=2,
+                min_col=column_number,
+                max_col=column_number,
+                values_only=True,
+            )
+        )
+    finally:
+        workbook.close()
+
+
+def archive_encoding_for_filename(
+    filename: str,
+) -> Optional[str]:
+    """Returns the archive format of a .gz/.zip upload, or None for plain files."""
+    lowered = filename.lower()
+    if lowered.endswith(".gz"):
+        return GZIP_ENCODING
+    if lowered.endswith(".zip"):
+        return ZIP_ENCODING
+    return None
+
+
+def _is_data_member(info: zipfile.ZipInfo) -> bool:
+    base_name = os.path.basename(info.filename)
+    return (
+        not info.is_dir()
+        and not base_name.startswith(".")
+        and not info.filename.startswith("__MACOSX/")
+    )
+
+
+def archive_member_names(
+    stream: BinaryIO, filename: str
+) -> List[str]:
+    """
+    Lists the data files inside a .gz/.zip upload without decompressing them
+    (a zip's central directory is read; a .gz always holds one file).
+    """
+    archive_encoding = archive_encoding_for_filename(
+        filename
+    )
+    if archive_encoding == GZIP_ENCODING:
+        return [filename[: -len(".gz")]]
+    if archive_encoding == ZIP_ENCODING:
+        with zipfile.ZipFile(stream) as archive:
+            names = [
+                info.filename
+                for info in archive.infolist()
+                if _is_data_member(info)
+            ]
+        stream.seek(0)
+        return names
+    return [filename]
+
+
+def iter_archive_members(
+    stream: BinaryIO, filename: str
+) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Yields (member name, decompressing stream) for each data file in a
+    .gz/.zip upload. Members are decompressed lazily as they are read, never
+    extracted to memory or disk. Plain uploads yield themselves.
+    """
+    archive_encoding = archive_encoding_for_filename(
+        filename
+    )
+    if archive_encoding == GZIP_ENCODING:
+        with gzip.GzipFile(
+            fileobj=stream, mode="rb"
+        ) as member:
+            yield filename[: -len(".gz")], member
+    elif archive_encoding == ZIP_ENCODING:
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if not _is_data_member(info):
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member
+    else:
+        yield filename, stream
+
+
+def iter_archive_rows(
+    stream: BinaryIO,
+    filename: str,
+    xlsx_column: Optional[XlsxColumnChoice] = None,
+) -> Iterator[Tuple[str, Row]]:
+    """
+    Streams rows out of every member of a .gz/.zip upload, tagged with the
+    member name. Each member's dialect is sniffed from its own head sample.
+    """
+    for member_name, member in iter_archive_members(
+        stream, filename
+    ):
+        dialect = sniff_upload_dialect(member, member_name)
+        for row in iter_parsed_rows(
+            member, member_name, dialect, xlsx_column
+        ):
+            yield member_name, row
+
+
+def iter_parsed_rows(
+    stream: BinaryIO,
+    filename: str,
+    dialect: UploadDialect,
+    xlsx_column: Optional[XlsxColumnChoice] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Iterator[Row]:
+    """Parses an upload with the row parser matching its dialect."""
+    if dialect["encoding"] in (GZIP_ENCODING, ZIP_ENCODING):
+        return (
+            row
+            for _, row in iter_archive_rows(
+                stream, filename, xlsx_column
+            )
+        )
+    if dialect["encoding"] == XLSX_ENCODING:
+        return iter_xlsx_rows(stream, xlsx_column)
+    return iter_upload_rows(
+        stream,
+        dialect["delimiter"],
+        dialect["encoding"],
+        chunk_size,
+    )
+
+
+def split_preview(
+    rows: Iterator[Row],
+    preview_rows: int = DEFAULT_PREVIEW_ROWS,
+) -> Tuple[List[Row], Iterator[Row]]:
+    """
+    Pulls the first rows for the preview table off a row iterator.
+    Returns the preview rows and an iterator over the full row stream
+    (preview rows included), so the caller can show the preview as soon
+    as the first chunk is parsed and keep consuming the rest.
+    """
+    preview = list(itertools.islice(rows, preview_rows))
+    return preview, itertools.chain(preview, rows)
\ No newline at end of file
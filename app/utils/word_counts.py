@@ -0,0 +1,160 @@
+"""
+Server-side source word counts, written as static values in place of the
+per-row Word Count formula.
+
+Counts are computed in one pass over a spooled Source upload and spooled
+back into the segment store next to it, so each upload is counted once per
+counting rule. Space-delimited languages are counted exactly as the default
+Excel formula counts them (see count_words); Japanese, Chinese and Korean
+count CJK characters, plus any embedded Latin words or numbers.
+"""
+
+import logging
+import re
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    Literal,
+    Optional,
+)
+from .segment_store import (
+    SegmentStore,
+    UploadSummary,
+    get_segment_store,
+    segment_text,
+)
+
+if TYPE_CHECKING:
+    from .template_writer import TemplateSpec
+
+logger = logging.getLogger(__name__)
+CJK_LANGUAGES = {"Japanese", "Chinese", "Korean"}
+WordCountRule = Literal["space", "cjk"]
+# Bump when a counting rule changes, so stale count spools are not reused.
+_COUNTS_VERSION = 2
+_CJK_RANGES = (
+    "\u1100-\u11ff"  # Hangul jamo
+    "\u3040-\u30ff"  # Hiragana, Katakana
+    "\u3130-\u318f"  # Hangul compatibility jamo
+    "\u3400-\u4dbf"  # CJK extension A
+    "\u4e00-\u9fff"  # CJK unified ideographs
+    "\uac00-\ud7af"  # Hangul syllables
+    "\uf900-\ufaff"  # CJK compatibility ideographs
+    "\uff66-\uff9f"  # Half-width Katakana
+    "\U00020000-\U0002ffff"  # CJK extensions B+
+)
+_CJK_TOKEN_PATTERN = re.compile(
+    f"[{_CJK_RANGES}]|[^\\W{_CJK_RANGES}]+"
+)
+
+
+def word_count_rule(
+    language: Optional[str],
+) -> WordCountRule:
+    """Counting rule for a source language."""
+    return "cjk" if language in CJK_LANGUAGES else "space"
+
+
+def count_words(
+    text: str, rule: WordCountRule = "space"
+) -> int:
+    """
+    Word count of one segment under the given rule. The space rule matches
+    default_word_count_formula: only spaces separate words (TRIM strips and
+    collapses spaces, not tabs or newlines), an empty cell counts 0 and a
+    cell of spaces only counts 1.
+    """
+    if rule == "cjk":
+        return len(_CJK_TOKEN_PATTERN.findall(text))
+    if not text:
+        return 0
+    return sum(1 for word in text.split(" ") if word) or 1
+
+
+def iter_word_counts(
+    texts: Iterable[str], rule: WordCountRule = "space"
+) -> Iterator[int]:
+    """Counts a stream of segments without materializing it."""
+    for text in texts:
+        yield count_words(text, rule)
+
+
+def word_counts_upload_id(
+    source_upload_id: str, rule: WordCountRule
+) -> str:
+    return f"{source_upload_id}-word-counts-{rule}-v{_COUNTS_VERSION}"
+
+
+def precompute_word_counts(
+    source_upload_id: str,
+    language: Optional[str],
+    store: Optional[SegmentStore] = None,
+) -> UploadSummary:
+    """
+    Counts the words of every row of a spooled Source upload and spools the
+    counts (one single-cell row per segment) into the store. Returns the
+    summary of the counts spool; an existing spool is reused.
+    """
+    store = store or get_segment_store()
+    rule = word_count_rule(language)
+    counts_upload_id = word_counts_upload_id(
+        source_upload_id, rule
+    )
+    cached = store.lookup(counts_upload_id)
+    if cached is not None:
+        return cached
+    source = store.get_summary(source_upload_id)
+    if source is None:
+        raise KeyError(
+            f"Source upload {source_upload_id} is no longer in the segment store."
+        )
+    counts = iter_word_counts(
+        (
+            segment_text(row)
+            for row in store.iter_rows(source_upload_id)
+        ),
+        rule,
+    )
+    summary = store.write_rows(
+        ([str(count)] for count in counts),
+        file_name=f"{source['file_name']} (word counts)",
+        byte_size=0,
+        encoding="utf-8",
+        upload_id=counts_upload_id,
+    )
+    logger.info(
+        f"Precomputed {rule} word counts for {summary['row_count']} rows of '{source['file_name']}'."
+    )
+    return summary
+
+
+def with_precomputed_word_counts(
+    spec: "TemplateSpec",
+    language: Optional[str],
+    store: Optional[SegmentStore] = None,
+) -> "TemplateSpec":
+    """
+    Returns a copy of the spec whose Word Count column(s) are filled from
+    precomputed static counts of the Source upload instead of a formula.
+    The spec is returned unchanged when no Source upload is assigned.
+    """
+    column_ids_by_name = {
+        col.get("name"): str(col["id"])
+        for col in spec["columns"]
+    }
+    source_upload_id = spec["input_uploads"].get(
+        column_ids_by_name.get("Source", "")
+    )
+    if source_upload_id is None:
+        return spec
+    counts = precompute_word_counts(
+        source_upload_id, language, store
+    )
+    input_uploads = dict(spec["input_uploads"])
+    for col in spec["columns"]:
+        if col.get("is_word_count_column"):
+            input_uploads[str(col["id"])] = counts[
+                "upload_id"
+            ]
+    return {**spec, "input_uploads": input_uploads}
\ No newline at end of file
@@ -0,0 +1,622 @@
+"""
+Benchmarks of the file-prep pipeline on synthetic uploads.
+
+Generates Source, Target and File Name uploads of a given size in a Latin
+(English to German) or CJK (Japanese to English) script, then times each
+stage of the pipeline on them: upload parsing, preview pages, word counting,
+formula evaluation and template writing with xlsxwriter and openpyxl. Each
+stage runs once for timing and, unless --no-memory is given, once more
+under tracemalloc for its peak Python allocation. Results are written as
+JSON so runs of different releases can be compared.
+
+    python -m benchmarks.file_prep_benchmark --sizes 1k,100k --output bench.json
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib import metadata
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+import numpy as np
+import openpyxl
+from app.utils.formula_engine import (
+    compile_formula,
+    evaluate_formula,
+)
+from app.utils.preview_pages import load_preview_page
+from app.utils.segment_store import (
+    SegmentStore,
+    segment_text,
+)
+from app.utils.template_writer import (
+    FormulaRowTemplate,
+    TemplateSpec,
+    _iter_input_rows,
+    resolve_column_formulas,
+    write_evaluation_template,
+)
+from app.utils.upload_ingest import ingest_upload
+from app.utils.word_counts import (
+    precompute_word_counts,
+    word_count_rule,
+    word_counts_upload_id,
+)
+
+logger = logging.getLogger(__name__)
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# Source and target language of each synthetic script.
+SCRIPTS = {
+    "latin": ("English", "German"),
+    "cjk": ("Japanese", "English"),
+}
+STAGES = (
+    "upload_parse",
+    "preview",
+    "word_count",
+    "formula_eval",
+    "xlsx_xlsxwriter",
+    "xlsx_openpyxl",
+)
+PREVIEW_PAGES = 20
+PREVIEW_PAGE_SIZE = 50
+ROWS_PER_FILE_NAME = 500
+_LATIN_WORDS = (
+    "the quick brown fox jumps over a lazy dog while "
+    "translation quality depends on context terminology "
+    "and style so every segment is reviewed by two "
+    "evaluators before release notes are published for "
+    "users in each supported market"
+).split()
+# Hiragana and the first block of CJK unified ideographs.
+_CJK_CHARACTERS = [
+    chr(code) for code in range(0x3041, 0x3094)
+] + [chr(code) for code in range(0x4E00, 0x4E00 + 600)]
+_CJK_FULL_STOP = "。"
+BENCHMARK_COLUMNS: List[dict] = [
+    {
+        "id": "file_name",
+        "name": "File Name",
+        "group": "Input",
+        "requires_upload": True,
+    },
+    {
+        "id": "source",
+        "name": "Source",
+        "group": "Input",
+        "requires_upload": True,
+    },
+    {
+        "id": "target",
+        "name": "Target",
+        "group": "Input",
+        "requires_upload": True,
+    },
+    {
+        "id": "word_count",
+        "name": "Word Count (Source)",
+        "group": "Pre-Evaluation",
+        "is_word_count_column": True,
+    },
+    {
+        "id": "accuracy",
+        "name": "Accuracy",
+        "group": "Scoring",
+    },
+    {
+        "id": "fluency",
+        "name": "Fluency",
+        "group": "Scoring",
+    },
+    {
+        "id": "overall",
+        "name": "Overall Score",
+        "group": "Calculated Score",
+        "metric_type": "overall",
+    },
+    {
+        "id": "comments",
+        "name": "General Comments",
+        "group": "Freeform",
+    },
+]
+BENCHMARK_WEIGHTS = {"Accuracy": 5, "Fluency": 3}
+
+
+class StageResult(TypedDict):
+    size: str
+    script: str
+    stage: str
+    rows: int
+    seconds: float
+    rows_per_second: float
+    peak_memory_bytes: Optional[int]
+    output_bytes: Optional[int]
+
+
+def iter_latin_segments(
+    rows: int, rng: random.Random
+) -> Iterator[str]:
+    for _ in range(rows):
+        words = rng.choices(
+            _LATIN_WORDS, k=rng.randint(4, 30)
+        )
+        yield " ".join(words).capitalize() + "."
+
+
+def iter_cjk_segments(
+    rows: int, rng: random.Random
+) -> Iterator[str]:
+    for _ in range(rows):
+        yield "".join(
+            rng.choices(
+                _CJK_CHARACTERS, k=rng.randint(8, 60)
+            )
+        ) + _CJK_FULL_STOP
+
+
+def iter_file_names(rows: int) -> Iterator[str]:
+    for row in range(rows):
+        yield f"document_{row // ROWS_PER_FILE_NAME:05d}.txt"
+
+
+def _segments_for(
+    language: str, rows: int, seed: int
+) -> Iterator[str]:
+    rng = random.Random(f"{seed}-{language}")
+    if word_count_rule(language) == "cjk":
+        return iter_cjk_segments(rows, rng)
+    return iter_latin_segments(rows, rng)
+
+
+def write_synthetic_inputs(
+    work_dir: str, script: str, rows: int, seed: int
+) -> Dict[str, str]:
+    """Writes the one-segment-per-line input files; returns their paths by column id."""
+    source_language, target_language = SCRIPTS[script]
+    generators = {
+        "file_name": iter_file_names(rows),
+        "source": _segments_for(
+            source_language, rows, seed
+        ),
+        "target": _segments_for(
+            target_language, rows, seed
+        ),
+    }
+    paths = {}
+    for column_id, segments in generators.items():
+        path = os.path.join(
+            work_dir, f"{script}_{rows}_{column_id}.txt"
+        )
+        with open(path, "w", encoding="utf-8") as handle:
+            for segment in segments:
+                handle.write(segment + "\n")
+        paths[column_id] = path
+    return paths
+
+
+def _measure(
+    run: Callable[[], Any], trace_memory: bool
+) -> Tuple[Any, float, Optional[int]]:
+    """Runs a stage; returns its result, wall time and, if traced, peak allocation."""
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        result = run()
+        seconds = time.perf_counter() - started
+        peak = (
+            tracemalloc.get_traced_memory()[1]
+            if trace_memory
+            else None
+        )
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+class _PipelineRun:
+    """The inputs and stage functions for one size and script."""
+
+    def __init__(
+        self,
+        work_dir: str,
+        script: str,
+        rows: int,
+        seed: int,
+    ):
+        self.work_dir = work_dir
+        self.script = script
+        self.rows = rows
+        self.source_language = SCRIPTS[script][0]
+        self.store = SegmentStore(
+            os.path.join(work_dir, "segments"),
+            max_bytes=1 << 62,
+        )
+        self.input_paths = write_synthetic_inputs(
+            work_dir, script, rows, seed
+        )
+        self.input_uploads: Dict[str, str] = {}
+        self.formulas = resolve_column_formulas(
+            BENCHMARK_COLUMNS, BENCHMARK_WEIGHTS
+        )
+
+    def spec(self) -> TemplateSpec:
+        return {
+            "columns": BENCHMARK_COLUMNS,
+            "input_uploads": self.input_uploads,
+            "metric_weights": BENCHMARK_WEIGHTS,
+            "pass_threshold": 3.5,
+            "readme_html": "<p>Benchmark template</p>",
+            "metadata": {
+                "Source Language": self.source_language
+            },
+            "word_count_mode": "formula",
+        }
+
+    def upload_parse(self) -> None:
+        for column_id, path in self.input_paths.items():
+            with open(path, "rb") as stream:
+                summary, _ = ingest_upload(
+                    stream,
+                    os.path.basename(path),
+                    os.path.getsize(path),
+                    store=self.store,
+                )
+            previous = self.input_uploads.get(column_id)
+            if previous is not None:
+                self.store.delete(previous)
+            self.input_uploads[column_id] = summary[
+                "upload_id"
+            ]
+
+    def preview(self) -> None:
+        """Loads pages spread evenly over the rows, as a user paging through would."""
+        sources = {
+            str(col["name"]): self.input_uploads[
+                str(col["id"])
+            ]
+            for col in BENCHMARK_COLUMNS
+            if str(col["id"]) in self.input_uploads
+        }
+        headers = [
+            str(col["name"]) for col in BENCHMARK_COLUMNS
+        ]
+        layout = [
+            str(col["id"]) for col in BENCHMARK_COLUMNS
+        ]
+        last_start = max(self.rows - PREVIEW_PAGE_SIZE, 0)
+        for page in range(PREVIEW_PAGES):
+            load_preview_page(
+                sources,
+                headers,
+                last_start * page // (PREVIEW_PAGES - 1),
+                PREVIEW_PAGE_SIZE,
+                layout,
+                self.formulas,
+                self.store,
+            )
+
+    def word_count(self) -> None:
+        source_upload_id = self.input_uploads["source"]
+        self.store.delete(
+            word_counts_upload_id(
+                source_upload_id,
+                word_count_rule(self.source_language),
+            )
+        )
+        precompute_word_counts(
+            source_upload_id,
+            self.source_language,
+            self.store,
+        )
+
+    def formula_arrays(self) -> Dict[str, np.ndarray]:
+        """Full-column inputs for formula_eval, with random scores for the scoring columns."""
+        rng = np.random.default_rng(self.rows)
+        arrays = {
+            "source": np.array(
+                [
+                    segment_text(row)
+                    for row in self.store.iter_rows(
+                        self.input_uploads["source"]
+                    )
+                ],
+                dtype=object,
+            )
+        }
+        for column_id in ("accuracy", "fluency"):
+            arrays[column_id] = rng.integers(
+                1, 6, self.rows
+            ).astype(float)
+        return arrays
+
+    def formula_eval(
+        self, arrays: Dict[str, np.ndarray]
+    ) -> None:
+        for formula in self.formulas.values():
+            compiled = compile_formula(
+                formula, BENCHMARK_COLUMNS
+            )
+            evaluate_formula(compiled, arrays, self.rows)
+
+    def xlsx_xlsxwriter(self) -> int:
+        path = os.path.join(
+            self.work_dir, "template_xlsxwriter.xlsx"
+        )
+        write_evaluation_template(
+            path,
+            self.spec(),
+            store=self.store,
+            tmpdir=self.work_dir,
+        )
+        return os.path.getsize(path)
+
+    def xlsx_openpyxl(self) -> int:
+        """The same data sheet written with openpyxl's write-only mode, for comparison."""
+        path = os.path.join(
+            self.work_dir, "template_openpyxl.xlsx"
+        )
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Evaluation")
+        sheet.append(
+            [str(col["name"]) for col in BENCHMARK_COLUMNS]
+        )
+        templates = {
+            column_id: FormulaRowTemplate(formula)
+            for column_id, formula in self.formulas.items()
+        }
+        for row_offset, input_row in enumerate(
+            _iter_input_rows(
+                self.input_uploads,
+                self.store,
+            )
+        ):
+            sheet.append(
+                [
+                    (
+                        input_row[str(col["id"])]
+                        if str(col["id"]) in input_row
+                        else (
+                            templates[
+                                str(col["id"])
+                            ].render(row_offset)
+                            if str(col["id"]) in templates
+                            else None
+                        )
+                    )
+                    for col in BENCHMARK_COLUMNS
+                ]
+            )
+        workbook.save(path)
+        return os.path.getsize(path)
+
+
+def run_benchmarks(
+    sizes: List[str],
+    scripts: List[str],
+    stages: List[str],
+    trace_memory: bool = True,
+    seed: int = 0,
+    work_dir: Optional[str] = None,
+) -> List[StageResult]:
+    """Runs the selected stages for every size and script; returns one result per stage."""
+    results: List[StageResult] = []
+    for size in sizes:
+        for script in scripts:
+            run_dir = tempfile.mkdtemp(
+                prefix=f"ltx-bench-{size}-{script}-",
+                dir=work_dir,
+            )
+            try:
+                results.extend(
+                    _run_pipeline(
+                        _PipelineRun(
+                            run_dir,
+                            script,
+                            SIZES[size],
+                            seed,
+                        ),
+                        size,
+                        stages,
+                        trace_memory,
+                    )
+                )
+            finally:
+                shutil.rmtree(run_dir, ignore_errors=True)
+    return results
+
+
+def _run_pipeline(
+    run: _PipelineRun,
+    size: str,
+    stages: List[str],
+    trace_memory: bool,
+) -> Iterator[StageResult]:
+    # Later stages read the spooled uploads, so parsing always runs first.
+    if "upload_parse" not in stages:
+        run.upload_parse()
+    arrays: Dict[str, np.ndarray] = {}
+    stage_runs: Dict[str, Callable[[], Any]] = {
+        "upload_parse": run.upload_parse,
+        "preview": run.preview,
+        "word_count": run.word_count,
+        "formula_eval": lambda: run.formula_eval(arrays),
+        "xlsx_xlsxwriter": run.xlsx_xlsxwriter,
+        "xlsx_openpyxl": run.xlsx_openpyxl,
+    }
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        if stage == "formula_eval":
+            # Reading the columns into arrays is not part of the stage.
+            arrays.update(run.formula_arrays())
+        output_bytes, seconds, _ = _measure(
+            stage_runs[stage], False
+        )
+        peak = (
+            _measure(stage_runs[stage], True)[2]
+            if trace_memory
+            else None
+        )
+        rows = (
+            PREVIEW_PAGES * PREVIEW_PAGE_SIZE
+            if stage == "preview"
+            else run.rows
+        )
+        logger.info(
+            f"{size}/{run.script} {stage}: {seconds:.3f}s"
+            + (
+                f", peak {peak / 1e6:.1f} MB"
+                if peak
+                else ""
+            )
+        )
+        yield {
+            "size": size,
+            "script": run.script,
+            "stage": stage,
+            "rows": rows,
+            "seconds": round(seconds, 4),
+            "rows_per_second": round(
+                rows / seconds if seconds > 0 else 0.0, 1
+            ),
+            "peak_memory_bytes": peak,
+            "output_bytes": (
+                output_bytes
+                if isinstance(output_bytes, int)
+                else None
+            ),
+        }
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _split_choices(
+    value: str, choices: List[str]
+) -> List[str]:
+    selected = [
+        item.strip().lower()
+        for item in value.split(",")
+        if item.strip()
+    ]
+    unknown = [
+        item for item in selected if item not in choices
+    ]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"Unknown choice(s) {', '.join(unknown)}; expected {', '.join(choices)}."
+        )
+    return selected
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the file-prep pipeline on synthetic uploads."
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1k,100k",
+        type=lambda value: _split_choices(
+            value, list(SIZES)
+        ),
+        help=f"Comma-separated row counts: {', '.join(SIZES)}.",
+    )
+    parser.add_argument(
+        "--scripts",
+        default=",".join(SCRIPTS),
+        type=lambda value: _split_choices(
+            value, list(SCRIPTS)
+        ),
+        help=f"Comma-separated scripts: {', '.join(SCRIPTS)}.",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        type=lambda value: _split_choices(
+            value, list(STAGES)
+        ),
+        help=f"Comma-separated stages: {', '.join(STAGES)}.",
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark-results.json",
+        help="Where to write the JSON results.",
+    )
+    parser.add_argument(
+        "--work-dir",
+        default=None,
+        help="Directory for the synthetic uploads and outputs (default: system temp).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the tracemalloc pass of each stage.",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(message)s"
+    )
+    logging.getLogger("app").setLevel(logging.WARNING)
+    started_at = datetime.datetime.now(
+        datetime.timezone.utc
+    ).isoformat()
+    results = run_benchmarks(
+        args.sizes,
+        args.scripts,
+        args.stages,
+        trace_memory=not args.no_memory,
+        seed=args.seed,
+        work_dir=args.work_dir,
+    )
+    report = {
+        "started_at": started_at,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {
+            name: _package_version(name)
+            for name in (
+                "xlsxwriter",
+                "openpyxl",
+                "numpy",
+                "reflex",
+            )
+        },
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    logger.info(
+        f"Wrote {len(results)} results to {args.output}."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
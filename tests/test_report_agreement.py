@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from app.utils.report_agreement import (
+    krippendorff_alpha,
+    pairwise_cohen_kappa,
+)
+
+# Reliability data of Krippendorff (2011), "Computing Krippendorff's
+# Alpha-Reliability": 4 observers, 12 units, None for a missing value.
+KRIPPENDORFF_DATA = [
+    [1, 2, 3, 3, 2, 1, 4, 1, 2, None, None, None],
+    [1, 2, 3, 3, 2, 2, 4, 1, 2, 5, None, 3],
+    [None, 3, 3, 3, 2, 3, 4, 2, 2, 5, 1, None],
+    [1, 2, 3, 3, 2, 4, 4, 1, 2, 5, 1, None],
+]
+
+
+def _ratings(matrix):
+    raters, items, values = [], [], []
+    for rater, row in enumerate(matrix):
+        for item, value in enumerate(row):
+            if value is not None:
+                raters.append(rater)
+                items.append(item)
+                values.append(value)
+    return (
+        np.array(raters),
+        np.array(items),
+        np.array(values, dtype=np.float64),
+    )
+
+
+@pytest.mark.parametrize(
+    "level, expected",
+    [("nominal", 0.743), ("interval", 0.849)],
+)
+def test_krippendorff_alpha_matches_the_published_values(
+    level, expected
+):
+    _, items, values = _ratings(KRIPPENDORFF_DATA)
+    assert krippendorff_alpha(
+        items, values, level
+    ) == pytest.approx(expected, abs=5e-4)
+
+
+def test_krippendorff_alpha_is_undefined_without_variation():
+    _, items, values = _ratings([[3, 3, 3], [3, 3, 3]])
+    assert np.isnan(krippendorff_alpha(items, values))
+    _, items, values = _ratings(
+        [[1, 2, None], [None, None, 3]]
+    )
+    assert np.isnan(krippendorff_alpha(items, values))
+
+
+def _two_raters(counts):
+    """Ratings of two raters from a 2 x 2 table of yes/no counts."""
+    first, second = [], []
+    for (a, b), count in counts.items():
+        first += [a] * count
+        second += [b] * count
+    return [first, second]
+
+
+def test_cohen_kappa_of_a_textbook_table():
+    # 50 items: both yes 20, both no 15, one each way 5 and 10;
+    # p_o = 0.7, p_e = 0.5, kappa = 0.4.
+    matrix = _two_raters(
+        {(1, 1): 20, (1, 0): 5, (0, 1): 10, (0, 0): 15}
+    )
+    kappa, pairs = pairwise_cohen_kappa(*_ratings(matrix))
+    assert pairs == 1
+    assert kappa == pytest.approx(0.4)
+
+
+def test_light_kappa_averages_the_rater_pairs():
+    rng = np.random.default_rng(3)
+    matrix = rng.integers(1, 4, (3, 40)).tolist()
+    matrix[2][:5] = [None] * 5
+    kappa, pairs = pairwise_cohen_kappa(*_ratings(matrix))
+    expected = []
+    for first, second in [(0, 1), (0, 2), (1, 2)]:
+        shared = [
+            (matrix[first][i], matrix[second][i])
+            for i in range(40)
+            if matrix[second][i] is not None
+        ]
+        observed = np.mean([a == b for a, b in shared])
+        chance = sum(
+            np.mean([a == value for a, _ in shared])
+            * np.mean([b == value for _, b in shared])
+            for value in (1, 2, 3)
+        )
+        expected.append((observed - chance) / (1 - chance))
+    assert pairs == 3
+    assert kappa == pytest.approx(np.mean(expected))
+
+
+def test_cohen_kappa_is_undefined_without_shared_items():
+    kappa, pairs = pairwise_cohen_kappa(
+        *_ratings([[1, 2, None, None], [None, None, 1, 2]])
+    )
+    assert np.isnan(kappa)
+    assert pairs == 0
\ No newline at end of file
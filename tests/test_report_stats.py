@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from app.utils import report_stats
+from app.utils.report_stats import (
+    _bootstrap_in_worker,
+    paired_bootstrap,
+)
+
+
+def _scores(seed=7, count=300):
+    rng = np.random.default_rng(seed)
+    scores_a = rng.integers(1, 6, count).astype(np.float64)
+    scores_b = np.clip(
+        scores_a - rng.integers(-1, 3, count), 1, 5
+    ).astype(np.float64)
+    return scores_a, scores_b
+
+
+def test_same_seed_gives_the_same_intervals():
+    scores_a, scores_b = _scores()
+    first = _bootstrap_in_worker(
+        scores_a, scores_b, 2000, 0.95, (12, 3)
+    )
+    second = _bootstrap_in_worker(
+        scores_a, scores_b, 2000, 0.95, (12, 3)
+    )
+    other = _bootstrap_in_worker(
+        scores_a, scores_b, 2000, 0.95, (12, 4)
+    )
+    assert first == second
+    assert first != other
+
+
+def test_intervals_do_not_depend_on_the_chunk_size(
+    monkeypatch,
+):
+    scores_a, scores_b = _scores()
+    whole = paired_bootstrap(
+        scores_a,
+        scores_b,
+        1000,
+        rng=np.random.default_rng(5),
+    )
+    monkeypatch.setattr(
+        report_stats, "_RESAMPLE_CHUNK_VALUES", 300 * 7
+    )
+    chunked = paired_bootstrap(
+        scores_a,
+        scores_b,
+        1000,
+        rng=np.random.default_rng(5),
+    )
+    assert chunked == whole
+
+
+def test_point_estimates_and_intervals():
+    scores_a, scores_b = _scores()
+    result = paired_bootstrap(
+        scores_a,
+        scores_b,
+        2000,
+        rng=np.random.default_rng(1),
+    )
+    difference = scores_a - scores_b
+    assert result["mean_a"] == pytest.approx(
+        scores_a.mean()
+    )
+    assert result["mean_b"] == pytest.approx(
+        scores_b.mean()
+    )
+    assert result["mean_difference"] == pytest.approx(
+        difference.mean()
+    )
+    assert result["win_rate"] == pytest.approx(
+        ((difference > 0) + 0.5 * (difference == 0)).mean()
+    )
+    assert (
+        result["difference_low"]
+        < result["mean_difference"]
+        < result["difference_high"]
+    )
+    assert (
+        result["win_rate_low"]
+        < result["win_rate"]
+        < result["win_rate_high"]
+    )
+
+
+def test_identical_scores_tie_everywhere():
+    scores = np.array([1.0, 3.0, 5.0, 4.0])
+    result = paired_bootstrap(
+        scores, scores, 500, rng=np.random.default_rng(0)
+    )
+    assert result["mean_difference"] == 0.0
+    assert result["difference_low"] == 0.0
+    assert result["difference_high"] == 0.0
+    assert result["win_rate"] == 0.5
+    assert result["win_rate_low"] == 0.5
+    assert result["win_rate_high"] == 0.5
\ No newline at end of file
@@ -0,0 +1,126 @@
+import itertools
+import numpy as np
+import pytest
+from app.utils import results_store
+from app.utils.results_store import (
+    APPEND_CHUNK_ROWS,
+    ResultsStore,
+)
+
+COLUMNS = [
+    {
+        "id": "fluency",
+        "name": "Fluency",
+        "group": "Scoring",
+        "metric_type": "evergreen",
+    }
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Distinct, increasing ingestion times in commit order.
+    clock = itertools.count(1000.0)
+    monkeypatch.setattr(
+        results_store.time, "time", lambda: next(clock)
+    )
+    return ResultsStore(str(tmp_path / "results"))
+
+
+def _ingest(
+    store,
+    file_name,
+    engine="DeepL",
+    target="JA",
+    values=(1.0,),
+    labels=None,
+):
+    writer = store.open_partition(
+        "project",
+        file_name,
+        {
+            "Source Language": "EN",
+            "Target Language": target,
+            "MT Engine": engine,
+        },
+        COLUMNS,
+        has_labels=labels is not None,
+    )
+    for index, value in enumerate(values):
+        writer.append(
+            [value],
+            labels[index] if labels is not None else None,
+        )
+    return writer.commit()
+
+
+def _file_names(slices):
+    return [part["info"]["file_name"] for part in slices]
+
+
+def test_latest_counts_matching_partitions_newest_first(
+    store,
+):
+    for index in range(4):
+        _ingest(store, f"deepl-{index}.xlsx")
+        _ingest(
+            store, f"google-{index}.xlsx", engine="Google"
+        )
+    _ingest(store, "deepl-ko.xlsx", target="KO")
+    assert _file_names(
+        store.find_partitions(
+            "project",
+            target_language="JA",
+            engine="DeepL",
+            latest=3,
+        )
+    ) == ["deepl-3.xlsx", "deepl-2.xlsx", "deepl-1.xlsx"]
+    assert _file_names(
+        store.find_partitions("project", latest=2)
+    ) == ["deepl-ko.xlsx", "google-3.xlsx"]
+    assert len(store.find_partitions("project")) == 9
+
+
+def test_latest_counts_a_stacked_partition_once(store):
+    _ingest(store, "old.xlsx")
+    _ingest(
+        store,
+        "stacked.xlsx",
+        values=(1.0, 2.0, 3.0),
+        labels=["DeepL", "Google", "DeepL"],
+    )
+    slices = store.find_partitions("project", latest=1)
+    assert [
+        (part["engine"], part["label_code"])
+        for part in slices
+    ] == [("DeepL", 0), ("Google", 1)]
+    deepl = store.find_partitions(
+        "project", engine="DeepL", latest=2
+    )
+    assert _file_names(deepl) == [
+        "stacked.xlsx",
+        "old.xlsx",
+    ]
+
+
+def test_partition_without_columns_counts_rows(store):
+    writer = store.open_partition(
+        "project", "empty.xlsx", {}, []
+    )
+    for _ in range(APPEND_CHUNK_ROWS + 5):
+        writer.append([])
+    info = writer.commit()
+    assert info["row_count"] == APPEND_CHUNK_ROWS + 5
+    assert info["columns"] == []
+
+
+def test_values_round_trip_across_chunks(store):
+    values = np.arange(
+        APPEND_CHUNK_ROWS + 3, dtype=np.float64
+    )
+    values[1] = np.nan
+    info = _ingest(store, "big.xlsx", values=values)
+    stored = store.read_column(
+        "project", info["partition_id"], "fluency"
+    )
+    np.testing.assert_array_equal(stored, values)
\ No newline at end of file
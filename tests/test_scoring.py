@@ -0,0 +1,134 @@
+import numpy as np
+from app.utils.formula_engine import (
+    compile_formula,
+    evaluate_formula,
+    formula_numbers,
+)
+from app.utils.scoring import (
+    OverallScorer,
+    custom_overall_formula,
+    overall_scores,
+    scoring_weights,
+)
+from app.utils.template_writer import overall_score_formula
+
+COLUMNS = [
+    {"id": "source", "name": "Source", "group": "Input"},
+    {
+        "id": "fluency",
+        "name": "Fluency",
+        "group": "Scoring",
+    },
+    {
+        "id": "accuracy",
+        "name": "Accuracy",
+        "group": "Scoring",
+    },
+    {"id": "style", "name": "Style", "group": "Scoring"},
+    {
+        "id": "overall",
+        "name": "Overall Score",
+        "group": "Calculated Score",
+        "metric_type": "overall",
+        "formula_excel_style": "",
+    },
+]
+WEIGHTS = {"Fluency": 2, "Accuracy": 3, "Style": None}
+SCORING_IDS = ["fluency", "accuracy", "style"]
+SCORES = np.array(
+    [
+        [4.0, 5.0, 1.0],
+        [3.0, np.nan, 2.0],
+        [np.nan, np.nan, 5.0],
+        [np.nan, np.nan, np.nan],
+    ]
+)
+
+
+def _with_overall_formula(formula):
+    return [
+        (
+            {**col, "formula_excel_style": formula}
+            if col["id"] == "overall"
+            else col
+        )
+        for col in COLUMNS
+    ]
+
+
+def _evaluate(formula, scores):
+    compiled = compile_formula(formula, COLUMNS)
+    return formula_numbers(
+        np.asarray(
+            evaluate_formula(
+                compiled,
+                {
+                    column_id: scores[:, index]
+                    for index, column_id in enumerate(
+                        SCORING_IDS
+                    )
+                },
+                scores.shape[0],
+            )
+        )
+    )
+
+
+def test_overall_scores_match_hand_computed_rows():
+    column_ids, weights = scoring_weights(COLUMNS, WEIGHTS)
+    assert column_ids == ["fluency", "accuracy"]
+    overall = overall_scores(SCORES[:, :2], weights)
+    # (2*4 + 3*5) / 5, (2*3 + 3*0) / 5, then no weighted score at all.
+    np.testing.assert_array_equal(
+        overall, [4.6, 1.2, np.nan, np.nan]
+    )
+
+
+def test_overall_scores_match_the_generated_formula():
+    formula = overall_score_formula(COLUMNS, WEIGHTS)
+    assert formula == '=IF(COUNT(B2,C2)=0,"",(2*B2+3*C2)/5)'
+    _, weights = scoring_weights(COLUMNS, WEIGHTS)
+    np.testing.assert_array_equal(
+        overall_scores(SCORES[:, :2], weights),
+        _evaluate(formula, SCORES),
+    )
+    scorer = OverallScorer(COLUMNS, WEIGHTS)
+    assert scorer.formula is None
+    np.testing.assert_array_equal(
+        scorer(SCORES, SCORING_IDS),
+        _evaluate(formula, SCORES),
+    )
+
+
+def test_generated_formula_entered_by_hand_is_not_custom():
+    columns = _with_overall_formula(
+        'IF(COUNT(B2,C2)=0,"",(2*B2+3*C2)/5)'
+    )
+    assert custom_overall_formula(columns, WEIGHTS) is None
+
+
+def test_edited_overall_formula_is_evaluated():
+    columns = _with_overall_formula("=MAX(B2,C2,D2)")
+    scorer = OverallScorer(columns, WEIGHTS)
+    assert scorer.formula is not None
+    assert scorer.column_ids == SCORING_IDS
+    np.testing.assert_array_equal(
+        scorer(SCORES, SCORING_IDS), [5.0, 3.0, 5.0, 0.0]
+    )
+
+
+def test_edited_overall_formula_text_results_are_unscored():
+    columns = _with_overall_formula(
+        '=IF(B2="","",B2/(C2-C2))'
+    )
+    overall = OverallScorer(columns, WEIGHTS)(
+        SCORES, SCORING_IDS
+    )
+    assert np.isnan(overall).all()
+
+
+def test_broken_overall_formula_leaves_segments_unscored():
+    columns = _with_overall_formula("=B2+")
+    scorer = OverallScorer(columns, WEIGHTS)
+    assert scorer.formula.error
+    assert np.isnan(scorer(SCORES, SCORING_IDS)).all()
\ No newline at end of file
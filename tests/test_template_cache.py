@@ -0,0 +1,132 @@
+import os
+import time
+from app.utils.template_cache import (
+    TemplateCache,
+    template_fingerprint,
+)
+
+
+def _spec(**overrides):
+    spec = {
+        "columns": [
+            {
+                "id": "c1",
+                "name": "Source",
+                "group": "Input",
+                "requires_upload": True,
+            },
+            {
+                "id": "c2",
+                "name": "Fluency",
+                "group": "Scoring",
+            },
+        ],
+        "input_uploads": {"c1": "upload-1"},
+        "metric_weights": {"Fluency": 1},
+        "pass_threshold": 3.0,
+        "readme_html": "<p>Read me</p>",
+        "metadata": {"Source Language": "EN"},
+        "word_count_mode": "formula",
+    }
+    spec.update(overrides)
+    return spec
+
+
+def _entry(cache, tmp_path, name, size, last_used):
+    staged = tmp_path / f"{name}.staged"
+    staged.write_bytes(b"x" * size)
+    path = cache.put(name, str(staged))
+    os.utime(path, (last_used, last_used))
+    return path
+
+
+def test_fingerprint_is_stable_and_ignores_editor_only_keys():
+    spec = _spec()
+    edited = _spec(
+        columns=[
+            {
+                **col,
+                "editable_name": True,
+                "removable": True,
+            }
+            for col in spec["columns"]
+        ]
+    )
+    assert template_fingerprint(
+        spec
+    ) == template_fingerprint(_spec())
+    assert template_fingerprint(
+        spec
+    ) == template_fingerprint(edited)
+
+
+def test_fingerprint_changes_with_workbook_inputs():
+    base = template_fingerprint(_spec())
+    changed = [
+        _spec(readme_html="<p>Other</p>"),
+        _spec(metric_weights={"Fluency": 2}),
+        _spec(pass_threshold=4.0),
+        _spec(input_uploads={"c1": "upload-2"}),
+        _spec(word_count_mode="values"),
+    ]
+    fingerprints = {
+        template_fingerprint(spec) for spec in changed
+    }
+    assert base not in fingerprints
+    assert len(fingerprints) == len(changed)
+    stacked = [
+        {
+            "label": "DeepL",
+            "input_uploads": {"c1": "upload-1"},
+        }
+    ]
+    assert (
+        template_fingerprint(
+            _spec(), stacked_inputs=stacked
+        )
+        != base
+    )
+
+
+def test_get_marks_entries_used_and_drops_expired_ones(
+    tmp_path,
+):
+    cache = TemplateCache(
+        str(tmp_path / "cache"), max_age_seconds=60
+    )
+    now = time.time()
+    fresh = _entry(cache, tmp_path, "fresh", 10, now - 30)
+    stale = _entry(cache, tmp_path, "stale", 10, now - 120)
+    assert cache.get("fresh") == fresh
+    assert os.stat(fresh).st_mtime >= now
+    assert cache.get("stale") is None
+    assert not os.path.exists(stale)
+    assert cache.get("missing") is None
+
+
+def test_evict_drops_least_recently_used_above_max_bytes(
+    tmp_path,
+):
+    cache = TemplateCache(
+        str(tmp_path / "cache"), max_bytes=25
+    )
+    now = time.time()
+    oldest = _entry(cache, tmp_path, "oldest", 10, now - 30)
+    middle = _entry(cache, tmp_path, "middle", 10, now - 20)
+    # The third entry takes the cache over max_bytes.
+    newest = _entry(cache, tmp_path, "newest", 10, now)
+    assert not os.path.exists(oldest)
+    assert os.path.exists(middle)
+    assert os.path.exists(newest)
+
+
+def test_evict_skips_staging_and_foreign_files(tmp_path):
+    cache = TemplateCache(
+        str(tmp_path / "cache"), max_bytes=0
+    )
+    staging = cache.staging_path()
+    foreign = os.path.join(cache.root_dir, "notes.txt")
+    open(foreign, "w").close()
+    cache.evict()
+    assert os.path.exists(staging)
+    assert os.path.exists(foreign)
\ No newline at end of file
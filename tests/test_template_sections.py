@@ -0,0 +1,170 @@
+import os
+import zipfile
+import pytest
+from app.utils.segment_store import SegmentStore
+from app.utils.template_cache import TemplateCache
+from app.utils.template_sections import (
+    _RawZipWriter,
+    build_template_from_sections,
+)
+from app.utils.template_writer import (
+    write_evaluation_template,
+)
+
+COLUMNS = [
+    {
+        "id": "c1",
+        "name": "Source",
+        "group": "Input",
+        "requires_upload": True,
+    },
+    {
+        "id": "c2",
+        "name": "Word Count",
+        "group": "Calculated",
+        "is_word_count_column": True,
+    },
+    {"id": "c3", "name": "Fluency", "group": "Scoring"},
+    {
+        "id": "c4",
+        "name": "Overall Score",
+        "group": "Calculated Score",
+        "metric_type": "overall",
+    },
+]
+
+
+def _spec(**overrides):
+    spec = {
+        "columns": COLUMNS,
+        "input_uploads": {"c1": "src"},
+        "metric_weights": {"Fluency": 1},
+        "pass_threshold": 3.0,
+        "readme_html": "<p>Read me</p>",
+        "metadata": {"Source Language": "EN"},
+        "word_count_mode": "formula",
+    }
+    spec.update(overrides)
+    return spec
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SegmentStore(str(tmp_path / "segments"))
+    store.write_rows(
+        iter([[f"segment {i} ü"] for i in range(200)]),
+        "src.txt",
+        10,
+        "utf-8",
+        upload_id="src",
+    )
+    return store
+
+
+def _parts(path):
+    # core.xml holds the creation time.
+    with zipfile.ZipFile(path) as workbook:
+        assert workbook.testzip() is None
+        return {
+            name: workbook.read(name)
+            for name in workbook.namelist()
+            if name != "docProps/core.xml"
+        }
+
+
+def test_raw_copy_keeps_members_compressed(tmp_path):
+    source_path = str(tmp_path / "source.zip")
+    with zipfile.ZipFile(
+        source_path, "w", zipfile.ZIP_DEFLATED
+    ) as source:
+        source.writestr(
+            "a.xml", "<a>" + "x" * 5000 + "</a>"
+        )
+        source.writestr("ü/b.txt", "b" * 100)
+    target_path = str(tmp_path / "target.zip")
+    with zipfile.ZipFile(source_path) as source:
+        infos = source.infolist()
+    with _RawZipWriter(target_path) as target:
+        for info in infos:
+            target.copy_member(source_path, info)
+        target.write_bytes("extra.json", b"{}")
+    with zipfile.ZipFile(target_path) as target:
+        assert target.testzip() is None
+        assert target.namelist() == [
+            "a.xml",
+            "ü/b.txt",
+            "extra.json",
+        ]
+        assert target.read("a.xml") == (
+            b"<a>" + b"x" * 5000 + b"</a>"
+        )
+        assert target.read("ü/b.txt") == b"b" * 100
+        assert target.read("extra.json") == b"{}"
+        copied = target.getinfo("a.xml")
+        assert copied.compress_type == zipfile.ZIP_DEFLATED
+        assert (
+            copied.compress_size == infos[0].compress_size
+        )
+
+
+def test_zip64_members_are_refused_and_output_removed(
+    tmp_path,
+):
+    target_path = str(tmp_path / "target.zip")
+    info = zipfile.ZipInfo("huge.bin")
+    info.file_size = 0x100000000
+    with pytest.raises(zipfile.LargeZipFile):
+        with _RawZipWriter(target_path) as target:
+            target._add(info, iter([]))
+    assert not os.path.exists(target_path)
+
+
+def test_sections_assemble_to_the_full_build(
+    tmp_path, store
+):
+    full_path = str(tmp_path / "full.xlsx")
+    sections_path = str(tmp_path / "sections.xlsx")
+    cache = TemplateCache(
+        str(tmp_path / "sections"), extension=".zip"
+    )
+    write_evaluation_template(
+        full_path, _spec(), store=store
+    )
+    row_count, rebuilt = build_template_from_sections(
+        sections_path,
+        _spec(),
+        store=store,
+        section_cache=cache,
+    )
+    assert row_count == 200
+    assert rebuilt == [
+        "data",
+        "readme",
+        "metadata",
+        "lists",
+    ]
+    assert _parts(sections_path) == _parts(full_path)
+
+
+def test_only_changed_sections_are_rebuilt(tmp_path, store):
+    cache = TemplateCache(
+        str(tmp_path / "sections"), extension=".zip"
+    )
+    build_template_from_sections(
+        str(tmp_path / "first.xlsx"),
+        _spec(),
+        store=store,
+        section_cache=cache,
+    )
+    full_path = str(tmp_path / "full.xlsx")
+    sections_path = str(tmp_path / "second.xlsx")
+    spec = _spec(readme_html="<p>Changed</p>")
+    _, rebuilt = build_template_from_sections(
+        sections_path,
+        spec,
+        store=store,
+        section_cache=cache,
+    )
+    assert rebuilt == ["readme"]
+    write_evaluation_template(full_path, spec, store=store)
+    assert _parts(sections_path) == _parts(full_path)
\ No newline at end of file